@@ -18,6 +18,8 @@ st.markdown(
     
     **🔥 Smash or Pass** - Rate items one by one to see what rises to the top and what gets left behind
     
+    **📊 Adaptive Ranking** - Rank hundreds of items from quick head-to-head votes, with each matchup picked to settle the ranking fastest
+    
     ### Perfect for settling friend group debates about:
     - Best anime characters, waifus, or husbandos 
     - Ultimate food rankings (pizza toppings, desserts, etc.)
@@ -0,0 +1,50 @@
+"""Cost of drawing the bracket diagram: from scratch, after one vote, and unchanged
+
+Run from the repository root: python benchmarks/bench_bracket_render.py [--sizes 32,256,1024]
+The old page drew one st.markdown element per matchup plus two per round; the diagram
+is a single image whatever the field size.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bracket_render
+from bracket_logic import BracketManager
+
+def timed(function, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="32,256,1024")
+    args = parser.parse_args()
+
+    print(f"{'entrants':>8} {'markdown els':>13} {'svg KB':>7} {'cold ms':>8} {'1 vote ms':>10} "
+          f"{'unchanged ms':>13} {'png ms':>7}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        names = [f"Participant {i}" for i in range(size)]
+        manager = BracketManager()
+        manager.create_bracket(names, names)
+        for matchup in manager.get_current_matchups()[::2]:
+            manager.set_matchup_winner(matchup['id'], matchup['participants'][0])
+        open_matchup = manager.get_current_matchups()[0]
+
+        cold = timed(lambda: bracket_render.render_bracket_svg(manager))
+        svg = bracket_render.render_bracket_svg(manager)[1]
+        manager.vote(open_matchup['id'], open_matchup['participants'][0])
+        one_vote = timed(lambda: bracket_render.render_bracket_svg(manager))
+        unchanged = timed(lambda: bracket_render.render_bracket_svg(manager), repeat=10)
+        png = timed(lambda: bracket_render.render_bracket_png(manager))
+        elements = manager.get_total_matchups() + 2 * manager.get_total_rounds()
+        print(f"{size:>8,} {elements:>13,} {len(svg) / 1e3:>7.0f} {cold:>8.1f} {one_vote:>10.1f} "
+              f"{unchanged:>13.2f} {png:>7.0f}")
+    print(bracket_render.cache_stats())
+
+if __name__ == "__main__":
+    main()
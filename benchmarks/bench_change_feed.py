@@ -0,0 +1,72 @@
+"""Page reruns needed to keep watching sessions current: change notification against blanket refresh
+
+Run from the repository root: python benchmarks/bench_change_feed.py [--sessions N] [--games N] [--seconds N]
+Votes land on a few busy games (Zipf-like); every session watches one game and checks
+for changes every WATCH_INTERVAL seconds, as the pages do.
+"""
+import argparse
+import functools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from change_feed import WATCH_INTERVAL, ChangeHub
+from smash_or_pass_logic import SmashOrPassManager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--seconds", type=int, default=60, help="simulated time")
+    args = parser.parse_args()
+    print(f"{args.sessions:,} sessions on {args.games:,} games over {args.seconds}s; "
+          f"blanket refresh reruns every page {args.sessions * int(args.seconds / WATCH_INTERVAL):,} times")
+    print(f"{'votes/s':>8} {'reruns':>9} {'of blanket':>11} {'vote+publish us':>16} {'idle check us':>14}")
+    for votes_per_second in (10, 100, 1_000):
+        simulate(args, votes_per_second)
+
+def simulate(args, votes_per_second: int):
+    rng = random.Random(19)
+    hub = ChangeHub()
+    games = []
+    for game_id in range(args.games):
+        manager = SmashOrPassManager()
+        manager.create_game([f"Item {i}" for i in range(20)])
+        manager.set_change_listener(functools.partial(hub.publish, game_id))
+        games.append(manager)
+    weights = [1 / (rank + 1) for rank in range(args.games)]
+    watchers = []
+    for _ in range(args.sessions):
+        game_id = rng.choices(range(args.games), weights)[0]
+        watchers.append([game_id, hub.watch(game_id, games[game_id].version), games[game_id].version])
+
+    checks_per_session = int(args.seconds / WATCH_INTERVAL)
+    votes_per_check = int(votes_per_second * WATCH_INTERVAL)
+    reruns = 0
+    vote_seconds = check_seconds = 0.0
+    for _ in range(checks_per_session):
+        targets = rng.choices(range(args.games), weights, k=votes_per_check)
+        start = time.perf_counter()
+        for game_id in targets:
+            games[game_id].vote_smash("Item 0")
+        vote_seconds += time.perf_counter() - start
+        hub.flush()  # at least one coalescing window passes between two checks
+
+        start = time.perf_counter()
+        for session in watchers:
+            _, watcher, shown_version = session
+            if watcher.version > shown_version:
+                session[2] = watcher.version
+                reruns += 1
+        check_seconds += time.perf_counter() - start
+
+    votes = checks_per_session * votes_per_check
+    blanket = checks_per_session * args.sessions
+    print(f"{votes_per_second:>8,} {reruns:>9,} {reruns / blanket:>11.1%} "
+          f"{vote_seconds / votes * 1e6:>16.2f} {check_seconds / blanket * 1e6:>14.2f}")
+
+if __name__ == "__main__":
+    main()
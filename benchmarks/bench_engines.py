@@ -0,0 +1,200 @@
+"""Throughput and latency of the game engines' hot operations, from 4 to 2^16 entrants
+
+Writes one JSON document per run so two commits can be compared:
+    python benchmarks/bench_engines.py --output before.json
+    python benchmarks/bench_engines.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bracket_logic import BracketManager
+from ranking_logic import RankingManager
+from simulation import simulate_ranking, simulate_smash_or_pass, simulate_tournament
+from smash_or_pass_logic import SmashOrPassManager
+
+DEFAULT_SIZES = [4, 16, 64, 256, 1024, 4096, 16384, 65536]
+
+def measure(operation: Callable[[], object], budget: float, max_calls: int) -> Dict:
+    """Call operation repeatedly (within a time budget) and summarise per-call latency"""
+    latencies = []
+    deadline = time.perf_counter() + budget
+    while len(latencies) < max_calls and (not latencies or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': len(latencies) / sum(latencies) if sum(latencies) else float('inf'),
+        'p50_us': statistics.median(latencies) * 1e6,
+        'p99_us': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6
+    }
+
+def bracket_cases(size: int, rng: random.Random) -> Dict[str, Callable[[], object]]:
+    """Build the bracket operations to time at one field size"""
+    names = [f"Participant {i}" for i in range(size)]
+    creator = BracketManager()
+
+    # A tournament played halfway, so the stats getters see real history
+    played = simulate_tournament(size, voters=3, seed=rng.random())['manager']
+    live = BracketManager()
+    live.create_bracket(names)
+    matchups = [(m['id'], m['participants']) for m in live.get_current_matchups()]
+
+    def vote():
+        matchup_id, participants = rng.choice(matchups)
+        live.vote(matchup_id, rng.choice(participants))
+
+    def set_matchup_winner():
+        matchup_id, participants = rng.choice(matchups)
+        live.set_matchup_winner(matchup_id, rng.choice(participants))
+
+    def complete_round():
+        # Deciding every opening matchup of a fresh field, which also seats every winner in round two
+        bracket_manager = BracketManager()
+        bracket_manager.create_bracket(names)
+        opening = bracket_manager.get_current_matchups()
+        start = time.perf_counter()
+        for matchup in opening:
+            bracket_manager.set_matchup_winner(matchup['id'], matchup['participants'][0])
+        return time.perf_counter() - start
+
+    return {
+        'create_bracket': lambda: creator.create_bracket(names),
+        'vote': vote,
+        'set_matchup_winner': set_matchup_winner,
+        'complete_round': complete_round,
+        'get_total_votes': played.get_total_votes,
+        'get_total_matchups': played.get_total_matchups,
+        'get_completed_matchups': played.get_completed_matchups,
+        'get_most_voted_matchup': played.get_most_voted_matchup,
+        'all_current_matchups_complete': played.all_current_matchups_complete,
+        'get_standings': played.get_standings,
+        'get_standings_top10': lambda: played.get_standings(10)
+    }
+
+def smash_or_pass_cases(size: int, rng: random.Random) -> Dict[str, Callable[[], object]]:
+    """Build the Smash or Pass operations to time at one item count"""
+    items = [f"Item {i}" for i in range(size)]
+    played = simulate_smash_or_pass(size, voters=3, seed=rng.random())['manager']
+    creator = SmashOrPassManager()
+
+    return {
+        'create_game': lambda: creator.create_game(items),
+        'vote_smash': lambda: played.vote_smash(rng.choice(items)),
+        'remove_pass_vote': lambda: played.remove_pass_vote(rng.choice(items)),
+        'get_results': played.get_results,
+        'get_results_top10': lambda: played.get_results(limit=10),
+        'get_total_votes': played.get_total_votes,
+        'top_k': lambda: played.top_k(10),
+        'rank_of': lambda: played.rank_of(rng.choice(items))
+    }
+
+def ranking_cases(size: int, rng: random.Random) -> Dict[str, Callable[[], object]]:
+    """Build the adaptive ranking operations to time at one pool size"""
+    items = [f"Item {i}" for i in range(size)]
+    played = simulate_ranking(size, votes=2 * size, seed=rng.random())['manager']
+    creator = RankingManager()
+
+    def vote():
+        first, second = rng.sample(items, 2)
+        played.vote(first, second)
+
+    return {
+        'create_ranking': lambda: creator.create_ranking(items),
+        'vote': vote,
+        'next_pair': played.next_pair,
+        'get_ranking': played.get_ranking,
+        'get_ranking_top10': lambda: played.get_ranking(10)
+    }
+
+def run(sizes: List[int], budget: float, max_calls: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    results = []
+    engines = (('bracket', bracket_cases), ('smash_or_pass', smash_or_pass_cases), ('ranking', ranking_cases))
+    for engine, build_cases in engines:
+        for size in sizes:
+            for operation, call in build_cases(size, rng).items():
+                if operation == 'complete_round':
+                    # Setup dominates, so time only the round itself
+                    timings = sorted(call() for _ in range(max(3, min(max_calls, 50_000 // size))))
+                    summary = {
+                        'calls': len(timings),
+                        'ops_per_sec': len(timings) / sum(timings),
+                        'p50_us': statistics.median(timings) * 1e6,
+                        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6
+                    }
+                else:
+                    summary = measure(call, budget, max_calls)
+                results.append({'engine': engine, 'operation': operation, 'size': size, **summary})
+                print(f"{engine:<14} {operation:<30} {size:>6} {summary['ops_per_sec']:>14,.0f}/s "
+                      f"p50 {summary['p50_us']:>10.1f}us p99 {summary['p99_us']:>10.1f}us", flush=True)
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results: List[Dict], baseline_path: str, threshold: float):
+    """Print operations whose p50 latency moved by more than threshold against a baseline run"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['engine'], r['operation'], r['size']): r for r in baseline['results']}
+    print(f"\nAgainst {baseline_path} ({baseline['commit']}):")
+    changed = 0
+    for result in results:
+        old = before.get((result['engine'], result['operation'], result['size']))
+        if old is None or not old['p50_us']:
+            continue
+        ratio = result['p50_us'] / old['p50_us']
+        if abs(ratio - 1) > threshold:
+            changed += 1
+            label = 'SLOWER' if ratio > 1 else 'faster'
+            print(f"  {label:<6} {result['engine']} {result['operation']} @ {result['size']}: "
+                  f"{old['p50_us']:.1f}us -> {result['p50_us']:.1f}us ({ratio:.2f}x)")
+    if not changed:
+        print(f"  no p50 changes beyond {threshold:.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--budget', type=float, default=0.2, help="seconds spent timing each operation")
+    parser.add_argument('--max-calls', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="earlier --output file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="relative p50 change worth reporting")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.budget, args.max_calls, args.seed)
+    document = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nWrote {len(results)} measurements to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+if __name__ == '__main__':
+    main()
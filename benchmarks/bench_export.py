@@ -0,0 +1,59 @@
+"""Peak memory and speed of streamed exports against building the whole document first
+
+Run from the repository root: python benchmarks/bench_export.py [--votes N] [--items N]
+A journaled Smash or Pass game takes N votes, then its vote history and rankings are
+exported to a temporary file in every format.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_export import EXPORT_FORMATS, export_game, write_export
+from smash_or_pass_logic import SmashOrPassManager
+from vote_journal import open_journaled
+
+def measure(label: str, export) -> None:
+    with tempfile.TemporaryFile() as f:
+        tracemalloc.start()
+        start = time.perf_counter()
+        written = export(f)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"{label:<30} {seconds:>7.2f}s {written / 1e6:>9.1f} MB {peak / 1e6:>10.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--votes", type=int, default=1_000_000)
+    parser.add_argument("--items", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(21)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = open_journaled(directory, SmashOrPassManager, fsync=False)
+        items = [f"Item {i}" for i in range(args.items)]
+        manager.create_game(items)
+        for _ in range(args.votes):
+            (manager.vote_smash if rng.random() < 0.4 else manager.vote_pass)(rng.choice(items))
+        manager.journal.flush()
+        print(f"{args.votes:,} votes on {args.items:,} items")
+        print(f"{'export':<30} {'time':>8} {'size':>12} {'peak memory':>13}")
+
+        for export_format in EXPORT_FORMATS:
+            measure(f"history, {export_format}, streamed",
+                    lambda f: write_export(export_game(manager, 'history', export_format), f))
+        measure("history, csv, whole document",
+                lambda f: f.write("".join(export_game(manager, 'history', 'csv')).encode("utf-8")))
+        for export_format in EXPORT_FORMATS:
+            measure(f"rankings, {export_format}, streamed",
+                    lambda f: write_export(export_game(manager, 'rankings', export_format), f))
+        manager.journal.close()
+
+if __name__ == "__main__":
+    main()
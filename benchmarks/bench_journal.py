@@ -0,0 +1,73 @@
+"""Journal write throughput and recovery time at 1M events
+
+Run from the repository root: python benchmarks/bench_journal.py [--events N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bracket_logic import BracketManager
+from smash_or_pass_logic import SmashOrPassManager
+from vote_journal import open_journaled
+
+def bench_bracket(directory: str, events: int, snapshot_every: int):
+    manager = open_journaled(directory, BracketManager, snapshot_every=snapshot_every)
+    manager.create_bracket([f"Participant {i}" for i in range(64)])
+    matchups = [(m['id'], m['participants']) for m in manager.get_current_matchups()]
+    picks = [(matchup_id, random.choice(participants)) for matchup_id, participants in
+             (random.choice(matchups) for _ in range(events))]
+
+    start = time.perf_counter()
+    for matchup_id, participant in picks:
+        manager.vote(matchup_id, participant)
+    manager.journal.close()
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recovered = open_journaled(directory, BracketManager, snapshot_every=snapshot_every)
+    recover_seconds = time.perf_counter() - start
+    assert recovered.get_total_votes() == manager.get_total_votes()
+    recovered.journal.close()
+    return write_seconds, recover_seconds
+
+def bench_smash_or_pass(directory: str, events: int, snapshot_every: int):
+    manager = open_journaled(directory, SmashOrPassManager, snapshot_every=snapshot_every)
+    items = [f"Item {i}" for i in range(1000)]
+    manager.create_game(items)
+    actions = [manager.vote_smash, manager.vote_pass, manager.remove_smash_vote]
+    picks = [(random.choice(actions), random.choice(items)) for _ in range(events)]
+
+    start = time.perf_counter()
+    for action, item in picks:
+        action(item)
+    manager.journal.close()
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    recovered = open_journaled(directory, SmashOrPassManager, snapshot_every=snapshot_every)
+    recover_seconds = time.perf_counter() - start
+    assert recovered.get_total_votes() == manager.get_total_votes()
+    recovered.journal.close()
+    return write_seconds, recover_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'game':<15} {'snapshot every':>15} {'events/s':>12} {'write s':>9} {'recover s':>10}")
+    for name, bench in (("bracket", bench_bracket), ("smash-or-pass", bench_smash_or_pass)):
+        for snapshot_every in (100_000, 2 * args.events):
+            with tempfile.TemporaryDirectory() as directory:
+                write_seconds, recover_seconds = bench(directory, args.events, snapshot_every)
+            label = "never" if snapshot_every > args.events else f"{snapshot_every:,}"
+            print(f"{name:<15} {label:>15} {args.events / write_seconds:>12,.0f} "
+                  f"{write_seconds:>9.2f} {recover_seconds:>10.2f}")
+
+if __name__ == "__main__":
+    main()
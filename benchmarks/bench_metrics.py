@@ -0,0 +1,77 @@
+"""Cost of the metrics hooks per game operation, with NERD_FIGHTS_METRICS off and on
+
+Run from the repository root: python benchmarks/bench_metrics.py [--votes N]
+Metrics are switched on or off when the app starts, so each setting runs in its own
+process; with metrics off the hooks are the undecorated methods.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def run(votes: int) -> dict:
+    """Time the operations in this process (the child side of main())"""
+    import metrics
+    from bracket_logic import BracketManager
+    from smash_or_pass_logic import SmashOrPassManager
+
+    timings = {}
+    sop_manager = SmashOrPassManager()
+    sop_manager.create_game([f"Item {i}" for i in range(1_000)])
+    start = time.perf_counter()
+    for i in range(votes):
+        sop_manager.vote_smash(f"Item {i % 1_000}")
+    timings['smash_or_pass vote'] = (time.perf_counter() - start) / votes
+
+    start = time.perf_counter()
+    for _ in range(votes // 100):
+        sop_manager.top_k(10)
+    timings['smash_or_pass top_k(10)'] = (time.perf_counter() - start) / (votes // 100)
+
+    names = [f"Participant {i}" for i in range(256)]
+    bracket_manager = BracketManager()
+    bracket_manager.create_bracket(names, names)
+    matchups = bracket_manager.get_current_matchups()
+    start = time.perf_counter()
+    for i in range(votes):
+        matchup = matchups[i % len(matchups)]
+        bracket_manager.vote(matchup['id'], matchup['participants'][0])
+    timings['bracket vote'] = (time.perf_counter() - start) / votes
+
+    if metrics.METRICS_ENABLED:
+        rendered = metrics.REGISTRY.render_prometheus()
+        start = time.perf_counter()
+        metrics.REGISTRY.render_prometheus()
+        timings['render_prometheus'] = time.perf_counter() - start
+        timings['exposition lines'] = rendered.count("\n")
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--votes", type=int, default=200_000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run(args.votes)))
+        return
+
+    results = {}
+    for setting in ("0", "1"):
+        env = dict(os.environ, NERD_FIGHTS_METRICS=setting)
+        output = subprocess.run([sys.executable, __file__, "--child", "--votes", str(args.votes)],
+                                env=env, check=True, capture_output=True, text=True).stdout
+        results[setting] = json.loads(output.splitlines()[-1])
+
+    print(f"{'operation':<26} {'off us':>8} {'on us':>8} {'overhead us':>12}")
+    for operation, off in results["0"].items():
+        on = results["1"][operation]
+        print(f"{operation:<26} {off * 1e6:>8.2f} {on * 1e6:>8.2f} {(on - off) * 1e6:>12.2f}")
+    print(f"render_prometheus: {results['1']['render_prometheus'] * 1e3:.2f} ms for "
+          f"{results['1']['exposition lines']} lines")
+
+if __name__ == "__main__":
+    main()
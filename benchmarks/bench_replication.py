@@ -0,0 +1,154 @@
+"""Convergence and merge throughput of vote replicas running in separate processes
+
+Run from the repository root: python benchmarks/bench_replication.py [--replicas N] [--votes N] [--items N]
+Every process plays one replica of the same game, votes (and removes votes) at random
+while syncing through a shared directory, then all of them sync a final time and compare
+their games. A bracket run does the same with one replica confirming each round's results.
+Exits with status 1 if the replicas end up different, or disagree with the votes counted.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bracket_logic import BracketManager
+from replicated_votes import VoteReplica
+from smash_or_pass_logic import SmashOrPassManager
+
+def smash_or_pass_worker(index: int, args, directory: str, barrier, results):
+    rng = random.Random(index)
+    items = [f"Item {i}" for i in range(args.items)]
+    manager = SmashOrPassManager()
+    manager.create_game(items)
+    replica = VoteReplica(directory, f"sop{index}", interval=args.interval)
+    manager.attach_replica(replica)
+    barrier.wait()
+
+    replica.start()
+    changes = {}  # (item, choice): net change this replica made
+    start = time.perf_counter()
+    for _ in range(args.votes):
+        item = rng.choice(items)
+        choice = rng.choice(('smash', 'pass'))
+        if rng.random() < 0.1:
+            counted = (manager.remove_smash_vote if choice == 'smash' else manager.remove_pass_vote)(item)
+            delta = -1
+        else:
+            counted = (manager.vote_smash if choice == 'smash' else manager.vote_pass)(item)
+            delta = 1
+        if counted:
+            changes[(item, choice)] = changes.get((item, choice), 0) + delta
+    vote_seconds = time.perf_counter() - start
+    replica.stop()
+
+    # Everyone has published everything once all have stopped; one more sync takes it all in
+    barrier.wait()
+    replica.sync()
+    results.put({'replica': index, 'state': manager.export_state(), 'changes': changes,
+                 'vote_seconds': vote_seconds, **replica.stats()})
+
+def bracket_worker(index: int, args, directory: str, barrier, results):
+    rng = random.Random(index)
+    participants = [f"Player {i}" for i in range(args.participants)]
+    manager = BracketManager()
+    manager.create_bracket(participants, participants)
+    replica = VoteReplica(directory, f"bracket{index}", interval=args.interval)
+    manager.attach_replica(replica)
+    barrier.wait()
+
+    replica.start()
+    start = time.perf_counter()
+    for _ in range(manager.get_total_rounds()):
+        matchups = [matchup for matchup in manager.get_current_matchups() if not matchup['completed']]
+        for _ in range(args.votes // max(1, len(matchups))):
+            matchup = rng.choice(matchups)
+            manager.vote(matchup['id'], rng.choice(matchup['participants']))
+        barrier.wait()
+        replica.sync()
+        barrier.wait()
+        replica.sync()
+        if index == 0:
+            for matchup in matchups:
+                votes = manager.get_matchup_votes(matchup['id'])
+                manager.set_matchup_winner(matchup['id'], max(votes, key=votes.get))
+            replica.sync()
+        barrier.wait()
+        replica.sync()
+    vote_seconds = time.perf_counter() - start
+    replica.stop()
+    barrier.wait()
+    replica.sync()
+    results.put({'replica': index, 'state': manager.export_state(), 'winner': manager.get_winner(),
+                 'vote_seconds': vote_seconds, **replica.stats()})
+
+def run(worker, args) -> list:
+    with tempfile.TemporaryDirectory() as directory:
+        barrier = multiprocessing.Barrier(args.replicas)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(index, args, directory, barrier, results))
+                     for index in range(args.replicas)]
+        for process in processes:
+            process.start()
+        collected = sorted((results.get() for _ in processes), key=lambda result: result['replica'])
+        for process in processes:
+            process.join()
+    return collected
+
+def report(label: str, collected: list) -> bool:
+    """Print merge statistics; returns whether every replica ended with the same game, nothing pending"""
+    converged = all(result['state'] == collected[0]['state'] for result in collected)
+    rows = sum(result['rows_merged'] for result in collected)
+    merge_seconds = sum(result['merge_seconds'] for result in collected)
+    pending = sum(result['pending'] for result in collected)
+    print(f"{label:<14} converged: {converged}  pending: {pending}  merged {rows:,} rows "
+          f"at {rows / max(merge_seconds, 1e-9):,.0f} rows/s")
+    for result in collected:
+        print(f"  replica {result['replica']}: {result['messages_merged']:,} messages, "
+              f"{result['merge_seconds'] * 1e3:.1f} ms merging, {result['vote_seconds']:.2f}s voting")
+    return converged and not pending
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--votes", type=int, default=50_000, help="votes per replica")
+    parser.add_argument("--items", type=int, default=1_000)
+    parser.add_argument("--participants", type=int, default=64)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between syncs")
+    args = parser.parse_args()
+
+    failures = []
+    collected = run(smash_or_pass_worker, args)
+    if not report("smash or pass", collected):
+        failures.append("smash or pass replicas did not converge")
+    # Every count should have converged to the changes all replicas counted, summed (floored at zero)
+    expected = {}
+    for result in collected:
+        for key, delta in result['changes'].items():
+            expected[key] = expected.get(key, 0) + delta
+    items = collected[0]['state']['items']
+    counts = collected[0]['state']['votes']
+    mismatched = sum(counts[row][column] != max(0, expected.get((item, choice), 0))
+                     for row, item in enumerate(items) for column, choice in enumerate(('smash', 'pass')))
+    print(f"  counts differing from the summed changes: {mismatched}")
+    if mismatched:
+        failures.append(f"{mismatched} smash or pass counts differ from the summed changes")
+
+    collected = run(bracket_worker, args)
+    if not report("bracket", collected):
+        failures.append("bracket replicas did not converge")
+    winners = sorted({result['winner'] for result in collected}, key=str)
+    print(f"  winners: {winners}")
+    if len(winners) != 1 or winners[0] is None:
+        failures.append("bracket replicas did not agree on a winner")
+
+    if failures:
+        print("\nFailed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
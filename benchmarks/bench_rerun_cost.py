@@ -0,0 +1,81 @@
+"""Server time per vote click: full page rerun vs the matchup fragment alone
+
+Streamlit's AppTest always reruns the whole script, so the fragment is timed by
+running a script made of the page's own function definitions that draws just one
+matchup. Run from the repository root: python benchmarks/bench_rerun_cost.py
+"""
+import argparse
+import ast
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+from bracket_logic import BracketManager
+
+BRACKET_PAGE = glob.glob(os.path.join(ROOT, "pages", "1_*_Tournament_Bracket.py"))[0]
+
+def page_definitions(path: str) -> str:
+    """Get a page's imports and function definitions without its top-level script"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    lines = source.splitlines()
+    segments = []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef)):
+            start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+            segments.append("\n".join(lines[start - 1:node.end_lineno]))
+    return "\n\n".join(segments)
+
+FRAGMENT_SCRIPT = page_definitions(BRACKET_PAGE) + """
+
+bracket_manager = st.session_state.bracket_manager
+display_matchup_voting(bracket_manager, bracket_manager.get_current_matchups()[0], 0)
+"""
+
+def new_bracket(participants: int) -> BracketManager:
+    bracket_manager = BracketManager()
+    bracket_manager.create_bracket([f"Participant {i}" for i in range(participants)])
+    return bracket_manager
+
+def time_clicks(app: AppTest, clicks: int) -> list:
+    bracket_manager = app.session_state.bracket_manager
+    matchup = bracket_manager.get_current_matchups()[0]
+    key = f"vote_{matchup['id']}_{matchup['participants'][0]}"
+    timings = []
+    for _ in range(clicks):
+        start = time.perf_counter()
+        app.button(key=key).click().run()
+        timings.append(time.perf_counter() - start)
+        assert not app.exception, app.exception
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=64)
+    parser.add_argument("--clicks", type=int, default=20)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    full_page = AppTest.from_file(BRACKET_PAGE, default_timeout=120)
+    full_page.session_state.bracket_manager = new_bracket(args.participants)
+    full_page.run()
+    full_timings = time_clicks(full_page, args.clicks)
+
+    fragment = AppTest.from_string(FRAGMENT_SCRIPT, default_timeout=120)
+    fragment.session_state.bracket_manager = new_bracket(args.participants)
+    fragment.run()
+    fragment_timings = time_clicks(fragment, args.clicks)
+
+    print(f"{args.participants} participants, median of {args.clicks} vote clicks")
+    print(f"  full page rerun:  {statistics.median(full_timings) * 1000:8.1f} ms")
+    print(f"  matchup fragment: {statistics.median(fragment_timings) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
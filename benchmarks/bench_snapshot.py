@@ -0,0 +1,36 @@
+"""Size and speed of binary snapshots against the JSON export, for brackets and Smash or Pass games"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bracket_logic import BracketManager
+from simulation import simulate_smash_or_pass, simulate_tournament
+from smash_or_pass_logic import SmashOrPassManager
+from state_codec import decode_snapshot, snapshot_to_token
+
+def per_call_us(operation, repeat: int) -> float:
+    return min(timeit.repeat(operation, number=repeat, repeat=5)) / repeat * 1e6
+
+def report(label: str, manager, fresh_manager, repeat: int):
+    state = manager.export_state()
+    snapshot = manager.export_snapshot()
+    encode = per_call_us(manager.export_snapshot, repeat)
+    decode = per_call_us(lambda: decode_snapshot(snapshot), repeat)
+    restore = per_call_us(lambda: fresh_manager.import_snapshot(snapshot), repeat)
+    print(f"{label:<28} json {len(json.dumps(state)):>9,}B  snapshot {len(snapshot):>8,}B  "
+          f"link {len(snapshot_to_token(snapshot)):>8,} chars  encode {encode:>8.0f}us  "
+          f"decode {decode:>8.0f}us  decode+restore {restore:>8.0f}us  round trip {encode + restore:>8.0f}us")
+
+def main():
+    for size in (8, 64, 256, 4096):
+        manager = simulate_tournament(size, voters=25, seed=size)['manager']
+        report(f"bracket, {size} finished", manager, BracketManager(), max(1, 2000 // size))
+    for size in (100, 10_000, 100_000):
+        manager = simulate_smash_or_pass(size, voters=5, seed=size)['manager']
+        report(f"smash or pass, {size} items", manager, SmashOrPassManager(), max(1, 20_000 // size))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Cold-start import and first-render time of Home.py and each page, checked against a budget
+
+Run from the repository root: python benchmarks/bench_startup.py [--repeat N]
+Every measurement runs in a fresh interpreter, like a newly started instance. "import" is
+the page's top-level imports (Streamlit included); "render" is its first run under
+Streamlit's AppTest once those are loaded, so it includes anything imported lazily. Game
+logic modules must import without Streamlit. Exits with status 1 if anything is over budget.
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Budgets in milliseconds: Streamlit alone takes about 300 ms to import and pandas about 600 ms,
+# so a page importing pandas (or anything as heavy) up front goes over
+IMPORT_BUDGET_MS = 600
+RENDER_BUDGET_MS = 800
+LOGIC_IMPORT_BUDGET_MS = 300
+# Libraries worth knowing about when they show up in a cold start
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "PIL", "matplotlib", "altair")
+
+def measure_page(path: str) -> dict:
+    """Time one page's imports and first render (the child side of main())"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imports = ast.Module([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], [])
+    start = time.perf_counter()
+    exec(compile(imports, path, "exec"), {})
+    import_ms = (time.perf_counter() - start) * 1e3
+    loaded_by_import = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from streamlit.testing.v1 import AppTest
+    start = time.perf_counter()
+    app = AppTest.from_file(path, default_timeout=60).run()
+    render_ms = (time.perf_counter() - start) * 1e3
+    return {
+        'import_ms': import_ms,
+        'render_ms': render_ms,
+        'heavy_after_import': loaded_by_import,
+        'heavy_after_render': [name for name in HEAVY_MODULES if name in sys.modules],
+        'exceptions': [exception.value for exception in app.exception]
+    }
+
+def measure_logic(module: str) -> dict:
+    """Time one game logic module's import and check it didn't pull in Streamlit"""
+    start = time.perf_counter()
+    __import__(module)
+    return {
+        'import_ms': (time.perf_counter() - start) * 1e3,
+        'streamlit': 'streamlit' in sys.modules,
+        'heavy': [name for name in HEAVY_MODULES if name in sys.modules]
+    }
+
+def in_fresh_interpreter(kind: str, target: str, repeat: int) -> dict:
+    """Run a measurement `repeat` times in new processes; timings are the median"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, __file__, "--child", kind, target], cwd=ROOT,
+                                env=dict(os.environ, PYTHONPATH=ROOT), check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    result = runs[-1]
+    for key in result:
+        if key.endswith("_ms"):
+            result[key] = statistics.median(run[key] for run in runs)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        kind, target = args.child
+        print(json.dumps(measure_page(target) if kind == "page" else measure_logic(target)))
+        return
+
+    over_budget = []
+    pages = ["Home.py"] + sorted(os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    print(f"{'page':<34} {'import ms':>10} {'render ms':>10}  heavy modules (after import / after render)")
+    for page in pages:
+        result = in_fresh_interpreter("page", page, args.repeat)
+        flags = []
+        if result['import_ms'] > IMPORT_BUDGET_MS:
+            flags.append("import over budget")
+        if result['render_ms'] > RENDER_BUDGET_MS:
+            flags.append("render over budget")
+        if result['exceptions']:
+            flags.append("raised " + "; ".join(result['exceptions']))
+        over_budget.extend(f"{page}: {flag}" for flag in flags)
+        heavy = f"{','.join(result['heavy_after_import']) or '-'} / {','.join(result['heavy_after_render']) or '-'}"
+        print(f"{page:<34} {result['import_ms']:>10.0f} {result['render_ms']:>10.0f}  {heavy}"
+              + (f"  <- {', '.join(flags)}" if flags else ""))
+
+    print(f"\n{'game logic module':<34} {'import ms':>10}  heavy modules")
+    modules = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(ROOT, "*.py"))
+                     if os.path.basename(path) != "Home.py")
+    for module in modules:
+        result = in_fresh_interpreter("logic", module, args.repeat)
+        flags = []
+        if result['streamlit']:
+            flags.append("imports streamlit")
+        if result['import_ms'] > LOGIC_IMPORT_BUDGET_MS:
+            flags.append("import over budget")
+        over_budget.extend(f"{module}: {flag}" for flag in flags)
+        print(f"{module:<34} {result['import_ms']:>10.1f}  {','.join(result['heavy']) or '-'}"
+              + (f"  <- {', '.join(flags)}" if flags else ""))
+
+    if over_budget:
+        print("\nOver budget:\n  " + "\n  ".join(over_budget))
+        sys.exit(1)
+    print(f"\nAll within budget (import {IMPORT_BUDGET_MS} ms, render {RENDER_BUDGET_MS} ms, "
+          f"game logic import {LOGIC_IMPORT_BUDGET_MS} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Memory and vote throughput of one-vote-per-voter limits, exact and probabilistic
+
+Run from the repository root: python benchmarks/bench_vote_guard.py [--voters N] [--targets N] [--votes N]
+Every vote comes from a random (voter, target) pair out of voters x targets, so the guards
+see the repeats and first votes of a real public poll.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smash_or_pass_logic import SmashOrPassManager
+from vote_guard import VoteGuard
+
+def guard_memory(capacity: int, false_positive_rate, pairs) -> int:
+    """Bytes a guard holds once every pair has been claimed"""
+    tracemalloc.start()
+    guard = VoteGuard(capacity, false_positive_rate)
+    for voter, target in pairs:
+        guard.claim(voter, target)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+def bench_votes(items, pairs, capacity: int, limit, false_positive_rate) -> dict:
+    manager = SmashOrPassManager()
+    if limit:
+        manager.limit_votes_per_voter(capacity, false_positive_rate)
+    manager.create_game(items)
+    start = time.perf_counter()
+    counted = sum(manager.vote_smash(item, voter) for voter, item in pairs)
+    seconds = time.perf_counter() - start
+    return {'us_per_vote': seconds / len(pairs) * 1e6, 'counted': counted}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=100_000)
+    parser.add_argument("--targets", type=int, default=2_000)
+    parser.add_argument("--votes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(18)
+    voters = [f"{rng.getrandbits(128):032x}" for _ in range(args.voters)]  # like session tokens
+    items = [f"Item {i}" for i in range(args.targets)]
+    pairs = [(rng.choice(voters), rng.choice(items)) for _ in range(args.votes)]
+    distinct = len(set(pairs))
+    print(f"{args.votes:,} votes over {args.voters:,} voters x {args.targets:,} items "
+          f"({distinct:,} first votes, {args.votes - distinct:,} repeats)")
+
+    print(f"{'limit':<22} {'us/vote':>8} {'counted':>10} {'wrongly refused':>16} {'guard MB':>9}")
+    modes = (("none", False, None), ("exact", True, None),
+             ("bloom 1%", True, 0.01), ("bloom 0.1%", True, 0.001))
+    for label, limit, false_positive_rate in modes:
+        result = bench_votes(items, pairs, args.votes, limit, false_positive_rate)
+        size = guard_memory(args.votes, false_positive_rate, pairs) / 1e6 if limit else 0.0
+        refused = distinct - result['counted'] if limit else 0
+        print(f"{label:<22} {result['us_per_vote']:>8.2f} {result['counted']:>10,} "
+              f"{refused / distinct:>15.3%} {size:>9.1f}")
+
+    # A Bloom filter's memory is fixed by capacity and rate, whatever the number of voters
+    for false_positive_rate in (0.01, 0.001):
+        for capacity in (1_000_000, 10_000_000, 100_000_000):
+            guard = VoteGuard(capacity, false_positive_rate)
+            print(f"bloom {false_positive_rate:.1%} sized for {capacity:>11,} votes: "
+                  f"{guard.estimated_size() / 1e6:>7.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,586 @@
+import contextlib
+import functools
+import heapq
+import itertools
 import random
-import math
-from typing import List, Dict, Tuple, Optional
+import re
+import threading
+from typing import Callable, Iterator, List, Dict, Tuple, Optional
+from shared_store import StripedLocks
+from vote_batches import tally_vote_batch
+from state_codec import MAX_DECODED_SIZE, SnapshotError, decode_snapshot, encode_snapshot
+from vote_guard import DEFAULT_CAPACITY, VoteGuard
+from change_feed import next_version
+from metrics import instrumented
+
+# Rough memory per participant (name, standings, tree slots), measured with tracemalloc
+BYTES_PER_PARTICIPANT = 550
+# Marks an empty seat, a matchup without a winner, or a participant never eliminated
+NO_PARTICIPANT = -1
+# Matchup ids are "r{round}_m{position}", spelled exactly one way
+MATCHUP_ID = re.compile(r'r([1-9][0-9]*)_m(0|[1-9][0-9]*)')
+
+@functools.lru_cache(maxsize=16384)
+def _parse_matchup_id(matchup_id: str) -> Optional[Tuple[int, int]]:
+    """Get (round, position) from a matchup id, shared by every bracket since ids repeat across them"""
+    match = MATCHUP_ID.fullmatch(matchup_id)
+    return (int(match[1]), int(match[2])) if match else None
+
+class MatchupRecord:
+    """One slot of the bracket tree, with participants as ids into the bracket's name table
+
+    Vote counts live inline and the matchup id ("r{round}_m{position}") is derived from the
+    slot, so a matchup costs one small fixed-size object instead of several dicts and strings.
+    """
+    __slots__ = ('first', 'second', 'winner', 'first_votes', 'second_votes', 'version')
+    
+    def __init__(self):
+        self.first = NO_PARTICIPANT
+        self.second = NO_PARTICIPANT
+        self.winner = NO_PARTICIPANT
+        self.first_votes = 0
+        self.second_votes = 0
+        self.version = 0  # version of the last change to this matchup
+    
+    def side_of(self, participant_id: int) -> Optional[int]:
+        """Get the side (0 or 1) a participant votes on, or None if this matchup is not theirs or not open"""
+        if self.second == NO_PARTICIPANT or self.first == NO_PARTICIPANT:
+            return None
+        if participant_id == self.first:
+            return 0
+        if participant_id == self.second:
+            return 1
+        return None
 
 class BracketManager:
     def __init__(self):
         self.tournament_name = ""
+        # Votes from concurrent sessions only contend when they hash to the same stripe;
+        # structural changes (create, winners, reset) take the bracket lock, and anything
+        # replacing the tree also holds every stripe
+        self._vote_locks = StripedLocks()
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        # Each standings change takes a fresh stamp (next() on a count is atomic), so a
+        # ranking sorted before a concurrent change can never be mistaken for current
+        self._standings_stamps = itertools.count(1)
+        self._voter_guard = None  # set by limit_votes_per_voter()
+        self._on_change = None  # called with the new version after every change
+        self.journal = None
+        self.replica = None  # set by attach_replica()
+        self._clear_bracket_state()
+    
+    def _clear_bracket_state(self):
+        """Clear the bracket, votes and every index and counter derived from them"""
         self.participants = []
-        self.bracket = {}
-        self.votes = {}
         self.bracket_created = False
         self.current_round = 1
         self.total_rounds = 0
+        # Every change takes a fresh process-wide stamp, kept like the vote totals: votes in their
+        # stripe's slot, other changes (which hold the bracket lock) in _structure_version, and
+        # replacing the tree stamps every matchup at once
+        self._tree_version = self._structure_version = next_version()
+        self._stripe_versions = [0] * len(self._vote_locks)
+        # Each distinct name is stored once; matchups and standings refer to it by position
+        self._names = []
+        self._ids = {}  # name: participant id
+        self._entry_nodes = []  # participant id: first-round node (0 if unseeded)
+        # Every matchup of the whole tournament, laid out when the bracket is created as an
+        # implicit binary tree: node 1 is the final and node i is fed by nodes 2i and 2i+1
+        self._tree = [None]
+        self._open = {}  # node: matchup with both sides decided and no winner yet
+        # Running statistics so the progress and stats panels never rescan the bracket
+        self._stripe_vote_totals = [0] * len(self._vote_locks)
+        self._round_completed = [0]  # round_num: completed matchup count
+        self._completed_matchups = 0
+        self._most_voted_node = None
+        self._most_voted_total = 0
+        # Standings of the first len(_wins) ids (the entered participants), updated as votes
+        # land and matchups finish
+        self._wins = []
+        self._losses = []
+        self._votes_received = []
+        self._round_eliminated = []  # 0 while still in
+        self._eliminated_by = []
+        self._standings_stamp = next(self._standings_stamps)
+        self._ranking_cache = (None, [])  # (stamp, ranking)
+        if self._voter_guard is not None:
+            self._voter_guard.clear()  # matchup ids are reused by the next bracket
+        self.replica = None  # and so would the replica's counters
     
-    def create_bracket(self, participants: List[str]):
-        """Create a new tournament bracket"""
-        self.participants = participants.copy()
-        self.total_rounds = int(math.log2(len(participants)))
-        self.current_round = 1
-        self.bracket = {}
-        self.votes = {}
-        self.bracket_created = True
-        
-        # Shuffle participants for random seeding
-        shuffled_participants = participants.copy()
-        random.shuffle(shuffled_participants)
+    def create_bracket(self, participants: List[str], seeding: Optional[List[str]] = None):
+        """Create a new tournament bracket (seeded randomly unless a seeding order is given)
+
+        Any field size works: short fields are padded to the next power of two with byes,
+        which go to the first seeds.
+        """
+        if not participants:
+            raise ValueError("a bracket needs at least one participant")
         
-        # Create first round matchups
-        self._create_round_matchups(1, shuffled_participants)
+        with self._lock, self._vote_locks.holding_all():
+            self._clear_bracket_state()
+            self.participants = participants.copy()
+            self.bracket_created = True
+            self._init_standings()
+            
+            # Shuffle participants for random seeding
+            if seeding is None:
+                seeding = participants.copy()
+                random.shuffle(seeding)
+            
+            self._build_tree(seeding)
+            self._journal('create_bracket', self.participants, seeding)
+    
+    def _init_standings(self):
+        """Number every participant and start them on an empty record (on a cleared bracket)"""
+        self._names = list(dict.fromkeys(self.participants))
+        self._ids = {name: participant_id for participant_id, name in enumerate(self._names)}
+        self._entry_nodes = [0] * len(self._names)
+        count = len(self._names)
+        self._wins = [0] * count
+        self._losses = [0] * count
+        self._votes_received = [0] * count
+        self._round_eliminated = [0] * count
+        self._eliminated_by = [NO_PARTICIPANT] * count
     
-    def _create_round_matchups(self, round_num: int, participants: List[str]):
-        """Create matchups for a specific round"""
-        if round_num not in self.bracket:
-            self.bracket[round_num] = []
+    def _intern(self, name: str) -> int:
+        """Get a name's participant id, numbering it on first sight"""
+        participant_id = self._ids.get(name)
+        if participant_id is None:
+            participant_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+            self._entry_nodes.append(0)
+        return participant_id
+    
+    def _build_tree(self, seeding: List[str]):
+        """Create every matchup of the tournament up front, then seat the first round"""
+        self.total_rounds = max(1, (len(seeding) - 1).bit_length())
+        size = 1 << self.total_rounds
+        self._tree = [None] + [MatchupRecord() for _ in range(1, size)]
+        self._round_completed = [0] * (self.total_rounds + 1)
         
-        matchup_id = 0
-        for i in range(0, len(participants), 2):
-            matchup = {
-                'id': f"r{round_num}_m{matchup_id}",
-                'participants': [participants[i]],
-                'winner': None,
-                'completed': False
-            }
-            
-            # Add second participant if available (handle byes)
-            if i + 1 < len(participants):
-                matchup['participants'].append(participants[i + 1])
+        # The first seeds sit alone in the opening matchups and advance straight away
+        byes = size - len(seeding)
+        entrants = iter(seeding)
+        first = size // 2
+        for node in range(first, size):
+            participant_id = self._seed(node, next(entrants), 0)
+            if node - first < byes:
+                self._finish(node, participant_id)
             else:
-                # Bye - automatically advance
-                matchup['winner'] = participants[i]
-                matchup['completed'] = True
-            
-            self.bracket[round_num].append(matchup)
-            
-            # Initialize votes for this matchup
-            self.votes[matchup['id']] = {}
-            for participant in matchup['participants']:
-                self.votes[matchup['id']][participant] = 0
-            
-            matchup_id += 1
+                self._seed(node, next(entrants), 1)
     
-    def vote(self, matchup_id: str, participant: str):
-        """Record a vote for a participant in a matchup"""
-        if matchup_id in self.votes and participant in self.votes[matchup_id]:
-            self.votes[matchup_id][participant] += 1
+    def _seed(self, node: int, participant: str, side: int) -> int:
+        """Seat a first-round participant by name"""
+        participant_id = self._intern(participant)
+        if not self._entry_nodes[participant_id]:
+            self._entry_nodes[participant_id] = node
+        self._seat(node, participant_id, side)
+        return participant_id
     
-    def get_matchup_votes(self, matchup_id: str) -> Dict[str, int]:
-        """Get vote counts for a matchup"""
-        return self.votes.get(matchup_id, {})
-    
-    def set_matchup_winner(self, matchup_id: str, winner: str):
-        """Set the winner of a matchup"""
-        for round_num in self.bracket:
-            for matchup in self.bracket[round_num]:
-                if matchup['id'] == matchup_id:
-                    matchup['winner'] = winner
-                    matchup['completed'] = True
-                    return
+    def _seat(self, node: int, participant_id: int, side: int):
+        """Put a participant on one side of a matchup, opening it for votes once both sides are filled"""
+        matchup = self._tree[node]
+        if side == 0:
+            matchup.first = participant_id
+        else:
+            matchup.second = participant_id
+        if matchup.first != NO_PARTICIPANT and matchup.second != NO_PARTICIPANT:
+            self._open[node] = matchup
     
-    def get_current_matchups(self) -> List[Dict]:
-        """Get all incomplete matchups from the current round"""
-        if self.current_round not in self.bracket:
-            return []
+    def _finish(self, node: int, winner_id: int):
+        """Complete a matchup and move its winner up into the parent slot"""
+        matchup = self._tree[node]
+        round_num = self._round_of(node)
+        matchup.winner = winner_id
+        self._open.pop(node, None)
+        self._round_completed[round_num] += 1
+        self._completed_matchups += 1
+        self._record_result(matchup, round_num, 1)
+        if node > 1:
+            self._seat(node // 2, winner_id, node % 2)
         
-        return [m for m in self.bracket[self.current_round] 
-                if not m['completed'] and len(m['participants']) == 2]
+        while (self.current_round < self.total_rounds
+               and self._round_completed[self.current_round] == self._round_size(self.current_round)):
+            self.current_round += 1
     
-    def all_current_matchups_complete(self) -> bool:
-        """Check if all matchups in current round are complete"""
-        if self.current_round not in self.bracket:
+    def _reseat(self, node: int, new_winner_id: int) -> bool:
+        """Swap a changed result into the parent matchup, unless it has been voted on or decided
+
+        The caller holds the parent's stripe.
+        """
+        if node == 1:
             return True
         
-        return all(m['completed'] for m in self.bracket[self.current_round])
+        parent = self._tree[node // 2]
+        if parent.winner != NO_PARTICIPANT or parent.first_votes or parent.second_votes:
+            return False
+        if node % 2 == 0:
+            parent.first = new_winner_id
+        else:
+            parent.second = new_winner_id
+        return True
     
-    def advance_round(self):
-        """Advance to the next round"""
-        if not self.all_current_matchups_complete():
+    def _undo_result(self, node: int) -> List[int]:
+        """Take back a matchup's result and everything that followed from it
+
+        The winner leaves the next matchup (and that pairing's votes go with them), and if
+        that matchup was decided too its result is taken back in turn, up the tree.
+        Returns every node changed. Needs the bracket lock and every stripe.
+        """
+        chain = [node]
+        while chain[-1] > 1 and self._tree[chain[-1] // 2].winner != NO_PARTICIPANT:
+            chain.append(chain[-1] // 2)
+        for decided in chain:
+            matchup = self._tree[decided]
+            round_num = self._round_of(decided)
+            self._record_result(matchup, round_num, -1)
+            matchup.winner = NO_PARTICIPANT
+            self._round_completed[round_num] -= 1
+            self._completed_matchups -= 1
+        changed = list(chain)
+        for decided in chain:
+            if decided > 1:
+                self._clear_seat(decided // 2, decided % 2)
+        if chain[-1] > 1:
+            changed.append(chain[-1] // 2)
+        for decided in chain:
+            matchup = self._tree[decided]
+            if matchup.first != NO_PARTICIPANT and matchup.second != NO_PARTICIPANT:
+                self._open[decided] = matchup
+        
+        while self.current_round > 1 and (self._round_completed[self.current_round - 1]
+                                          < self._round_size(self.current_round - 1)):
+            self.current_round -= 1
+        return changed
+    
+    def _clear_seat(self, node: int, side: int):
+        """Empty one side of a matchup, taking its votes (cast on a pairing that no longer stands) out of the stats"""
+        matchup = self._tree[node]
+        removed = matchup.first_votes + matchup.second_votes
+        for participant_id, votes in ((matchup.first, matchup.first_votes), (matchup.second, matchup.second_votes)):
+            if votes and 0 <= participant_id < len(self._votes_received):
+                self._votes_received[participant_id] -= votes
+        matchup.first_votes = matchup.second_votes = 0
+        if side == 0:
+            matchup.first = NO_PARTICIPANT
+        else:
+            matchup.second = NO_PARTICIPANT
+        self._open.pop(node, None)
+        if not removed:
+            return
+        self._stripe_vote_totals[self._vote_locks.stripe_for(self._matchup_id(node))] -= removed
+        self._standings_stamp = next(self._standings_stamps)
+        if node == self._most_voted_node:
+            self._recount_most_voted()
+    
+    def _recount_most_voted(self):
+        """Find the most-voted matchup again by scanning the tree (after votes were taken away)"""
+        with self._stats_lock:
+            self._most_voted_node = None
+            self._most_voted_total = 0
+            for node in range(len(self._tree) - 1, 0, -1):
+                matchup = self._tree[node]
+                matchup_total = matchup.first_votes + matchup.second_votes
+                if matchup_total and matchup_total >= self._most_voted_total:
+                    self._track_most_voted(node, matchup_total)
+    
+    def _round_of(self, node: int) -> int:
+        return self.total_rounds - node.bit_length() + 1
+    
+    def _round_size(self, round_num: int) -> int:
+        return len(self._tree) >> round_num
+    
+    def _round_nodes(self, round_num: int) -> range:
+        return range(len(self._tree) >> round_num, len(self._tree) >> (round_num - 1))
+    
+    def _matchup_id(self, node: int) -> str:
+        round_num = self.total_rounds - node.bit_length() + 1
+        return f"r{round_num}_m{node - (len(self._tree) >> round_num)}"
+    
+    def _node_of(self, matchup_id: str, size: int) -> Optional[int]:
+        """Get the slot of a matchup id in a tree of the given size, or None"""
+        parsed = _parse_matchup_id(matchup_id) if isinstance(matchup_id, str) else None
+        if parsed is None:
+            return None
+        round_num, position = parsed
+        first = size >> round_num
+        return first + position if position < first else None
+    
+    def _view(self, node: int) -> Dict:
+        """Get a matchup as the dict shape the pages and exports use"""
+        matchup = self._tree[node]
+        names = self._names
+        winner = matchup.winner
+        return {
+            'id': self._matchup_id(node),
+            'participants': [names[seat] for seat in (matchup.first, matchup.second) if seat != NO_PARTICIPANT],
+            'winner': names[winner] if winner != NO_PARTICIPANT else None,
+            'completed': winner != NO_PARTICIPANT
+        }
+    
+    def get_matchup(self, matchup_id: str) -> Optional[Dict]:
+        """Get a matchup by id"""
+        node = self._node_of(matchup_id, len(self._tree))
+        return None if node is None else self._view(node)
+    
+    def get_matchup_round(self, matchup_id: str) -> Optional[int]:
+        """Get the round a matchup belongs to"""
+        node = self._node_of(matchup_id, len(self._tree))
+        return None if node is None else self._round_of(node)
+    
+    def get_participant_matchups(self, participant: str) -> List[Dict]:
+        """Get every matchup a participant has been seated in, in round order"""
+        participant_id = self._ids.get(participant)
+        if participant_id is None:
+            return []
+        
+        # A participant's path runs up the tree from their first-round slot for as long as they win
+        matchups = []
+        node = self._entry_nodes[participant_id]
+        while node:
+            matchup = self._tree[node]
+            if participant_id != matchup.first and participant_id != matchup.second:
+                break
+            matchups.append(self._view(node))
+            if matchup.winner != participant_id:
+                break
+            node //= 2
+        return matchups
+    
+    @instrumented('bracket.vote', counts_votes='bracket')
+    def vote(self, matchup_id: str, participant: str, voter: Optional[str] = None) -> bool:
+        """Record a vote for a participant in a matchup (returns whether it counted)
+
+        In a bracket limited to one vote per voter, a voter's second vote in a matchup is
+        refused. Votes without a voter (the host) are never limited.
+        """
+        tree = self._tree
+        node = self._node_of(matchup_id, len(tree))
+        participant_id = self._ids.get(participant)
+        if node is None or participant_id is None:
             return False
+        matchup = tree[node]
         
-        # Get winners from current round
-        winners = []
-        for matchup in self.bracket[self.current_round]:
-            if matchup['winner']:
-                winners.append(matchup['winner'])
+        stripe = self._vote_locks.stripe_for(matchup_id)
+        with self._vote_locks[stripe]:
+            side = matchup.side_of(participant_id)
+            if self._tree is not tree or side is None:
+                return False  # not open, or the bracket was recreated or reset, or the matchup re-seated, under us
+            guard = self._voter_guard
+            if guard is not None and voter is not None and not guard.claim(voter, matchup_id):
+                return False
+            if side == 0:
+                matchup.first_votes += 1
+            else:
+                matchup.second_votes += 1
+            matchup_total = matchup.first_votes + matchup.second_votes
+            self._stripe_vote_totals[stripe] += 1
+            if self.replica is not None:
+                self.replica.record_votes((matchup_id, participant), 1)
+            # Journaled inside the stripe so a snapshot holding every stripe sees vote and event together
+            if guard is None or voter is None:
+                matchup.version = self._journal('vote', matchup_id, participant, stripe=stripe)
+            else:
+                matchup.version = self._journal('vote', matchup_id, participant, voter, stripe=stripe)
         
-        # Create next round if we have more than one winner
-        if len(winners) > 1:
-            self.current_round += 1
-            self._create_round_matchups(self.current_round, winners)
+        if participant_id < len(self._votes_received):
+            with self._vote_locks[self._vote_locks.stripe_for(participant)]:
+                self._votes_received[participant_id] += 1
+            self._standings_stamp = next(self._standings_stamps)
+        
+        # Totals only grow, so anything below the current leader cannot take over
+        if matchup_total >= self._most_voted_total:
+            with self._stats_lock:
+                self._track_most_voted(node, matchup_total)
+        return True
+    
+    def limit_votes_per_voter(self, capacity: int = DEFAULT_CAPACITY, false_positive_rate: Optional[float] = None,
+                              salt: Optional[str] = None):
+        """Allow each voter one vote per matchup from now on (see VoteGuard for the two modes)
+
+        capacity is the number of (voter, matchup) votes a probabilistic guard is sized for.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            self._voter_guard = VoteGuard(capacity, false_positive_rate, salt)
+            self._journal('limit_votes_per_voter', capacity, false_positive_rate, self._voter_guard.salt)
+    
+    def get_voter_guard(self) -> Optional[VoteGuard]:
+        """Get the one-vote-per-voter guard, if this bracket has one"""
+        return self._voter_guard
+    
+    @instrumented('bracket.apply_votes')
+    def apply_votes(self, batch) -> Dict:
+        """Apply many (matchup_id, participant, votes) records at once
+
+        The whole batch is validated first, then each matchup's net votes are added in a
+        single pass, all under the bracket lock and every stripe so no matchup is re-seated
+        or reset in between. Accepts any iterable of 3-tuples or a pandas DataFrame. Returns
+        {'applied': accepted row count, 'rejected': [{'row', 'record', 'reason'}, ...]}.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            net, rejected, accepted = tally_vote_batch(batch, self._check_vote_target, allow_removals=False)
+            if net:
+                replica = self.replica
+                for (matchup_id, participant), count in net.items():
+                    self._add_votes(matchup_id, participant, count)
+                    if replica is not None:
+                        replica.record_votes((matchup_id, participant), count)
+                version = self._journal('apply_votes', [[matchup_id, participant, count]
+                                                        for (matchup_id, participant), count in net.items()])
+                for matchup_id, _ in net:
+                    self._tree[self._node_of(matchup_id, len(self._tree))].version = version
+        return {'applied': accepted, 'rejected': rejected}
+    
+    def _check_vote_target(self, matchup_id, participant) -> Optional[str]:
+        """Get why a vote for participant in matchup_id would be rejected, or None"""
+        node = self._node_of(matchup_id, len(self._tree))
+        if node is None:
+            return "unknown matchup"
+        participant_id = self._ids.get(participant)
+        if participant_id is None or self._tree[node].side_of(participant_id) is None:
+            return "participant is not in this matchup"
+        return None
+    
+    def _track_most_voted(self, node: int, matchup_total: int):
+        """Keep the earliest-created matchup (earliest round, then position) with the highest vote total as the leader"""
+        if matchup_total > self._most_voted_total:
+            self._most_voted_node = node
+            self._most_voted_total = matchup_total
+        elif (matchup_total == self._most_voted_total
+              and (-node.bit_length(), node) < (-self._most_voted_node.bit_length(), self._most_voted_node)):
+            self._most_voted_node = node
+    
+    def get_matchup_votes(self, matchup_id: str) -> Dict[str, int]:
+        """Get vote counts for a matchup (empty until both sides are decided)"""
+        node = self._node_of(matchup_id, len(self._tree))
+        if node is None:
+            return {}
+        return self._votes_of(self._tree[node])
+    
+    def _votes_of(self, matchup: MatchupRecord) -> Dict[str, int]:
+        if matchup.first == NO_PARTICIPANT or matchup.second == NO_PARTICIPANT:
+            return {}
+        votes = {self._names[matchup.first]: matchup.first_votes}
+        second = self._names[matchup.second]
+        votes[second] = votes.get(second, 0) + matchup.second_votes
+        return votes
+    
+    @instrumented('bracket.set_matchup_winner')
+    def set_matchup_winner(self, matchup_id: str, winner: str) -> bool:
+        """Set the winner of a matchup, who moves straight on to their next matchup
+
+        A result can be changed until that next matchup has votes or a winner.
+        Returns whether the result was recorded.
+        """
+        with self._lock:
+            node = self._node_of(matchup_id, len(self._tree))
+            winner_id = self._ids.get(winner)
+            if node is None or winner_id is None:
+                return False
+            matchup = self._tree[node]
+            if matchup.side_of(winner_id) is None:
+                return False
+            
+            # Votes on the next matchup wait in its stripe until the result seating them is journaled,
+            # so a replay never meets a vote before the matchup it went to was open
+            parent_stripe = (self._vote_locks[self._vote_locks.stripe_for(self._matchup_id(node // 2))]
+                             if node > 1 else contextlib.nullcontext())
+            with parent_stripe:
+                if matchup.winner == NO_PARTICIPANT:
+                    self._finish(node, winner_id)
+                elif winner_id != matchup.winner:
+                    if not self._reseat(node, winner_id):
+                        return False
+                    round_num = self._round_of(node)
+                    self._record_result(matchup, round_num, -1)
+                    matchup.winner = winner_id
+                    self._record_result(matchup, round_num, 1)
+                else:
+                    return True
+                version = self._journal('set_matchup_winner', matchup_id, winner)
+            if self.replica is not None:
+                self.replica.record_winner(matchup_id, winner)
+                if node > 1:
+                    # The next matchup's new pairing may already have votes, or a result, merged from other replicas
+                    self._merge_replicated_winners([self._matchup_id(node // 2)])
+                    self._merge_replicated_votes(self._replicated_vote_keys([node // 2]))
+            self._stamp(node, version)
+            if node > 1:
+                self._stamp(node // 2, version)  # the winner's seat in the next matchup
+            return True
+    
+    def _stamp(self, node: int, version: int):
+        """Stamp a matchup with the version of a change to it, in its stripe so a vote can't move it back"""
+        matchup = self._tree[node]
+        with self._vote_locks[self._vote_locks.stripe_for(self._matchup_id(node))]:
+            matchup.version = max(matchup.version, version)
+    
+    @property
+    def version(self) -> int:
+        """Get the version of the last change to this bracket (only ever grows)"""
+        return max(self._structure_version, max(self._stripe_versions))
+    
+    def get_matchup_version(self, matchup_id: str) -> int:
+        """Get the version of the last change to a matchup (0 if there is no such matchup)"""
+        node = self._node_of(matchup_id, len(self._tree))
+        if node is None:
+            return 0
+        return max(self._tree[node].version, self._tree_version)
+    
+    def get_round_version(self, round_num: int) -> int:
+        """Get the version of the last change to any matchup in a round"""
+        if not 1 <= round_num <= self.total_rounds:
+            return 0
+        return max(self._tree_version, *(self._tree[node].version for node in self._round_nodes(round_num)))
+    
+    def get_structure_version(self) -> int:
+        """Get the version of the last change other than a vote (results, names, new brackets, resets)"""
+        return self._structure_version
+    
+    def _record_result(self, matchup: MatchupRecord, round_num: int, sign: int):
+        """Apply (sign=1) or undo (sign=-1) a completed matchup's result in the standings"""
+        winner_id = matchup.winner
+        standings_count = len(self._wins)
+        for participant_id in dict.fromkeys((matchup.first, matchup.second)):
+            if not 0 <= participant_id < standings_count:
+                continue
+            if participant_id == winner_id:
+                self._wins[participant_id] += sign
+            else:
+                self._losses[participant_id] += sign
+                self._round_eliminated[participant_id] = round_num if sign > 0 else 0
+                self._eliminated_by[participant_id] = winner_id if sign > 0 else NO_PARTICIPANT
+        self._standings_stamp = next(self._standings_stamps)
+    
+    def get_current_matchups(self) -> List[Dict]:
+        """Get every matchup open for voting, from any round (earliest rounds first)"""
+        with self._lock:
+            nodes = sorted(self._open, key=lambda node: (-node.bit_length(), node))
+            return [self._view(node) for node in nodes]
+    
+    def all_current_matchups_complete(self) -> bool:
+        """Check if all matchups in current round are complete"""
+        if not 1 <= self.current_round <= self.total_rounds:
             return True
         
+        return self._round_completed[self.current_round] == self._round_size(self.current_round)
+    
+    @instrumented('bracket.advance_round')
+    def advance_round(self):
+        """Kept for older callers and journals; winners now advance as soon as each matchup is decided"""
         return False
     
     def is_tournament_complete(self) -> bool:
         """Check if the tournament is complete"""
-        if not self.bracket_created or self.current_round not in self.bracket:
-            return False
-        
-        # Tournament is complete if current round has only one matchup that's completed
-        current_round_matchups = self.bracket[self.current_round]
-        return (len(current_round_matchups) == 1 and 
-                current_round_matchups[0]['completed'])
+        return self.bracket_created and self._tree[1].winner != NO_PARTICIPANT
     
     def get_winner(self) -> Optional[str]:
         """Get the tournament winner"""
         if not self.is_tournament_complete():
             return None
         
-        return self.bracket[self.current_round][0]['winner']
+        return self._names[self._tree[1].winner]
     
     def get_current_round(self) -> int:
         """Get current round number"""
@@ -137,51 +591,396 @@ class BracketManager:
         return self.total_rounds
     
     def get_bracket_display_data(self) -> Dict:
-        """Get formatted bracket data for display"""
-        return self.bracket
+        """Get formatted bracket data for display ({round: [matchup dict, ...]}, built on each call)"""
+        return {
+            round_num: [self._view(node) for node in self._round_nodes(round_num)]
+            for round_num in range(1, self.total_rounds + 1)
+        }
+    
+    def iter_matchups(self) -> Iterator[Dict]:
+        """Yield every matchup with its round, seats (None while empty) and votes, round by round,
+        one at a time (for exports and diagrams)"""
+        names = self._names
+        for round_num in range(1, self.total_rounds + 1):
+            for node in self._round_nodes(round_num):
+                matchup = self._tree[node]
+                seats = [names[seat] if seat != NO_PARTICIPANT else None for seat in (matchup.first, matchup.second)]
+                yield dict(self._view(node), round=round_num, seats=seats, votes=self._votes_of(matchup))
     
     def get_total_matchups(self) -> int:
         """Get total number of matchups in the tournament"""
-        total = 0
-        for round_matchups in self.bracket.values():
-            total += len(round_matchups)
-        return total
+        return len(self._tree) - 1
     
     def get_completed_matchups(self) -> int:
         """Get number of completed matchups"""
-        completed = 0
-        for round_matchups in self.bracket.values():
-            completed += sum(1 for m in round_matchups if m['completed'])
-        return completed
+        return self._completed_matchups
     
+    @instrumented('bracket.get_total_votes')
     def get_total_votes(self) -> int:
         """Get total number of votes cast"""
-        total_votes = 0
-        for matchup_votes in self.votes.values():
-            total_votes += sum(matchup_votes.values())
-        return total_votes
+        return sum(self._stripe_vote_totals)
+    
+    def estimated_size(self) -> int:
+        """Get a rough memory footprint in bytes (for SharedGameStore's memory budget)"""
+        guard_size = self._voter_guard.estimated_size() if self._voter_guard is not None else 0
+        return BYTES_PER_PARTICIPANT * max(len(self._names), len(self._tree) // 2) + guard_size
     
+    @instrumented('bracket.get_most_voted_matchup')
     def get_most_voted_matchup(self) -> Optional[str]:
         """Get the matchup with the most votes"""
-        max_votes = 0
-        most_voted = None
+        node = self._most_voted_node
+        if node is None:
+            return None
+        
+        matchup = self._tree[node]
+        return f"{self._names[matchup.first]} vs {self._names[matchup.second]} ({self._most_voted_total} votes)"
+    
+    def _standing(self, participant_id: int) -> Dict:
+        eliminated_by = self._eliminated_by[participant_id]
+        return {
+            'name': self._names[participant_id],
+            'wins': self._wins[participant_id],
+            'losses': self._losses[participant_id],
+            'total_votes': self._votes_received[participant_id],
+            'round_eliminated': self._round_eliminated[participant_id] or None,
+            'eliminated_by': self._names[eliminated_by] if eliminated_by != NO_PARTICIPANT else None
+        }
+    
+    def get_participant_standing(self, participant: str) -> Optional[Dict]:
+        """Get wins, losses, votes received and elimination details for a participant"""
+        participant_id = self._ids.get(participant)
+        if participant_id is None or participant_id >= len(self._wins):
+            return None
+        return self._standing(participant_id)
+    
+    @instrumented('bracket.get_standings')
+    def get_standings(self, top_k: Optional[int] = None) -> List[Dict]:
+        """Get participant standings ranked by wins, then votes received (optionally only the top K)"""
+        stamp = self._standings_stamp
+        cached_stamp, ranking = self._ranking_cache
+        if cached_stamp == stamp:
+            return ranking if top_k is None else ranking[:top_k]
         
-        for matchup_id, matchup_votes in self.votes.items():
-            total_matchup_votes = sum(matchup_votes.values())
-            if total_matchup_votes > max_votes:
-                max_votes = total_matchup_votes
-                participants = list(matchup_votes.keys())
-                if len(participants) >= 2:
-                    most_voted = f"{participants[0]} vs {participants[1]} ({max_votes} votes)"
+        wins, votes_received = self._wins, self._votes_received
+        key = lambda participant_id: (wins[participant_id], votes_received[participant_id])
+        if top_k is not None:
+            # Same order as slicing the full sort, without sorting everyone
+            return [self._standing(participant_id)
+                    for participant_id in heapq.nlargest(top_k, range(len(wins)), key=key)]
         
-        return most_voted
+        ranking = [self._standing(participant_id)
+                   for participant_id in sorted(range(len(wins)), key=key, reverse=True)]
+        self._ranking_cache = (stamp, ranking)
+        return ranking
     
     def reset_bracket(self):
         """Reset the entire bracket"""
-        self.tournament_name = ""
-        self.participants = []
-        self.bracket = {}
-        self.votes = {}
-        self.bracket_created = False
-        self.current_round = 1
-        self.total_rounds = 0
+        with self._lock, self._vote_locks.holding_all():
+            self.tournament_name = ""
+            self._clear_bracket_state()
+            self._journal('reset_bracket')
+    
+    def set_tournament_name(self, name: str):
+        """Rename the tournament"""
+        with self._lock:
+            self.tournament_name = name
+            self._journal('set_tournament_name', name)
+    
+    def attach_journal(self, journal):
+        """Record every mutation from now on in a VoteJournal"""
+        self.journal = journal
+        journal.attach(self._snapshot_for_journal)
+    
+    def set_change_listener(self, listener: Optional[Callable[[int], None]]):
+        """Call listener(version) after every change (e.g. ChangeHub.publish for this game)"""
+        self._on_change = listener
+    
+    def attach_replica(self, replica):
+        """Keep this bracket's votes and results in step with other processes through a VoteReplica
+
+        Every replica must create the bracket with the same participants and seeding; only
+        votes and winners are exchanged (a result set twice keeps the later one, and takes
+        back whatever followed from the earlier one on every replica). Merged
+        changes are not journaled (the other replicas' files already hold them), and a new
+        bracket, reset or import detaches the replica.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            self.replica = replica
+            current_votes = {}
+            current_winners = {}
+            for node in range(1, len(self._tree)):
+                matchup = self._tree[node]
+                matchup_id = self._matchup_id(node)
+                for participant, count in self._votes_of(matchup).items():
+                    current_votes[(matchup_id, participant)] = count
+                if matchup.winner != NO_PARTICIPANT and matchup.side_of(matchup.winner) is not None:  # not a bye
+                    current_winners[matchup_id] = self._names[matchup.winner]
+            replica.bind(self, current_votes, current_winners)
+    
+    def _merge_replicated_winners(self, matchup_ids) -> List:
+        """Apply merged results, earlier rounds first; returns the ones waiting on a matchup to be seated
+
+        The merged (last-writer-wins) result always stands, so every replica ends up with
+        the same bracket: changing a result takes back everything that followed from the old
+        one (see _undo_result()), and a result naming someone not seated in the matchup
+        leaves it undecided. Votes come back from the merged counters whenever their
+        participant is seated again.
+        """
+        replica = self.replica
+        if replica is None:
+            return []
+        pending = []
+        with self._lock:
+            with self._vote_locks.holding_all():
+                size = len(self._tree)
+                # Later rounds sit nearer the root, so the largest node is the earliest round
+                queue = []
+                for matchup_id in matchup_ids:
+                    node = self._node_of(matchup_id, size)
+                    if node is not None:
+                        queue.append(-node)
+                heapq.heapify(queue)
+                done = set()
+                changed = set()
+                while queue:
+                    node = -heapq.heappop(queue)
+                    if node in done:
+                        continue
+                    done.add(node)
+                    matchup = self._tree[node]
+                    matchup_id = self._matchup_id(node)
+                    merged_winner = replica.winners.get(matchup_id)
+                    if matchup.first == NO_PARTICIPANT or matchup.second == NO_PARTICIPANT:
+                        if merged_winner is not None:
+                            pending.append(matchup_id)  # not seated here yet
+                        continue
+                    winner_id = self._ids.get(merged_winner, NO_PARTICIPANT)
+                    if matchup.side_of(winner_id) is None:
+                        winner_id = NO_PARTICIPANT
+                    if winner_id == matchup.winner:
+                        continue
+                    if matchup.winner != NO_PARTICIPANT:
+                        changed.update(self._undo_result(node))
+                    changed.add(node)
+                    if winner_id != NO_PARTICIPANT:
+                        self._finish(node, winner_id)
+                    if node > 1:
+                        changed.add(node // 2)
+                        heapq.heappush(queue, -(node // 2))  # its own result may apply (or not) now
+                if changed:
+                    version = self._changed()
+                    for node in changed:
+                        self._tree[node].version = max(self._tree[node].version, version)
+            # Matchups paired up again take their votes back from the counters
+            self._merge_replicated_votes(self._replicated_vote_keys(changed))
+        return pending
+    
+    def _replicated_vote_keys(self, nodes) -> List[Tuple[str, str]]:
+        """Get the (matchup_id, participant) vote counters of every paired-up matchup among nodes"""
+        return [(self._matchup_id(node), participant)
+                for node in nodes for participant in self._votes_of(self._tree[node])]
+    
+    def _merge_replicated_votes(self, keys) -> List:
+        """Bring each (matchup_id, participant) count up to its merged total; returns the keys left pending"""
+        pending = []
+        with self._lock, self._vote_locks.holding_all():
+            replica = self.replica
+            if replica is None:
+                return []
+            size = len(self._tree)
+            changed = []
+            for matchup_id, participant in keys:
+                node = self._node_of(matchup_id, size)
+                participant_id = self._ids.get(participant)
+                if node is None or participant_id is None:
+                    continue
+                matchup = self._tree[node]
+                side = matchup.side_of(participant_id)
+                if side is None:
+                    pending.append((matchup_id, participant))  # waiting on a result that seats them
+                    continue
+                current = matchup.first_votes if side == 0 else matchup.second_votes
+                target = replica.vote_total((matchup_id, participant))
+                if target > current:
+                    self._add_votes(matchup_id, participant, target - current)
+                    changed.append(node)
+            if changed:
+                version = self._changed()
+                for node in changed:
+                    self._tree[node].version = version
+        return pending
+    
+    def _journal(self, op: str, *args, stripe: Optional[int] = None) -> int:
+        """Record a change: append it to the journal, then stamp a version (see _changed())"""
+        if self.journal is not None:
+            self.journal.append(op, args)
+        return self._changed(stripe)
+    
+    def _changed(self, stripe: Optional[int] = None) -> int:
+        """Stamp a new version for a change and tell the listener
+
+        Votes pass the stripe they hold; every other change holds the bracket lock.
+        """
+        version = next_version()
+        if stripe is None:
+            self._structure_version = version
+        else:
+            self._stripe_versions[stripe] = version
+        if self._on_change is not None:
+            self._on_change(version)
+        return version
+    
+    def _snapshot_for_journal(self) -> Tuple[int, Dict]:
+        """Capture state and the journal position it covers, with every writer held off"""
+        with self._lock, self._vote_locks.holding_all():
+            state = self.export_state()
+            # Only journal snapshots carry who has voted; save files and links keep just the votes
+            state['voter_guard'] = self._voter_guard.export() if self._voter_guard is not None else None
+            return self.journal.mark(), state
+    
+    def export_state(self) -> Dict:
+        """Get the primary bracket state as plain JSON-compatible data"""
+        return {
+            'tournament_name': self.tournament_name,
+            'participants': self.participants,
+            'bracket_created': self.bracket_created,
+            'current_round': self.current_round,
+            'total_rounds': self.total_rounds,
+            'rounds': self._export_rounds()
+        }
+    
+    def _export_rounds(self) -> List[List[Dict]]:
+        """Get every matchup as _view() plus its votes, round by round (written out inline, as
+        saves, links and journal snapshots all go through it)"""
+        names, tree = self._names, self._tree
+        rounds = []
+        for round_num in range(1, self.total_rounds + 1):
+            first = len(tree) >> round_num
+            round_matchups = []
+            for position in range(first):
+                matchup = tree[first + position]
+                winner = matchup.winner
+                seats = [names[seat] for seat in (matchup.first, matchup.second) if seat != NO_PARTICIPANT]
+                votes = {}
+                if len(seats) == 2:  # as _votes_of()
+                    votes[seats[0]] = matchup.first_votes
+                    votes[seats[1]] = votes.get(seats[1], 0) + matchup.second_votes
+                round_matchups.append({
+                    'id': f"r{round_num}_m{position}",
+                    'participants': seats,
+                    'winner': names[winner] if winner != NO_PARTICIPANT else None,
+                    'completed': winner != NO_PARTICIPANT,
+                    'votes': votes
+                })
+            rounds.append(round_matchups)
+        return rounds
+    
+    def export_snapshot(self) -> bytes:
+        """Get the whole bracket as a compact binary snapshot (see state_codec)"""
+        with self._lock, self._vote_locks.holding_all():
+            return encode_snapshot('bracket', self.export_state())
+    
+    def import_snapshot(self, data: bytes, max_size: int = MAX_DECODED_SIZE):
+        """Replace this bracket with one saved by export_snapshot() (refused if it inflates past max_size bytes)"""
+        kind, state = decode_snapshot(data, max_size)
+        if kind != 'bracket':
+            raise SnapshotError(f"expected a bracket snapshot, got {kind}")
+        with self._lock:
+            self.import_state(state)
+            self._journal('import_state', state)
+    
+    def import_state(self, state: Dict):
+        """Replace this bracket with exported state, rebuilding indexes and statistics"""
+        with self._lock, self._vote_locks.holding_all():
+            self._clear_bracket_state()
+            if 'voter_guard' in state:
+                guard = state['voter_guard']
+                self._voter_guard = VoteGuard.from_export(guard) if guard else None
+            self.tournament_name = state['tournament_name']
+            self.participants = list(state['participants'])
+            self.bracket_created = state['bracket_created']
+            self._init_standings()
+            if not state['rounds']:
+                return
+            
+            # Round one fixes the seeding; later slots fill in as results are replayed in round order.
+            # Everything is written straight into the tree, with the statistics summed on the way
+            # and settled once at the end, rather than through _add_votes() and _finish() per matchup
+            self._build_tree([participant for exported in state['rounds'][0] for participant in exported['participants']])
+            tree, ids, size = self._tree, self._ids, len(self._tree)
+            standings_count = len(self._wins)
+            wins, losses, votes_received = self._wins, self._losses, self._votes_received
+            round_eliminated, eliminated_by = self._round_eliminated, self._eliminated_by
+            stripe_for, stripe_totals = self._vote_locks.stripe_for, self._stripe_vote_totals
+            for round_num, round_matchups in enumerate(state['rounds'][:self.total_rounds], 1):
+                first = size >> round_num
+                for node, exported in zip(range(first, 2 * first), round_matchups):
+                    matchup = tree[node]
+                    if matchup.first == NO_PARTICIPANT or matchup.second == NO_PARTICIPANT:
+                        continue  # a bye (already advanced) or a matchup still waiting on its seats
+                    matchup_total = 0
+                    for participant, count in exported['votes'].items():
+                        participant_id = ids.get(participant)
+                        if count <= 0 or participant_id is None:
+                            continue
+                        if participant_id == matchup.first:
+                            matchup.first_votes += count
+                        elif participant_id == matchup.second:
+                            matchup.second_votes += count
+                        else:
+                            continue
+                        matchup_total += count
+                        if participant_id < standings_count:
+                            votes_received[participant_id] += count
+                    if matchup_total:
+                        stripe_totals[stripe_for(exported['id'])] += matchup_total
+                        # Nodes come earliest round first, then by position, so the first to reach a total leads
+                        if matchup_total > self._most_voted_total:
+                            self._most_voted_node, self._most_voted_total = node, matchup_total
+                    
+                    winner_id = ids.get(exported['winner'])
+                    if not exported['completed'] or matchup.side_of(winner_id) is None:
+                        continue
+                    matchup.winner = winner_id
+                    del self._open[node]
+                    self._round_completed[round_num] += 1
+                    self._completed_matchups += 1
+                    loser_id = matchup.second if winner_id == matchup.first else matchup.first
+                    if winner_id < standings_count:
+                        wins[winner_id] += 1
+                    if loser_id < standings_count and loser_id != winner_id:
+                        losses[loser_id] += 1
+                        round_eliminated[loser_id] = round_num
+                        eliminated_by[loser_id] = winner_id
+                    if node > 1:
+                        self._seat(node // 2, winner_id, node % 2)
+            
+            while (self.current_round < self.total_rounds
+                   and self._round_completed[self.current_round] == self._round_size(self.current_round)):
+                self.current_round += 1
+            self._standings_stamp = next(self._standings_stamps)
+    
+    def _add_votes(self, matchup_id: str, participant: str, count: int):
+        """Add several votes at once, keeping totals, standings and the most-voted leader in step"""
+        node = self._node_of(matchup_id, len(self._tree))
+        participant_id = self._ids.get(participant)
+        if node is None or participant_id is None or count <= 0:
+            return
+        matchup = self._tree[node]
+        side = matchup.side_of(participant_id)
+        if side is None:
+            return
+        
+        if side == 0:
+            matchup.first_votes += count
+        else:
+            matchup.second_votes += count
+        matchup_total = matchup.first_votes + matchup.second_votes
+        self._stripe_vote_totals[self._vote_locks.stripe_for(matchup_id)] += count
+        if participant_id < len(self._votes_received):
+            self._votes_received[participant_id] += count
+        self._standings_stamp = next(self._standings_stamps)
+        # vote() updates the leader from outside the stripes, so both go through the stats lock
+        if matchup_total >= self._most_voted_total:
+            with self._stats_lock:
+                self._track_most_voted(node, matchup_total)
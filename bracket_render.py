@@ -0,0 +1,217 @@
+import hashlib
+import io
+import threading
+import weakref
+from collections import OrderedDict
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+# Layout in pixels: each matchup is two rows, and rounds are columns from left to right
+ROW_HEIGHT = 22
+BOX_WIDTH = 180
+MATCHUP_GAP = 12
+COLUMN_GAP = 36
+MARGIN = 16
+TITLE_HEIGHT = 36
+FONT_SIZE = 12
+# Names longer than this are cut short so they stay inside their box
+MAX_NAME_LENGTH = 22
+# Drawn matchups kept by content, so a change only redraws the matchups it touched
+FRAGMENT_CACHE_ENTRIES = 20_000
+# Whole diagrams kept by content hash, so an unchanged bracket is never drawn again
+DOCUMENT_CACHE_ENTRIES = 32
+
+_fragments = OrderedDict()  # matchup content: SVG group
+_documents = OrderedDict()  # (bracket digest, 'svg' or 'png'): diagram
+_cache_lock = threading.Lock()
+_known = weakref.WeakKeyDictionary()  # manager: (version, digest, content) as last computed
+_stats = {'fragments_drawn': 0, 'fragment_hits': 0, 'documents_drawn': 0, 'document_hits': 0}
+
+def bracket_content(manager) -> Tuple[str, Tuple]:
+    """Get a bracket's content digest and what the diagram shows
+
+    The content is (title, total rounds, matchups), each matchup a tuple of (round,
+    position, first, second, first votes, second votes, winner); the digest changes
+    exactly when the picture would. Recomputed only when the bracket's version has moved on.
+    """
+    version = manager.version
+    known = _known.get(manager)
+    if known is not None and known[0] == version:
+        return known[1], known[2]
+
+    matchups = []
+    round_num, position = 0, 0
+    for matchup in manager.iter_matchups():
+        if matchup['round'] != round_num:
+            round_num, position = matchup['round'], 0
+        first, second = matchup['seats']
+        votes = matchup['votes']
+        matchups.append((round_num, position, first, second, votes.get(first, 0), votes.get(second, 0),
+                         matchup['winner']))
+        position += 1
+    content = (manager.tournament_name, manager.get_total_rounds(), tuple(matchups))
+    digest = hashlib.blake2b(repr(content).encode("utf-8"), digest_size=16).hexdigest()
+    # A change made while this ran has a newer version, so it can't be mistaken for this content
+    _known[manager] = (version, digest, content)
+    return digest, content
+
+def render_bracket_svg(manager) -> Tuple[str, str]:
+    """Get (content digest, SVG) for a bracket's diagram, drawing only what changed since it was last drawn"""
+    digest, content = bracket_content(manager)
+    cached = _cached_document((digest, 'svg'))
+    if cached is not None:
+        return digest, cached
+    svg = _draw_svg(content)
+    _store_document((digest, 'svg'), svg)
+    return digest, svg
+
+def render_bracket_png(manager) -> Optional[bytes]:
+    """Get the diagram as a PNG, or None if Pillow isn't installed"""
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        return None
+    digest, content = bracket_content(manager)
+    cached = _cached_document((digest, 'png'))
+    if cached is not None:
+        return cached
+
+    title, total_rounds, matchups = content
+    width, height = diagram_size(title, total_rounds)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(FONT_SIZE)
+    bold = ImageFont.load_default(FONT_SIZE + 1)
+    top = TITLE_HEIGHT if title else 0
+    if title:
+        draw.text((MARGIN, MARGIN), title, fill="black", font=ImageFont.load_default(FONT_SIZE + 6))
+    for matchup in matchups:
+        for kind, points, style in _shapes(matchup, total_rounds, top):
+            if kind == 'line':
+                draw.line(points, fill="#999999", width=1)
+            elif kind == 'box':
+                draw.rectangle(points, fill=style['fill'], outline="#999999")
+            else:
+                draw.text(points, style['text'], fill=style['color'], font=bold if style['bold'] else font,
+                          anchor="rm" if style['right'] else "lm")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    png = buffer.getvalue()
+    _store_document((digest, 'png'), png)
+    return png
+
+def diagram_size(title: Optional[str], total_rounds: int) -> Tuple[int, int]:
+    """Get the (width, height) in pixels of a bracket diagram"""
+    first_round = 1 << max(total_rounds - 1, 0)
+    width = 2 * MARGIN + total_rounds * BOX_WIDTH + max(total_rounds - 1, 0) * COLUMN_GAP
+    height = 2 * MARGIN + first_round * (2 * ROW_HEIGHT + MATCHUP_GAP) - MATCHUP_GAP
+    return width, height + (TITLE_HEIGHT if title else 0)
+
+def cache_stats() -> Dict:
+    """Get how many matchups and diagrams were drawn or reused"""
+    with _cache_lock:
+        return dict(_stats, fragments=len(_fragments), documents=len(_documents))
+
+def _draw_svg(content: Tuple) -> str:
+    title, total_rounds, matchups = content
+    width, height = diagram_size(title, total_rounds)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="{FONT_SIZE}">',
+        '<rect width="100%" height="100%" fill="white"/>'
+    ]
+    if title:
+        parts.append(f'<text x="{MARGIN}" y="{MARGIN + 18}" font-size="{FONT_SIZE + 6}" '
+                     f'font-weight="bold">{escape(title)}</text>')
+    parts.append(f'<g transform="translate(0,{TITLE_HEIGHT if title else 0})">')
+    for matchup in matchups:
+        key = (total_rounds, matchup)
+        with _cache_lock:
+            fragment = _fragments.get(key)
+            if fragment is not None:
+                _fragments.move_to_end(key)
+                _stats['fragment_hits'] += 1
+        if fragment is None:
+            fragment = _draw_matchup_svg(matchup, total_rounds)
+            with _cache_lock:
+                _fragments[key] = fragment
+                _stats['fragments_drawn'] += 1
+                while len(_fragments) > FRAGMENT_CACHE_ENTRIES:
+                    _fragments.popitem(last=False)
+        parts.append(fragment)
+    parts.append('</g></svg>')
+    return "".join(parts)
+
+def _draw_matchup_svg(matchup: Tuple, total_rounds: int) -> str:
+    elements = []
+    for kind, points, style in _shapes(matchup, total_rounds, 0):
+        if kind == 'line':
+            (x1, y1), (x2, y2) = points
+            elements.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="#999"/>')
+        elif kind == 'box':
+            x1, y1, x2, y2 = points
+            elements.append(f'<rect x="{x1}" y="{y1}" width="{x2 - x1}" height="{y2 - y1}" '
+                            f'fill="{style["fill"]}" stroke="#999"/>')
+        else:
+            x, y = points
+            anchor = ' text-anchor="end"' if style['right'] else ''
+            weight = ' font-weight="bold"' if style['bold'] else ''
+            elements.append(f'<text x="{x}" y="{y + 4}" fill="{style["color"]}"{anchor}{weight}>'
+                            f'{escape(style["text"])}</text>')
+    return "<g>" + "".join(elements) + "</g>"
+
+def _shapes(matchup: Tuple, total_rounds: int, top: int) -> List[Tuple]:
+    """Lay out one matchup (and its connector to the next round) as shapes for the SVG and PNG output
+
+    Each shape is (kind, points, style): lines ((x1, y1), (x2, y2)) with no style, boxes
+    (x1, y1, x2, y2) and text anchors (x, y).
+    """
+    round_num, position, first, second, first_votes, second_votes, winner = matchup
+    slot = (2 * ROW_HEIGHT + MATCHUP_GAP) << (round_num - 1)
+    x = MARGIN + (round_num - 1) * (BOX_WIDTH + COLUMN_GAP)
+    y = top + MARGIN + position * slot + (slot - MATCHUP_GAP) // 2 - ROW_HEIGHT
+    bye = round_num == 1 and winner is not None and (first is None or second is None)
+    shapes = []
+    for row, (name, votes) in enumerate(((first, first_votes), (second, second_votes))):
+        row_top = y + row * ROW_HEIGHT
+        won = winner is not None and name == winner
+        shapes.append(('box', (x, row_top, x + BOX_WIDTH, row_top + ROW_HEIGHT),
+                       {'fill': "#e6f4e6" if won else "#f7f7f7"}))
+        label = _short(name) if name is not None else ("bye" if bye else "TBD")
+        lost = winner is not None and name is not None and not won
+        shapes.append(('text', (x + 6, row_top + ROW_HEIGHT // 2),
+                       {'text': label, 'bold': won, 'right': False,
+                        'color': "#999999" if lost or name is None else "#000000"}))
+        if name is not None and first is not None and second is not None:
+            shapes.append(('text', (x + BOX_WIDTH - 6, row_top + ROW_HEIGHT // 2),
+                           {'text': str(votes), 'bold': won, 'right': True, 'color': "#555555"}))
+
+    # Connector to this matchup's winner seat in the next round
+    if round_num < total_rounds:
+        parent_slot = slot * 2
+        parent_y = top + MARGIN + (position // 2) * parent_slot + (parent_slot - MATCHUP_GAP) // 2 - ROW_HEIGHT
+        seat_y = parent_y + ROW_HEIGHT // 2 + (position % 2) * ROW_HEIGHT
+        start_x, middle_y = x + BOX_WIDTH, y + ROW_HEIGHT
+        turn_x = start_x + COLUMN_GAP // 2
+        shapes.append(('line', ((start_x, middle_y), (turn_x, middle_y)), None))
+        shapes.append(('line', ((turn_x, middle_y), (turn_x, seat_y)), None))
+        shapes.append(('line', ((turn_x, seat_y), (start_x + COLUMN_GAP, seat_y)), None))
+    return shapes
+
+def _short(name: str) -> str:
+    return name if len(name) <= MAX_NAME_LENGTH else name[:MAX_NAME_LENGTH - 1] + "…"
+
+def _cached_document(key: Tuple):
+    with _cache_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _documents.move_to_end(key)
+            _stats['document_hits'] += 1
+        return document
+
+def _store_document(key: Tuple, document):
+    with _cache_lock:
+        _documents[key] = document
+        _stats['documents_drawn'] += 1
+        while len(_documents) > DOCUMENT_CACHE_ENTRIES:
+            _documents.popitem(last=False)
@@ -0,0 +1,89 @@
+import itertools
+import threading
+import weakref
+from typing import Dict, Hashable
+
+# Changes to one game within this many seconds reach its watchers as a single update
+COALESCE_WINDOW = 0.25
+# How often a page checks whether the shared game it shows has changed
+WATCH_INTERVAL = 2.0
+
+# One process-wide sequence, so a game reloaded from its journal never reuses an older version
+_versions = itertools.count(1)
+
+def next_version() -> int:
+    """Get a fresh version stamp, larger than every stamp handed out before (thread-safe)"""
+    return next(_versions)
+
+class ChangeWatcher:
+    """One session's interest in a game; version is the newest change delivered to it"""
+    __slots__ = ('game_id', 'version', '__weakref__')
+
+    def __init__(self, game_id: Hashable, version: int):
+        self.game_id = game_id
+        self.version = version
+
+class ChangeHub:
+    """In-process publish/subscribe for game changes
+
+    publish() is cheap enough to call on every vote: it only records the newest version,
+    and changes to games nobody watches are dropped. Once per coalescing window the
+    pending versions are delivered to the watchers of the games that changed. Watchers
+    are held weakly, so a session that goes away stops being watched on its own.
+    """
+    def __init__(self, window: float = COALESCE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._watchers: Dict[Hashable, weakref.WeakSet] = {}
+        self._pending: Dict[Hashable, int] = {}  # game_id: newest undelivered version
+        self._timer = None
+        self.published = 0
+        self.coalesced = 0  # changes folded into an already pending update
+        self.deliveries = 0
+
+    def watch(self, game_id: Hashable, version: int = 0) -> ChangeWatcher:
+        """Start watching a game, having already seen everything up to version"""
+        watcher = ChangeWatcher(game_id, version)
+        with self._lock:
+            self._watchers.setdefault(game_id, weakref.WeakSet()).add(watcher)
+        return watcher
+
+    def publish(self, game_id: Hashable, version: int):
+        """Note that a game changed; its watchers hear about it within one window"""
+        with self._lock:
+            self.published += 1
+            if not self._watchers.get(game_id):
+                self._watchers.pop(game_id, None)
+                return
+            pending = self._pending.get(game_id)
+            if pending is not None:
+                self.coalesced += 1
+                if pending >= version:
+                    return
+            self._pending[game_id] = version
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Deliver every pending change now"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+            targets = [(list(self._watchers.get(game_id, ())), version) for game_id, version in pending.items()]
+        for watchers, version in targets:
+            for watcher in watchers:
+                if version > watcher.version:
+                    watcher.version = version
+                    self.deliveries += 1
+
+    def stats(self) -> Dict:
+        """Get publish, coalescing and delivery counts, and the number of watched games"""
+        with self._lock:
+            return {
+                'published': self.published,
+                'coalesced': self.coalesced,
+                'deliveries': self.deliveries,
+                'watched_games': sum(1 for watchers in self._watchers.values() if watchers)
+            }
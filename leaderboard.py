@@ -0,0 +1,140 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional, Tuple
+
+def ranking_key(smash: int, pass_: int, row: int) -> Tuple[float, int]:
+    """Sort key matching get_results(): smash percentage descending, ties in item order"""
+    total_votes = smash + pass_
+    smash_percentage = (smash / total_votes * 100) if total_votes > 0 else 0
+    return (-smash_percentage, row)
+
+class Leaderboard:
+    """Items kept in ranking order as their counts change
+
+    Keys live in sorted buckets of a few hundred entries, with a Fenwick tree over the
+    bucket sizes, so updates cost a bisect plus a short list shift and top_k / page /
+    rank_of never re-sort.
+    """
+    LOAD = 256
+
+    def __init__(self, names: List[str], counts: Iterable[Tuple[int, int]]):
+        self._lock = threading.Lock()
+        self._names = names
+        self._rows = {name: row for row, name in enumerate(names)}
+        self._keys = [ranking_key(smash, pass_, row) for row, (smash, pass_) in enumerate(counts)]
+        ordered = sorted(self._keys)
+        self._buckets = [ordered[i:i + self.LOAD] for i in range(0, len(ordered), self.LOAD)]
+        self._rebuild_index()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, name: str, smash: int, pass_: int):
+        """Move an item to its place for new counts"""
+        row = self._rows[name]
+        key = ranking_key(smash, pass_, row)
+        with self._lock:
+            old_key = self._keys[row]
+            if key == old_key:
+                return
+            self._remove(old_key)
+            self._insert(key)
+            self._keys[row] = key
+
+    def rank_of(self, name: str) -> Optional[int]:
+        """Get an item's 1-based rank"""
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        with self._lock:
+            key = self._keys[row]
+            bucket = bisect_left(self._maxes, key)
+            return self._prefix(bucket) + bisect_left(self._buckets[bucket], key) + 1
+
+    def page(self, offset: int, limit: int) -> List[str]:
+        """Get the names ranked offset+1 .. offset+limit"""
+        names = []
+        with self._lock:
+            if offset < 0 or offset >= len(self._keys) or limit <= 0:
+                return names
+            bucket, position = self._locate(offset)
+            while bucket < len(self._buckets) and len(names) < limit:
+                for _, row in self._buckets[bucket][position:position + limit - len(names)]:
+                    names.append(self._names[row])
+                bucket, position = bucket + 1, 0
+        return names
+
+    def top_k(self, k: int) -> List[str]:
+        """Get the k highest-ranked names"""
+        return self.page(0, k)
+
+    def in_rank_order(self, names: Iterable[str]) -> List[str]:
+        """Get some of the names (all known) sorted by rank"""
+        rows = self._rows
+        with self._lock:
+            keyed = [(self._keys[rows[name]], name) for name in names]
+        keyed.sort()  # outside the lock: keys are unique, so names are never compared
+        return [name for _, name in keyed]
+
+    def _insert(self, key: Tuple[float, int]):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._rebuild_index()
+            return
+        index = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[index]
+        insort(bucket, key)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[index:index + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._rebuild_index()
+        else:
+            self._add(index, 1)
+
+    def _remove(self, key: Tuple[float, int]):
+        index = bisect_left(self._maxes, key)
+        bucket = self._buckets[index]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[index] = bucket[-1]
+            self._add(index, -1)
+        else:
+            del self._buckets[index]
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Recompute bucket maxima and the Fenwick tree of bucket sizes"""
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        tree = [0] * (len(self._buckets) + 1)
+        for index, bucket in enumerate(self._buckets, 1):
+            tree[index] += len(bucket)
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self._tree = tree
+
+    def _add(self, index: int, delta: int):
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, index: int) -> int:
+        """Count entries in the buckets before index"""
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """Find (bucket, offset in bucket) of the entry at a 0-based position"""
+        index = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            candidate = index + step
+            if candidate < len(self._tree) and self._tree[candidate] <= position:
+                index = candidate
+                position -= self._tree[candidate]
+            step >>= 1
+        return index, position
@@ -0,0 +1,248 @@
+import contextlib
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Instrumentation is decided once, at import: when off, hooks are the undecorated functions
+METRICS_ENABLED = os.environ.get("NERD_FIGHTS_METRICS", "0") == "1"
+# Where to keep a Prometheus text-format file up to date (for node_exporter's textfile collector)
+METRICS_FILE = os.environ.get("NERD_FIGHTS_METRICS_FILE")
+# Port for a /metrics endpoint Prometheus can scrape (off unless set)
+METRICS_PORT = int(os.environ.get("NERD_FIGHTS_METRICS_PORT", "0"))
+# Seconds between rewrites of METRICS_FILE
+METRICS_FILE_INTERVAL = 15.0
+# Histogram bucket upper bounds in seconds: 1-2-5 steps from 10 microseconds to 10 seconds
+BUCKETS = tuple(step * 10.0 ** exponent for exponent in range(-5, 1) for step in (1, 2, 5)) + (10.0,)
+# Votes per second are averaged over this many seconds
+RATE_WINDOW = 60
+
+class Histogram:
+    """Counts observations into fixed buckets; quantiles are estimated within a bucket"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(BUCKETS) + 1)  # the last bucket is everything over BUCKETS[-1]
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Get (bucket counts, sum, count) taken together"""
+        with self._lock:
+            return list(self._counts), self.total, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (e.g. 0.99) by interpolating inside its bucket, or None if empty"""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return BUCKETS[-1]
+
+class MetricsRegistry:
+    """Every histogram and counter, by metric family and label"""
+    FAMILIES = {
+        # family: (help, label name)
+        'nerd_fights_operation_seconds': ("Time spent in game manager operations", 'operation'),
+        'nerd_fights_section_seconds': ("Time spent drawing each page section", 'section'),
+        'nerd_fights_rerun_seconds': ("Time taken by each page rerun", 'page')
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._votes: Dict[str, int] = {}  # game type: votes counted
+        self._vote_seconds = deque()  # [second, votes] for the last RATE_WINDOW seconds, oldest first
+
+    def histogram(self, family: str, label: str) -> Histogram:
+        """Get (creating on first use) the histogram for one label of a family"""
+        key = (family, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def count_votes(self, game: str, votes: int = 1):
+        second = int(time.monotonic())
+        with self._lock:
+            self._votes[game] = self._votes.get(game, 0) + votes
+            vote_seconds = self._vote_seconds
+            if vote_seconds and vote_seconds[-1][0] == second:
+                vote_seconds[-1][1] += votes
+            else:
+                vote_seconds.append([second, votes])
+                while vote_seconds[0][0] <= second - RATE_WINDOW:
+                    vote_seconds.popleft()
+
+    def votes_per_second(self) -> float:
+        """Get votes per second over the last RATE_WINDOW seconds"""
+        now = int(time.monotonic())
+        with self._lock:
+            votes = sum(count for second, count in self._vote_seconds if second > now - RATE_WINDOW)
+        return votes / RATE_WINDOW
+
+    def summary(self) -> List[Dict]:
+        """Get count, mean, p50 and p99 (in milliseconds) of every histogram, slowest p99 first"""
+        rows = []
+        for (family, label), histogram in sorted(self._histograms.items()):
+            _, total, count = histogram.snapshot()
+            if not count:
+                continue
+            rows.append({
+                'metric': family.replace('nerd_fights_', '').replace('_seconds', ''),
+                'name': label,
+                'count': count,
+                'mean_ms': total / count * 1e3,
+                'p50_ms': histogram.quantile(0.5) * 1e3,
+                'p99_ms': histogram.quantile(0.99) * 1e3
+            })
+        return sorted(rows, key=lambda row: row['p99_ms'], reverse=True)
+
+    def render_prometheus(self) -> str:
+        """Get every metric in the Prometheus text exposition format"""
+        lines = []
+        histograms = sorted(self._histograms.items())
+        for family, (help_text, label_name) in self.FAMILIES.items():
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} histogram")
+            for (histogram_family, label), histogram in histograms:
+                if histogram_family != family:
+                    continue
+                counts, total, count = histogram.snapshot()
+                label_text = f'{label_name}="{_escape_label(label)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{family}_bucket{{{label_text},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{family}_bucket{{{label_text},le="+Inf"}} {count}')
+                lines.append(f"{family}_sum{{{label_text}}} {total!r}")
+                lines.append(f"{family}_count{{{label_text}}} {count}")
+        lines.append("# HELP nerd_fights_votes_total Votes counted")
+        lines.append("# TYPE nerd_fights_votes_total counter")
+        with self._lock:
+            votes = sorted(self._votes.items())
+        for game, count in votes:
+            lines.append(f'nerd_fights_votes_total{{game="{_escape_label(game)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+def instrumented(operation: str, counts_votes: Optional[str] = None) -> Callable:
+    """Time every call of the decorated function as nerd_fights_operation_seconds{operation=...}
+
+    With counts_votes, each call returning True also counts a vote for that game type.
+    When metrics are off the function is returned untouched.
+    """
+    def decorate(function: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return function
+        histogram = REGISTRY.histogram('nerd_fights_operation_seconds', operation)
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+            if counts_votes is not None and result is True:
+                REGISTRY.count_votes(counts_votes)
+            return result
+
+        return timed
+
+    return decorate
+
+@contextlib.contextmanager
+def _timed_section(histogram: Histogram):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+def section(name: str):
+    """Time a block of page drawing as nerd_fights_section_seconds{section=name} (use with `with`)"""
+    if not METRICS_ENABLED:
+        return contextlib.nullcontext()
+    return _timed_section(REGISTRY.histogram('nerd_fights_section_seconds', name))
+
+def rerun_started() -> float:
+    """Mark the start of a page run; pass the result to record_rerun() at the end"""
+    return time.perf_counter()
+
+def record_rerun(page: str, started: float):
+    """Record how long a page run took"""
+    if METRICS_ENABLED:
+        REGISTRY.histogram('nerd_fights_rerun_seconds', page).observe(time.perf_counter() - started)
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters():
+    """Start the metrics file writer and /metrics endpoint if configured (once per process)"""
+    global _exporters_started
+    if not METRICS_ENABLED or _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_FILE:
+            threading.Thread(target=_write_metrics_file_loop, name="metrics-file", daemon=True).start()
+        if METRICS_PORT:
+            _serve_metrics(METRICS_PORT)
+
+def write_metrics_file(path: str):
+    """Write the current metrics to path atomically, so a collector never reads half a file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render_prometheus())
+    os.replace(tmp_path, path)
+
+def _write_metrics_file_loop():
+    while True:
+        write_metrics_file(METRICS_FILE)
+        time.sleep(METRICS_FILE_INTERVAL)
+
+def _serve_metrics(port: int):
+    """Serve /metrics on a background thread (http.server is only imported when a port is set)"""
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes every few seconds would drown the app's own log
+
+    server = http.server.ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,103 @@
+import codecs
+import csv
+import hashlib
+import itertools
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Union
+
+# Text is decoded this many bytes at a time, so a huge upload never sits in memory as one string
+CHUNK_SIZE = 1 << 20
+# Rows normalized together
+BATCH_ROWS = 4096
+# Duplicates listed individually in a report (all of them are counted)
+MAX_REPORTED_DUPLICATES = 100
+# Parsed lists kept by content hash, so a rerun with the same text or file skips parsing
+CACHE_ENTRIES = 8
+
+_cache = OrderedDict()  # content digest: report
+_cache_lock = threading.Lock()
+
+def normalize_name(name: str) -> str:
+    """Tidy a name: Unicode NFC with runs of whitespace collapsed to single spaces"""
+    return " ".join(unicodedata.normalize("NFC", name).split())
+
+def load_name_list(content: Union[str, bytes], csv_format: bool = False, has_header: bool = False) -> Dict:
+    """Parse pasted text or an uploaded file's bytes into a name list, cached by content hash
+
+    Returns the read_name_list() report. Reports are shared between callers, so treat them as read-only.
+    """
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    digest = hashlib.blake2b(data, digest_size=16, person=bytes((csv_format, has_header))).digest()
+    with _cache_lock:
+        report = _cache.get(digest)
+        if report is not None:
+            _cache.move_to_end(digest)
+            return report
+
+    report = read_name_list(_chunks(data), csv_format, has_header)
+    with _cache_lock:
+        _cache[digest] = report
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return report
+
+def read_name_list(chunks: Iterable[bytes], csv_format: bool = False, has_header: bool = False) -> Dict:
+    """Read one name per line (or the first column of each CSV row) from UTF-8 byte chunks
+
+    Names are normalized and deduplicated case-insensitively, keeping the first spelling.
+    Returns {'names': (...), 'rows': n, 'empty_rows': n, 'duplicate_count': n,
+    'duplicates': [{'row', 'name', 'duplicate_of'}, ...]} with 1-based row numbers.
+    """
+    lines = _lines(chunks)
+    rows = (row[0] if row else "" for row in csv.reader(lines)) if csv_format else lines
+    if has_header:
+        next(rows, None)
+
+    first_seen = {}  # casefolded name: first spelling
+    duplicates = []
+    duplicate_count = 0
+    empty_rows = 0
+    row_number = int(has_header)
+    while batch := list(itertools.islice(rows, BATCH_ROWS)):
+        # Normalizing a whole batch at once keeps the per-row Python work to the dedupe
+        names = [" ".join(raw.split()) if raw.isascii() else normalize_name(raw) for raw in batch]
+        for name, key in zip(names, [name.casefold() for name in names]):
+            row_number += 1
+            if not name:
+                empty_rows += 1
+                continue
+            first = first_seen.get(key)
+            if first is None:
+                first_seen[key] = name
+                continue
+            duplicate_count += 1
+            if len(duplicates) < MAX_REPORTED_DUPLICATES:
+                duplicates.append({'row': row_number, 'name': name, 'duplicate_of': first})
+
+    return {
+        'names': tuple(first_seen.values()),
+        'rows': row_number,
+        'empty_rows': empty_rows,
+        'duplicate_count': duplicate_count,
+        'duplicates': duplicates
+    }
+
+def _chunks(data: bytes) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        yield view[start:start + CHUNK_SIZE]
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode chunks (UTF-8, with or without a byte order mark) into lines that keep their line endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).splitlines(keepends=True)
+        # The last line may continue in the next chunk (a trailing \r may be half of \r\n)
+        pending = lines.pop() if lines and (lines[-1].endswith("\r") or not lines[-1].endswith(("\n", "\r"))) else ""
+        yield from lines
+    tail = pending + decoder.decode(b"", final=True)
+    if tail:
+        yield from tail.splitlines(keepends=True)
@@ -1,8 +1,24 @@
+import contextlib
+import functools
+import os
 import streamlit as st
-import pandas as pd
 import random
 import math
+import uuid
 from bracket_logic import BracketManager
+from shared_store import IDLE_TTL, MEMORY_BUDGET, SharedGameStore, is_valid_game_id
+from state_codec import MAX_LINK_DECODED_SIZE, MAX_LINK_LENGTH, SnapshotError, snapshot_to_token, token_to_snapshot
+from name_lists import load_name_list
+from vote_journal import close_journaled, journal_path, open_journaled, reopen_journaled
+from change_feed import WATCH_INTERVAL, ChangeHub
+from vote_guard import VOTE_LIMIT_FALSE_POSITIVE_RATE
+from results_export import EXPORT_FORMATS, export_to_file, history_is_complete
+from bracket_render import render_bracket_png, render_bracket_svg
+from metrics import METRICS_ENABLED, REGISTRY, record_rerun, rerun_started, section, start_exporters
+from profiling import begin_capture, end_capture
+
+# Timed from the top, so the rerun metric covers the whole page
+rerun_start = rerun_started()
 
 st.set_page_config(
     page_title="Tournament Bracket",
@@ -10,19 +26,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# ?profile=N profiles this session's next N reruns (when the server allows profiling)
+profile_capture = begin_capture('bracket', st.session_state, st.query_params.get("profile"))
+
 # Function definitions first
 def display_voting_interface(bracket_manager):
-    """Display voting interface for current round matchups"""
+    """Display voting interface for every matchup open for voting"""
     current_matchups = bracket_manager.get_current_matchups()
     
     if not current_matchups:
-        st.info("All matchups in this round are complete!")
-        if st.button("Advance to Next Round", type="primary"):
-            bracket_manager.advance_round()
-            st.rerun()
+        st.info("No matchups are open for voting right now.")
         return
     
     st.subheader("Vote on Matchups")
+    st.caption("Winners move on as soon as they are confirmed, so later-round matchups open while others are still voting.")
     
     # Create columns for matchups
     cols_per_row = min(2, len(current_matchups))
@@ -36,22 +53,22 @@ def display_voting_interface(bracket_manager):
                 with cols[col_idx]:
                     display_matchup_voting(bracket_manager, current_matchups[matchup_index], matchup_index)
                 matchup_index += 1
-    
-    # Check if all current matchups are complete
-    if bracket_manager.all_current_matchups_complete():
-        st.success("All matchups in this round are complete!")
-        if st.button("Advance to Next Round", type="primary"):
-            bracket_manager.advance_round()
-            st.rerun()
 
+@st.fragment
 def display_matchup_voting(bracket_manager, matchup, matchup_index):
-    """Display individual matchup voting interface"""
+    """Display individual matchup voting interface (a vote reruns only this matchup)"""
     participant1, participant2 = matchup['participants']
     matchup_id = matchup['id']
     
-    st.markdown(f"### Matchup {matchup_index + 1}")
+    st.markdown(f"### Round {bracket_manager.get_matchup_round(matchup_id)} · Matchup {matchup_index + 1}")
+    st.caption(f"Matchup id: {matchup_id}")
     st.markdown(f"**{participant1}** vs **{participant2}**")
     
+    # In a one-vote-per-person bracket, each session gets one vote per matchup
+    guard = bracket_manager.get_voter_guard()
+    voter = get_voter_token() if guard is not None else None
+    has_voted = guard is not None and guard.has_claimed(voter, matchup_id)
+    
     # Get current votes
     votes = bracket_manager.get_matchup_votes(matchup_id)
     total_votes = sum(votes.values())
@@ -68,17 +85,19 @@ def display_matchup_voting(bracket_manager, matchup, matchup_index):
     # Voting buttons
     col1, col2 = st.columns(2)
     
+    # Votes are recorded in on_click, before the fragment redraws its tally
     with col1:
-        if st.button(f"Vote for {participant1}", key=f"vote_{matchup_id}_{participant1}", width="stretch"):
-            bracket_manager.vote(matchup_id, participant1)
-            st.rerun()
+        st.button(f"Vote for {participant1}", key=f"vote_{matchup_id}_{participant1}", width="stretch",
+                  disabled=has_voted, on_click=cast_vote, args=(bracket_manager, matchup_id, participant1, voter))
     
     with col2:
-        if st.button(f"Vote for {participant2}", key=f"vote_{matchup_id}_{participant2}", width="stretch"):
-            bracket_manager.vote(matchup_id, participant2)
-            st.rerun()
+        st.button(f"Vote for {participant2}", key=f"vote_{matchup_id}_{participant2}", width="stretch",
+                  disabled=has_voted, on_click=cast_vote, args=(bracket_manager, matchup_id, participant2, voter))
+    
+    if has_voted:
+        st.caption("✅ You've voted in this matchup")
     
-    # Determine winner button (admin feature)
+    # Determine winner button (admin feature); a winner opens the next matchup, so rerun the whole page
     if total_votes > 0:
         vote_counts = list(votes.values())
         if len(set(vote_counts)) == 1 and len(vote_counts) == 2:
@@ -99,37 +118,47 @@ def display_matchup_voting(bracket_manager, matchup, matchup_index):
                     bracket_manager.set_matchup_winner(matchup_id, winner)
                     st.rerun()
 
+def cast_vote(bracket_manager, matchup_id, participant, voter):
+    """Record this session's vote without making the watcher rerun the whole page for it
+
+    The matchup's panel redraws itself after the click, so if its round held nothing
+    else unseen, the round counts as shown at its new version.
+    """
+    round_num = bracket_manager.get_matchup_round(matchup_id)
+    seen = bracket_manager.get_round_version(round_num)
+    if bracket_manager.vote(matchup_id, participant, voter):
+        shown_rounds = st.session_state.get('bracket_shown', {}).get('rounds', {})
+        if shown_rounds.get(round_num) == seen:
+            shown_rounds[round_num] = bracket_manager.get_round_version(round_num)
+
 def display_bracket(bracket_manager):
-    """Display bracket visualization"""
-    bracket_data = bracket_manager.get_bracket_display_data()
-    
-    if not bracket_data:
+    """Display the bracket diagram (redrawn only where the bracket changed) with downloads for sharing"""
+    if not bracket_manager.bracket_created:
         st.info("Bracket will appear here once created.")
         return
     
-    # Create a simple text-based bracket visualization
     st.markdown("### Tournament Bracket")
-    
-    for round_num, round_data in bracket_data.items():
-        st.markdown(f"**Round {round_num}**")
-        
-        for matchup in round_data:
-            if matchup['completed']:
-                winner = matchup['winner']
-                loser = matchup['participants'][0] if matchup['participants'][1] == winner else matchup['participants'][1]
-                st.markdown(f"- ~~{loser}~~ vs **{winner}** ✅")
-            elif len(matchup['participants']) == 2:
-                p1, p2 = matchup['participants']
-                votes = bracket_manager.get_matchup_votes(matchup['id'])
-                vote_info = f" ({votes[p1]} - {votes[p2]})" if sum(votes.values()) > 0 else ""
-                st.markdown(f"- {p1} vs {p2}{vote_info}")
+    digest, svg = render_bracket_svg(bracket_manager)
+    st.image(svg)
+    
+    file_name = bracket_manager.tournament_name or "bracket"
+    svg_col, png_col = st.columns(2)
+    with svg_col:
+        st.download_button("⬇️ Download SVG", data=svg, file_name=f"{file_name}.svg", mime="image/svg+xml")
+    with png_col:
+        # Rasterizing is the slow part, so only for sessions that ask, and once per bracket state
+        if st.session_state.get('bracket_png_digest') == digest:
+            png = render_bracket_png(bracket_manager)
+            if png is not None:
+                st.download_button("⬇️ Download PNG", data=png, file_name=f"{file_name}.png", mime="image/png")
             else:
-                st.markdown(f"- {matchup['participants'][0]} (bye)")
-        
-        st.markdown("---")
+                st.caption("PNG downloads need Pillow installed.")
+        elif st.button("🖼️ Make PNG"):
+            st.session_state.bracket_png_digest = digest
+            st.rerun()
 
 def display_tournament_progress(bracket_manager):
-    """Display tournament progress statistics"""
+    """Display tournament progress statistics (results change it, and they rerun the whole page)"""
     st.subheader("Tournament Progress")
     
     total_matchups = bracket_manager.get_total_matchups()
@@ -159,39 +188,8 @@ def display_tournament_final_results(bracket_manager):
     
     st.markdown("---")
     
-    # Get all participants and their performance using available methods
-    participants = bracket_manager.participants
-    participant_stats = []
-    
-    for participant in participants:
-        # Get wins and losses for each participant
-        wins = 0
-        losses = 0
-        total_votes_received = 0
-        
-        # Check all matchups to calculate stats using bracket data
-        bracket_data = bracket_manager.bracket
-        for round_num in bracket_data:
-            for matchup in bracket_data[round_num]:
-                if participant in matchup.get('participants', []):
-                    votes = bracket_manager.get_matchup_votes(matchup['id'])
-                    participant_votes = votes.get(participant, 0)
-                    total_votes_received += participant_votes
-                    
-                    if matchup.get('completed') and matchup.get('winner') == participant:
-                        wins += 1
-                    elif matchup.get('completed') and participant in matchup['participants']:
-                        losses += 1
-        
-        participant_stats.append({
-            'name': participant,
-            'wins': wins,
-            'losses': losses,
-            'total_votes': total_votes_received
-        })
-    
-    # Sort by wins (descending), then by total votes (descending)
-    participant_stats.sort(key=lambda x: (x['wins'], x['total_votes']), reverse=True)
+    # Standings are maintained by the bracket as matchups complete
+    participant_stats = bracket_manager.get_standings()
     
     st.markdown("### Tournament Rankings")
     
@@ -215,6 +213,8 @@ def display_tournament_final_results(bracket_manager):
         with col3:
             st.markdown(f"{stats['wins']} wins, {stats['losses']} losses")
             st.markdown(f"({stats['total_votes']} total votes)")
+            if stats['eliminated_by']:
+                st.markdown(f"Knocked out in round {stats['round_eliminated']} by {stats['eliminated_by']}")
         
         st.markdown("---")
     
@@ -246,15 +246,184 @@ def display_tournament_stats(bracket_manager):
     if most_voted_matchup:
         st.markdown(f"**Most Popular Matchup:** {most_voted_matchup}")
 
+BRACKET_EXPORTS = {
+    'standings': "Standings",
+    'rounds': "Results by round",
+    'statistics': "Statistics",
+    'history': "Vote history"
+}
+
+def display_bracket_export(bracket_manager, tournament_id):
+    """Stream a chosen export to a file on the server, then offer it for download"""
+    with st.expander("Export Results"):
+        # Only shared brackets keep a vote history (in their journal)
+        kinds = [kind for kind in BRACKET_EXPORTS if kind != 'history' or tournament_id]
+        labels = dict(BRACKET_EXPORTS)
+        partial_history = tournament_id and not history_is_complete(bracket_manager.journal)
+        if partial_history:
+            labels['history'] = "Vote history (since last snapshot)"
+        kind = st.selectbox("Export", kinds, format_func=labels.get)
+        if kind == 'history' and partial_history:
+            st.caption("Only votes since the journal's last snapshot are kept, and one is taken whenever "
+                       "the game is unloaded, so this is often short. Run the server with "
+                       "NERD_FIGHTS_KEEP_HISTORY=1 to keep the full history.")
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True,
+                                 format_func=lambda export_format: EXPORT_FORMATS[export_format][0])
+        if st.button("Prepare Export"):
+            with st.spinner("Exporting..."):
+                path = export_to_file(bracket_manager, kind, export_format)
+            previous = st.session_state.get('bracket_export')
+            if previous:
+                with contextlib.suppress(OSError):
+                    os.remove(previous['path'])
+            st.session_state.bracket_export = {'path': path, 'kind': kind, 'format': export_format}
+        
+        prepared = st.session_state.get('bracket_export')
+        if prepared and os.path.exists(prepared['path']):
+            _, extension, mime = EXPORT_FORMATS[prepared['format']]
+            with open(prepared['path'], "rb") as f:
+                st.download_button(
+                    f"⬇️ Download {labels[prepared['kind']]}",
+                    data=f,
+                    file_name=f"{bracket_manager.tournament_name or 'bracket'}_{prepared['kind']}.{extension}",
+                    mime=mime
+                )
+
+def display_metrics_panel():
+    """Sidebar panel with this page's rerun latency, votes per second and the slowest timings"""
+    rerun = REGISTRY.histogram('nerd_fights_rerun_seconds', 'bracket')
+    p50, p99 = rerun.quantile(0.5), rerun.quantile(0.99)
+    with st.sidebar.expander("📈 Performance Metrics"):
+        st.markdown(f"**Rerun:** p50 {p50 * 1e3:.0f} ms · p99 {p99 * 1e3:.0f} ms" if p50 is not None
+                    else "**Rerun:** no full runs yet")
+        st.markdown(f"**Votes per second:** {REGISTRY.votes_per_second():.1f} (last minute, every game)")
+        st.dataframe(REGISTRY.summary(), hide_index=True)
+
+def get_voter_token():
+    """Identify this browser session to brackets that allow one vote per person"""
+    if 'voter_token' not in st.session_state:
+        st.session_state.voter_token = uuid.uuid4().hex
+    return st.session_state.voter_token
+
+def read_entered_names(text):
+    """Get the pasted participants, or an uploaded TXT/CSV list in their place, noting any rows skipped
+
+    Parsing is cached by content, so reruns with the same list skip it.
+    """
+    uploaded_list = st.file_uploader(
+        "Or upload a list",
+        type=["txt", "csv"],
+        help="TXT: one per line. CSV: the first column of each row."
+    )
+    if uploaded_list is None:
+        name_list = load_name_list(text)
+    else:
+        csv_format = uploaded_list.name.lower().endswith(".csv")
+        has_header = csv_format and st.checkbox("First row is a header")
+        name_list = load_name_list(uploaded_list.getvalue(), csv_format, has_header)
+    
+    if name_list['duplicate_count'] or name_list['empty_rows']:
+        st.caption(f"Skipped {name_list['duplicate_count']} duplicate and {name_list['empty_rows']} empty rows")
+    if name_list['duplicates']:
+        with st.expander("Duplicates"):
+            st.dataframe(name_list['duplicates'], hide_index=True)
+    return list(name_list['names'])
+
+def shown_versions(bracket_manager):
+    """Get the versions of everything a full run is about to draw (every round is in the diagram)"""
+    return {
+        'version': bracket_manager.version,
+        'structure': bracket_manager.get_structure_version(),
+        'rounds': {round_num: bracket_manager.get_round_version(round_num)
+                   for round_num in range(1, bracket_manager.get_total_rounds() + 1)}
+    }
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def watch_shared_bracket(bracket_manager, tournament_id):
+    """Rerun the page once a round it shows (or the bracket itself) changed since it was drawn
+
+    A check that finds no change does nothing. Votes cast from this session are already
+    counted as shown by cast_vote(), so they never cost a full rerun.
+    """
+    shown = st.session_state.bracket_shown
+    watcher = st.session_state.get('bracket_watcher')
+    if watcher is None or watcher.game_id != tournament_id:
+        watcher = st.session_state.bracket_watcher = get_change_hub().watch(tournament_id, shown['version'])
+    if watcher.version <= shown['version']:
+        return
+    shown['version'] = watcher.version
+    if (bracket_manager.get_structure_version() > shown['structure']
+            or any(bracket_manager.get_round_version(round_num) > version
+                   for round_num, version in shown['rounds'].items())):
+        st.rerun()
+
 # Main application starts here
 st.title("🏆 Tournament Bracket Creator")
 st.markdown("Create and share tournament brackets with voting functionality!")
 
+@st.cache_resource
+def get_shared_store():
+    """One store per server process so every session opening a shared link sees the same votes
+
+    Idle games, and the least recently used ones past the memory budget, are spilled to
+    their journals and reloaded on their next visit.
+    """
+    return SharedGameStore(
+        memory_budget=MEMORY_BUDGET,
+        idle_ttl=IDLE_TTL,
+        on_evict=close_journaled,
+        on_revive=reopen_journaled
+    )
+
+@st.cache_resource
+def get_change_hub():
+    """One hub per server process, so a change reaches every session watching that bracket"""
+    return ChangeHub()
+
+def publish_change(tournament_id, version):
+    """Tell the sessions watching this bracket it changed, and keep it from going idle while it's voted on"""
+    get_shared_store().touch(tournament_id)
+    get_change_hub().publish(tournament_id, version)
+
+def get_shared_bracket(tournament_id):
+    """Get a shared bracket, restoring it from its journal after a restart or eviction"""
+    def load():
+        manager = open_journaled(journal_path("tournaments", tournament_id), BracketManager)
+        manager.set_change_listener(functools.partial(publish_change, tournament_id))
+        return manager
+    return get_shared_store().get_or_create(tournament_id, load)
+
+# Serves /metrics or writes the metrics file when configured (once per server process)
+start_exporters()
+
 # Initialize session state
 if 'bracket_manager' not in st.session_state:
     st.session_state.bracket_manager = BracketManager()
 
-bracket_manager = st.session_state.bracket_manager
+# A tournament id in the URL switches this session onto the shared bracket
+tournament_id = st.query_params.get("tournament")
+if tournament_id and not is_valid_game_id(tournament_id):
+    tournament_id = None
+if tournament_id:
+    bracket_manager = get_shared_bracket(tournament_id)
+else:
+    bracket_manager = st.session_state.bracket_manager
+if profile_capture is not None:
+    profile_capture.tag(len(bracket_manager.participants), tournament_id)
+
+# Sessions on a shared bracket follow other people's changes without clicking anything
+if tournament_id:
+    st.session_state.bracket_shown = shown_versions(bracket_manager)
+    watch_shared_bracket(bracket_manager, tournament_id)
+
+# A snapshot link carries a whole bracket in the URL; restore it into this session once
+snapshot_token = None if tournament_id else st.query_params.get("snapshot")
+if snapshot_token and st.session_state.get('restored_snapshot') != snapshot_token:
+    st.session_state.restored_snapshot = snapshot_token
+    try:
+        bracket_manager.import_snapshot(token_to_snapshot(snapshot_token), MAX_LINK_DECODED_SIZE)
+    except SnapshotError:
+        st.error("This bracket link is damaged or from a newer version of Nerd Fights.")
 
 # Sidebar for bracket creation and management
 with st.sidebar:
@@ -263,12 +432,11 @@ with st.sidebar:
     # Tournament name
     tournament_name = st.text_input("Tournament Name", value=bracket_manager.tournament_name)
     if tournament_name != bracket_manager.tournament_name:
-        bracket_manager.tournament_name = tournament_name
+        bracket_manager.set_tournament_name(tournament_name)
     
-    # Number of participants (must be power of 2)
+    # Number of participants (fields that aren't a power of 2 get byes)
     st.subheader("Number of Participants")
-    participant_options = [4, 8, 16, 32, 64]
-    num_participants = st.selectbox("Select number of participants:", participant_options)
+    num_participants = st.number_input("Select number of participants:", min_value=2, value=8, step=1)
     
     # Participant entry
     st.subheader("Participants")
@@ -281,18 +449,36 @@ with st.sidebar:
         label_visibility="collapsed"
     )
     
-    # Parse participants from text area
-    participants = []
-    if participant_text.strip():
-        participants = [p.strip() for p in participant_text.strip().split('\n') if p.strip()]
+    # Parse participants from text area (or an uploaded file)
+    participants = read_entered_names(participant_text)
     
     # Show current count
     st.markdown(f"**Current count:** {len(participants)}/{num_participants}")
     
+    share_votes = st.checkbox(
+        "Share votes with everyone who opens the link",
+        value=bool(tournament_id),
+        disabled=bool(tournament_id)
+    )
+    one_vote_each = st.checkbox(
+        "One vote per person",
+        value=bracket_manager.get_voter_guard() is not None,
+        disabled=not share_votes or bool(tournament_id),
+        help="Each visitor can vote once in every matchup"
+    )
+    
     # Create bracket button
     if st.button("Create/Update Bracket", type="primary"):
         if len(participants) == num_participants and all(p.strip() for p in participants):
+            if share_votes and not tournament_id:
+                tournament_id = get_shared_store().new_game_id()
+                bracket_manager = get_shared_bracket(tournament_id)
+                bracket_manager.set_tournament_name(tournament_name)
+                st.query_params["tournament"] = tournament_id
+            if share_votes and one_vote_each and bracket_manager.get_voter_guard() is None:
+                bracket_manager.limit_votes_per_voter(false_positive_rate=VOTE_LIMIT_FALSE_POSITIVE_RATE)
             bracket_manager.create_bracket(participants)
+            st.query_params.pop("snapshot", None)
             st.success("Bracket created successfully!")
             st.rerun()
         elif len(participants) != num_participants:
@@ -303,14 +489,59 @@ with st.sidebar:
     # Reset bracket button
     if st.button("Reset Bracket"):
         bracket_manager.reset_bracket()
+        st.query_params.pop("snapshot", None)
         st.success("Bracket reset!")
         st.rerun()
     
     # Bracket sharing info
     if bracket_manager.bracket_created:
         st.subheader("Share Bracket")
-        st.info("Share this URL to allow others to vote on matchups!")
-        st.code(st.get_option("server.baseUrlPath") or "Your Streamlit Cloud URL")
+        snapshot = bracket_manager.export_snapshot()
+        if tournament_id:
+            st.info("Share this URL to allow others to vote on matchups!")
+            st.code(f"{st.context.url}?tournament={tournament_id}")
+        else:
+            st.info("Tick \"Share votes\" and recreate the bracket to get a link others can vote on.")
+            token = snapshot_to_token(snapshot)
+            if len(token) <= MAX_LINK_LENGTH:
+                st.markdown("Or share a copy of the bracket as it stands (nothing is stored on the server):")
+                st.code(f"{st.context.url}?snapshot={token}")
+        
+        st.download_button(
+            "💾 Save Bracket",
+            data=snapshot,
+            file_name=f"{bracket_manager.tournament_name or 'bracket'}.nerdfight",
+            mime="application/octet-stream"
+        )
+        
+        with st.expander("Import Votes"):
+            st.markdown("Upload a CSV with one `matchup id, participant, votes` row per line (e.g. `r1_m0,Alice,12`).")
+            votes_file = st.file_uploader("Votes CSV", type="csv", label_visibility="collapsed")
+            if votes_file is not None and st.button("Import Votes"):
+                import pandas as pd
+                try:
+                    # Read every cell as text, so names and ids like "1984" stay strings
+                    votes = pd.read_csv(votes_file, header=None, dtype=str, keep_default_na=False)
+                except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError):
+                    st.error("That file is empty or isn't a readable CSV.")
+                else:
+                    report = bracket_manager.apply_votes(votes)
+                    st.success(f"Imported {report['applied']} rows.")
+                    if report['rejected']:
+                        st.warning(f"Skipped {len(report['rejected'])} invalid rows:")
+                        st.dataframe(report['rejected'], hide_index=True)
+        
+        display_bracket_export(bracket_manager, tournament_id)
+
+    with st.expander("Load Saved Bracket"):
+        saved_file = st.file_uploader("Saved bracket", type="nerdfight", label_visibility="collapsed")
+        if saved_file is not None and st.button("Load Bracket"):
+            try:
+                bracket_manager.import_snapshot(saved_file.getvalue())
+            except SnapshotError:
+                st.error("That file isn't a saved bracket, or it is damaged.")
+            else:
+                st.rerun()
 
 # Main content area
 if not bracket_manager.bracket_created:
@@ -318,7 +549,7 @@ if not bracket_manager.bracket_created:
     st.markdown("""
     ### How to use:
     1. Enter a tournament name
-    2. Select number of participants (4, 8, 16, 32, or 64)
+    2. Select number of participants (any field size; byes fill out the bracket)
     3. Enter participant names
     4. Click "Create Bracket" to generate the tournament
     5. Share the URL for others to vote!
@@ -335,13 +566,16 @@ else:
         st.success(f"🎉 Tournament Complete! Winner: **{winner}**")
         
         # Display final results screen
-        display_tournament_final_results(bracket_manager)
+        with section('bracket.results'):
+            display_tournament_final_results(bracket_manager)
         
         # Display final bracket
-        display_bracket(bracket_manager)
+        with section('bracket.bracket_view'):
+            display_bracket(bracket_manager)
         
         # Tournament stats
-        display_tournament_stats(bracket_manager)
+        with section('bracket.results'):
+            display_tournament_stats(bracket_manager)
     else:
         # Current round info
         current_round = bracket_manager.get_current_round()
@@ -349,11 +583,19 @@ else:
         st.subheader(f"Round {current_round} of {total_rounds}")
         
         # Display current matchups for voting
-        display_voting_interface(bracket_manager)
+        with section('bracket.voting_interface'):
+            display_voting_interface(bracket_manager)
         
         # Display bracket visualization
         st.subheader("Bracket Progress")
-        display_bracket(bracket_manager)
+        with section('bracket.bracket_view'):
+            display_bracket(bracket_manager)
         
         # Tournament progress
-        display_tournament_progress(bracket_manager)
\ No newline at end of file
+        with section('bracket.progress'):
+            display_tournament_progress(bracket_manager)
+
+record_rerun('bracket', rerun_start)
+end_capture(profile_capture, st.session_state)
+if METRICS_ENABLED:
+    display_metrics_panel()
\ No newline at end of file
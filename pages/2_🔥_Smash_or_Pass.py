@@ -1,6 +1,22 @@
+import contextlib
+import functools
+import os
 import streamlit as st
 import math
+import uuid
 from smash_or_pass_logic import SmashOrPassManager
+from shared_store import IDLE_TTL, MEMORY_BUDGET, SharedGameStore, is_valid_game_id
+from state_codec import MAX_LINK_DECODED_SIZE, MAX_LINK_LENGTH, SnapshotError, snapshot_to_token, token_to_snapshot
+from name_lists import load_name_list
+from vote_journal import close_journaled, journal_path, open_journaled, reopen_journaled
+from change_feed import WATCH_INTERVAL, ChangeHub
+from vote_guard import VOTE_LIMIT_FALSE_POSITIVE_RATE
+from results_export import EXPORT_FORMATS, export_to_file, history_is_complete
+from metrics import METRICS_ENABLED, REGISTRY, record_rerun, rerun_started, section, start_exporters
+from profiling import begin_capture, end_capture
+
+# Timed from the top, so the rerun metric covers the whole page
+rerun_start = rerun_started()
 
 st.set_page_config(
     page_title="Smash or Pass",
@@ -8,9 +24,13 @@ st.set_page_config(
     layout="wide"
 )
 
+# ?profile=N profiles this session's next N reruns (when the server allows profiling)
+profile_capture = begin_capture('smash_or_pass', st.session_state, st.query_params.get("profile"))
+
 # Function definitions first
+@st.fragment
 def display_sop_voting_interface(sop_manager, current_item):
-    """Display voting interface for current item"""
+    """Display voting interface for current item (a vote reruns only this panel)"""
     current_pos, total_items = sop_manager.get_progress()
     
     # Progress indicator
@@ -22,6 +42,11 @@ def display_sop_voting_interface(sop_manager, current_item):
     
     # No image display - removed as requested
     
+    # In a one-vote-per-person game, each session votes once per item and can't take it back
+    guard = sop_manager.get_voter_guard()
+    voter = get_voter_token() if guard is not None else None
+    has_voted = guard is not None and guard.has_claimed(voter, current_item)
+    
     # Show current results if there are votes
     votes = sop_manager.get_item_votes(current_item)
     total_votes = votes['smash'] + votes['pass']
@@ -32,7 +57,7 @@ def display_sop_voting_interface(sop_manager, current_item):
     # Move voting interface outside columns
     st.markdown("---")
     
-    # Voting interface
+    # Voting interface; votes are recorded in on_click, before the panel redraws its counts
     vote_col1, vote_col2 = st.columns(2)
     
     with vote_col1:
@@ -52,9 +77,8 @@ def display_sop_voting_interface(sop_manager, current_item):
             }
             </style>
             """, unsafe_allow_html=True)
-            if st.button("+ ", key="smash_plus", width="stretch"):
-                sop_manager.vote_smash(current_item)
-                st.rerun()
+            st.button("+ ", key="smash_plus", width="stretch", disabled=has_voted,
+                      on_click=cast_vote, args=(sop_manager, 'vote_smash', current_item, voter))
         with smash_col2:
             # Custom CSS for red decrement button
             st.markdown("""
@@ -66,9 +90,8 @@ def display_sop_voting_interface(sop_manager, current_item):
             }
             </style>
             """, unsafe_allow_html=True)
-            if st.button("− ", key="smash_minus", width="stretch"):
-                sop_manager.remove_smash_vote(current_item)
-                st.rerun()
+            st.button("− ", key="smash_minus", width="stretch", disabled=guard is not None,
+                      on_click=cast_vote, args=(sop_manager, 'remove_smash_vote', current_item, voter))
     
     with vote_col2:
         st.markdown("### 👋 PASS")
@@ -87,9 +110,8 @@ def display_sop_voting_interface(sop_manager, current_item):
             }
             </style>
             """, unsafe_allow_html=True)
-            if st.button("+ ", key="pass_plus", width="stretch"):
-                sop_manager.vote_pass(current_item)
-                st.rerun()
+            st.button("+ ", key="pass_plus", width="stretch", disabled=has_voted,
+                      on_click=cast_vote, args=(sop_manager, 'vote_pass', current_item, voter))
         with pass_col2:
             # Custom CSS for red decrement button
             st.markdown("""
@@ -101,9 +123,24 @@ def display_sop_voting_interface(sop_manager, current_item):
             }
             </style>
             """, unsafe_allow_html=True)
-            if st.button("− ", key="pass_minus", width="stretch"):
-                sop_manager.remove_pass_vote(current_item)
-                st.rerun()
+            st.button("− ", key="pass_minus", width="stretch", disabled=guard is not None,
+                      on_click=cast_vote, args=(sop_manager, 'remove_pass_vote', current_item, voter))
+    
+    if has_voted:
+        st.caption("✅ You've voted on this item")
+    
+    # Inside the fragment so the standings follow each vote
+    display_sop_live_leaderboard(sop_manager, current_item)
+
+def cast_vote(sop_manager, change, item, voter):
+    """Apply this session's vote (change is e.g. 'vote_smash') without making the watcher rerun the page
+
+    The voting panel redraws itself after the click, so if nothing else was unseen,
+    the game counts as shown at its new version.
+    """
+    seen = sop_manager.version
+    if getattr(sop_manager, change)(item, voter) and st.session_state.get('sop_shown_version') == seen:
+        st.session_state.sop_shown_version = sop_manager.version
 
 def display_sop_navigation(sop_manager):
     """Display navigation controls"""
@@ -123,19 +160,37 @@ def display_sop_navigation(sop_manager):
     with col3:
         if sop_manager.current_index == len(sop_manager.items) - 1:
             if st.button("🏁 Finish Game", type="primary"):
-                sop_manager.game_complete = True
+                sop_manager.finish_game()
                 st.rerun()
         else:
             if st.button("Next ➡️"):
                 sop_manager.next_item()
                 st.rerun()
 
+def display_sop_live_leaderboard(sop_manager, current_item):
+    """Display the live top 5 and where the current item stands"""
+    with st.expander("🏅 Live Leaderboard"):
+        current_pos, total_items = sop_manager.get_progress()
+        rank = sop_manager.rank_of(current_item)
+        st.markdown(f"**{current_item}** is currently ranked **#{rank}** of {total_items}")
+        
+        for i, result in enumerate(sop_manager.top_k(5), 1):
+            if result['total_votes'] > 0:
+                st.markdown(f"{i}. **{result['item']}** - {result['smash_percentage']:.1f}% Smash")
+            else:
+                st.markdown(f"{i}. **{result['item']}** - No votes")
+
+RESULTS_PAGE_SIZES = [25, 50, 100, 250]
+MEDALS = ["🥇", "🥈", "🥉"]
+
 def display_sop_results(sop_manager):
     """Display final results"""
-    st.balloons()
+    # Paging and searching rerun the page; only celebrate once per game
+    if not st.session_state.get('sop_results_celebrated'):
+        st.balloons()
+        st.session_state.sop_results_celebrated = True
     st.success("🎉 Game Complete!")
     
-    results = sop_manager.get_results()
     total_votes = sop_manager.get_total_votes()
     
     st.markdown(f"### Final Results")
@@ -144,20 +199,12 @@ def display_sop_results(sop_manager):
     # Results table
     st.markdown("### Rankings")
     
-    for i, result in enumerate(results, 1):
-        # Create columns for ranking display
+    # Podium for the top 3
+    for i, result in enumerate(sop_manager.top_k(3), 1):
         col1, col2, col3 = st.columns([1, 3, 2])
         
         with col1:
-            # Medal emojis for top 3
-            if i == 1:
-                st.markdown("🥇")
-            elif i == 2:
-                st.markdown("🥈")
-            elif i == 3:
-                st.markdown("🥉")
-            else:
-                st.markdown(f"**{i}.**")
+            st.markdown(MEDALS[i - 1])
         
         with col2:
             st.markdown(f"**{result['item']}**")
@@ -171,20 +218,225 @@ def display_sop_results(sop_manager):
         
         st.markdown("---")
     
+    display_sop_rankings_table(sop_manager)
+    
     # Play again button
     if st.button("🔄 Play Again", type="primary"):
         sop_manager.reset_game()
+        st.session_state.sop_results_celebrated = False
+        st.rerun()
+
+def display_sop_rankings_table(sop_manager):
+    """Display the full ranking one page at a time, with search by name"""
+    import pandas as pd
+    
+    total_items = sop_manager.get_item_count()
+    
+    search_col, size_col, page_col = st.columns([3, 1, 1])
+    with search_col:
+        query = st.text_input("Search items", placeholder="Find an item's rank...").strip().lower()
+    with size_col:
+        page_size = st.selectbox("Rows per page", RESULTS_PAGE_SIZES)
+    
+    # A search pages through its matches, best ranked first, just like the full ranking
+    matches = sop_manager.find_items(query) if query else None
+    item_count = len(matches) if query else total_items
+    page_count = max(1, -(-item_count // page_size))
+    with page_col:
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    offset = (page_number - 1) * page_size
+    
+    if query:
+        rows = sop_manager.rank_items(matches, offset, page_size)
+        if rows:
+            st.caption(f"Showing {offset + 1}-{offset + len(rows)} of {item_count} matching items")
+        else:
+            st.caption("No matching items")
+    else:
+        rows = list(enumerate(sop_manager.page(offset, page_size), offset + 1))
+        st.caption(f"Showing {offset + 1}-{offset + len(rows)} of {total_items} items")
+    
+    table = pd.DataFrame(
+        [
+            {
+                'Rank': MEDALS[rank - 1] if rank <= 3 else str(rank),
+                'Item': row['item'],
+                'Smash %': row['smash_percentage'] if row['total_votes'] > 0 else None,
+                'Smash': row['smash_votes'],
+                'Pass': row['pass_votes']
+            }
+            for rank, row in rows
+        ],
+        columns=['Rank', 'Item', 'Smash %', 'Smash', 'Pass']
+    )
+    st.dataframe(
+        table,
+        hide_index=True,
+        width="stretch",
+        column_config={'Smash %': st.column_config.NumberColumn(format="%.1f%%")}
+    )
+
+SOP_EXPORTS = {
+    'rankings': "Rankings",
+    'statistics': "Statistics",
+    'history': "Vote history"
+}
+
+def display_sop_export(sop_manager, game_id):
+    """Stream a chosen export to a file on the server, then offer it for download"""
+    with st.expander("Export Results"):
+        # Only shared games keep a vote history (in their journal)
+        kinds = [kind for kind in SOP_EXPORTS if kind != 'history' or game_id]
+        labels = dict(SOP_EXPORTS)
+        partial_history = game_id and not history_is_complete(sop_manager.journal)
+        if partial_history:
+            labels['history'] = "Vote history (since last snapshot)"
+        kind = st.selectbox("Export", kinds, format_func=labels.get)
+        if kind == 'history' and partial_history:
+            st.caption("Only votes since the journal's last snapshot are kept, and one is taken whenever "
+                       "the game is unloaded, so this is often short. Run the server with "
+                       "NERD_FIGHTS_KEEP_HISTORY=1 to keep the full history.")
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True,
+                                 format_func=lambda export_format: EXPORT_FORMATS[export_format][0])
+        if st.button("Prepare Export"):
+            with st.spinner("Exporting..."):
+                path = export_to_file(sop_manager, kind, export_format)
+            previous = st.session_state.get('sop_export')
+            if previous:
+                with contextlib.suppress(OSError):
+                    os.remove(previous['path'])
+            st.session_state.sop_export = {'path': path, 'kind': kind, 'format': export_format}
+        
+        prepared = st.session_state.get('sop_export')
+        if prepared and os.path.exists(prepared['path']):
+            _, extension, mime = EXPORT_FORMATS[prepared['format']]
+            with open(prepared['path'], "rb") as f:
+                st.download_button(
+                    f"⬇️ Download {labels[prepared['kind']]}",
+                    data=f,
+                    file_name=f"smash_or_pass_{prepared['kind']}.{extension}",
+                    mime=mime
+                )
+
+def display_metrics_panel():
+    """Sidebar panel with this page's rerun latency, votes per second and the slowest timings"""
+    rerun = REGISTRY.histogram('nerd_fights_rerun_seconds', 'smash_or_pass')
+    p50, p99 = rerun.quantile(0.5), rerun.quantile(0.99)
+    with st.sidebar.expander("📈 Performance Metrics"):
+        st.markdown(f"**Rerun:** p50 {p50 * 1e3:.0f} ms · p99 {p99 * 1e3:.0f} ms" if p50 is not None
+                    else "**Rerun:** no full runs yet")
+        st.markdown(f"**Votes per second:** {REGISTRY.votes_per_second():.1f} (last minute, every game)")
+        st.dataframe(REGISTRY.summary(), hide_index=True)
+
+def get_voter_token():
+    """Identify this browser session to games that allow one vote per person"""
+    if 'voter_token' not in st.session_state:
+        st.session_state.voter_token = uuid.uuid4().hex
+    return st.session_state.voter_token
+
+def read_entered_names(text):
+    """Get the pasted items, or an uploaded TXT/CSV list in their place, noting any rows skipped
+
+    Parsing is cached by content, so reruns with the same list skip it.
+    """
+    uploaded_list = st.file_uploader(
+        "Or upload a list",
+        type=["txt", "csv"],
+        help="TXT: one per line. CSV: the first column of each row."
+    )
+    if uploaded_list is None:
+        name_list = load_name_list(text)
+    else:
+        csv_format = uploaded_list.name.lower().endswith(".csv")
+        has_header = csv_format and st.checkbox("First row is a header")
+        name_list = load_name_list(uploaded_list.getvalue(), csv_format, has_header)
+    
+    if name_list['duplicate_count'] or name_list['empty_rows']:
+        st.caption(f"Skipped {name_list['duplicate_count']} duplicate and {name_list['empty_rows']} empty rows")
+    if name_list['duplicates']:
+        with st.expander("Duplicates"):
+            st.dataframe(name_list['duplicates'], hide_index=True)
+    return list(name_list['names'])
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def watch_shared_game(game_id):
+    """Rerun the page once someone else changes the shared game; a check that finds no change does nothing
+
+    Votes cast from this session are already counted as shown by cast_vote().
+    """
+    watcher = st.session_state.get('sop_watcher')
+    if watcher is None or watcher.game_id != game_id:
+        watcher = st.session_state.sop_watcher = get_change_hub().watch(game_id, st.session_state.sop_shown_version)
+    if watcher.version > st.session_state.sop_shown_version:
         st.rerun()
 
 # Main app starts here
 st.title("🔥 Smash or Pass")
 st.markdown("Rate items one by one - Smash 💥 or Pass 👋")
 
+@st.cache_resource
+def get_shared_store():
+    """One store per server process so every session opening a shared link sees the same votes
+
+    Idle games, and the least recently used ones past the memory budget, are spilled to
+    their journals and reloaded on their next visit.
+    """
+    return SharedGameStore(
+        memory_budget=MEMORY_BUDGET,
+        idle_ttl=IDLE_TTL,
+        on_evict=close_journaled,
+        on_revive=reopen_journaled
+    )
+
+@st.cache_resource
+def get_change_hub():
+    """One hub per server process, so a change reaches every session watching that game"""
+    return ChangeHub()
+
+def publish_change(game_id, version):
+    """Tell the sessions watching this game it changed, and keep it from going idle while it's voted on"""
+    get_shared_store().touch(game_id)
+    get_change_hub().publish(game_id, version)
+
+def get_shared_game(game_id):
+    """Get a shared game, restoring it from its journal after a restart or eviction"""
+    def load():
+        manager = open_journaled(journal_path("smash_or_pass", game_id), SmashOrPassManager)
+        manager.set_change_listener(functools.partial(publish_change, game_id))
+        return manager
+    return get_shared_store().get_or_create(game_id, load)
+
+# Serves /metrics or writes the metrics file when configured (once per server process)
+start_exporters()
+
 # Initialize session state for Smash or Pass
 if 'sop_manager' not in st.session_state:
     st.session_state.sop_manager = SmashOrPassManager()
 
-sop_manager = st.session_state.sop_manager
+# A game id in the URL switches this session onto the shared game
+game_id = st.query_params.get("game")
+if game_id and not is_valid_game_id(game_id):
+    game_id = None
+if game_id:
+    sop_manager = get_shared_game(game_id)
+else:
+    sop_manager = st.session_state.sop_manager
+if profile_capture is not None:
+    profile_capture.tag(len(sop_manager.items), game_id)
+
+# Sessions on a shared game follow other people's changes without clicking anything
+if game_id:
+    st.session_state.sop_shown_version = sop_manager.version
+    watch_shared_game(game_id)
+
+# A snapshot link carries a whole game in the URL; restore it into this session once
+snapshot_token = None if game_id else st.query_params.get("snapshot")
+if snapshot_token and st.session_state.get('restored_snapshot') != snapshot_token:
+    st.session_state.restored_snapshot = snapshot_token
+    try:
+        sop_manager.import_snapshot(token_to_snapshot(snapshot_token), MAX_LINK_DECODED_SIZE)
+    except SnapshotError:
+        st.error("This game link is damaged or from a newer version of Nerd Fights.")
 
 # Sidebar for game setup
 with st.sidebar:
@@ -203,19 +455,37 @@ with st.sidebar:
         label_visibility="collapsed"
     )
     
-    # Parse items from text area
-    items = []
-    if items_text.strip():
-        items = [item.strip() for item in items_text.strip().split('\n') if item.strip()]
+    # Parse items from text area (or an uploaded file)
+    items = read_entered_names(items_text)
     
     # Show current count
     st.markdown(f"**Items entered:** {len(items)}")
     
+    share_votes = st.checkbox(
+        "Share votes with everyone who opens the link",
+        value=bool(game_id),
+        disabled=bool(game_id)
+    )
+    one_vote_each = st.checkbox(
+        "One vote per person",
+        value=sop_manager.get_voter_guard() is not None,
+        disabled=not share_votes or bool(game_id),
+        help="Each visitor can vote once on every item"
+    )
+    
     # Create game button
     if st.button("Start Smash or Pass", type="primary"):
         if len(items) >= 2:
+            if share_votes and not game_id:
+                game_id = get_shared_store().new_game_id()
+                sop_manager = get_shared_game(game_id)
+                st.query_params["game"] = game_id
+            if share_votes and one_vote_each and sop_manager.get_voter_guard() is None:
+                sop_manager.limit_votes_per_voter(false_positive_rate=VOTE_LIMIT_FALSE_POSITIVE_RATE)
             with st.spinner("Creating game..."):
                 sop_manager.create_game(items)
+            st.query_params.pop("snapshot", None)
+            st.session_state.sop_results_celebrated = False
             st.success("Game started!")
             st.rerun()
         else:
@@ -224,8 +494,60 @@ with st.sidebar:
     # Reset game button
     if st.button("Reset Game"):
         sop_manager.reset_game()
+        st.query_params.pop("snapshot", None)
         st.success("Game reset!")
         st.rerun()
+    
+    # Game sharing info
+    if sop_manager.game_created:
+        st.subheader("Share Game")
+        snapshot = sop_manager.export_snapshot()
+        if game_id:
+            st.info("Share this URL to allow others to vote!")
+            st.code(f"{st.context.url}?game={game_id}")
+        else:
+            token = snapshot_to_token(snapshot)
+            if len(token) <= MAX_LINK_LENGTH:
+                st.markdown("Share a copy of the game as it stands (nothing is stored on the server):")
+                st.code(f"{st.context.url}?snapshot={token}")
+        
+        st.download_button(
+            "💾 Save Game",
+            data=snapshot,
+            file_name="smash_or_pass.nerdfight",
+            mime="application/octet-stream"
+        )
+    
+    if sop_manager.game_created:
+        with st.expander("Import Votes"):
+            st.markdown("Upload a CSV with one `item, smash or pass, votes` row per line (e.g. `Gecko,smash,12`). Negative votes remove votes.")
+            votes_file = st.file_uploader("Votes CSV", type="csv", label_visibility="collapsed")
+            if votes_file is not None and st.button("Import Votes"):
+                import pandas as pd
+                try:
+                    # Read every cell as text, so names and ids like "1984" stay strings
+                    votes = pd.read_csv(votes_file, header=None, dtype=str, keep_default_na=False)
+                except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError):
+                    st.error("That file is empty or isn't a readable CSV.")
+                else:
+                    report = sop_manager.apply_votes(votes)
+                    st.success(f"Imported {report['applied']} rows.")
+                    if report['rejected']:
+                        st.warning(f"Skipped {len(report['rejected'])} invalid rows:")
+                        st.dataframe(report['rejected'], hide_index=True)
+        
+        display_sop_export(sop_manager, game_id)
+
+    with st.expander("Load Saved Game"):
+        saved_file = st.file_uploader("Saved game", type="nerdfight", label_visibility="collapsed")
+        if saved_file is not None and st.button("Load Game"):
+            try:
+                sop_manager.import_snapshot(saved_file.getvalue())
+            except SnapshotError:
+                st.error("That file isn't a saved Smash or Pass game, or it is damaged.")
+            else:
+                st.session_state.sop_results_celebrated = False
+                st.rerun()
 
 # Main content area
 if not sop_manager.game_created:
@@ -241,12 +563,20 @@ if not sop_manager.game_created:
 else:
     # Check if game is complete
     if sop_manager.is_game_complete():
-        display_sop_results(sop_manager)
+        with section('smash_or_pass.results'):
+            display_sop_results(sop_manager)
     else:
         # Display current item voting interface
         current_item = sop_manager.get_current_item()
         if current_item:
-            display_sop_voting_interface(sop_manager, current_item)
+            with section('smash_or_pass.voting_interface'):
+                display_sop_voting_interface(sop_manager, current_item)
         
         # Navigation and progress
-        display_sop_navigation(sop_manager)
\ No newline at end of file
+        with section('smash_or_pass.progress'):
+            display_sop_navigation(sop_manager)
+
+record_rerun('smash_or_pass', rerun_start)
+end_capture(profile_capture, st.session_state)
+if METRICS_ENABLED:
+    display_metrics_panel()
\ No newline at end of file
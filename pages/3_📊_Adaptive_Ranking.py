@@ -0,0 +1,271 @@
+import functools
+import streamlit as st
+from ranking_logic import RankingManager
+from shared_store import IDLE_TTL, MEMORY_BUDGET, SharedGameStore, is_valid_game_id
+from name_lists import load_name_list
+from vote_journal import close_journaled, journal_path, open_journaled, reopen_journaled
+from change_feed import WATCH_INTERVAL, ChangeHub
+from metrics import METRICS_ENABLED, REGISTRY, record_rerun, rerun_started, section, start_exporters
+
+# Timed from the top, so the rerun metric covers the whole page
+rerun_start = rerun_started()
+
+st.set_page_config(
+    page_title="Adaptive Ranking",
+    page_icon="📊",
+    layout="wide"
+)
+
+# Function definitions first
+def cast_vote(ranking_manager, winner, loser):
+    """Record a vote and deal this session its next pair"""
+    ranking_manager.vote(winner, loser)
+    st.session_state.ranking_pair = ranking_manager.next_pair()
+
+def skip_pair(ranking_manager):
+    """Deal this session a different pair without voting"""
+    st.session_state.ranking_pair = ranking_manager.next_pair()
+
+@st.fragment
+def display_ranking_voting(ranking_manager):
+    """Display the current head-to-head pair (a vote reruns only this panel)"""
+    pair = st.session_state.get('ranking_pair')
+    if not pair or not all(item in ranking_manager for item in pair):
+        pair = st.session_state.ranking_pair = ranking_manager.next_pair()
+    participant1, participant2 = pair
+
+    # Progress towards a settled ranking
+    votes_cast = ranking_manager.get_comparison_count()
+    vote_budget = ranking_manager.get_vote_budget()
+    precision = ranking_manager.get_precision()
+    st.progress(precision)
+    st.markdown(f"**{precision * 100:.0f}%** of items ranked to the target precision "
+                f"after **{votes_cast}** votes (a full ranking takes roughly {vote_budget})")
+
+    st.markdown("### Who wins?")
+    st.markdown(f"**{participant1}** vs **{participant2}**")
+
+    # Votes are recorded in on_click, before the panel redraws with the next pair
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(f"Vote for {participant1}", key="ranking_vote_first", width="stretch",
+                  on_click=cast_vote, args=(ranking_manager, participant1, participant2))
+    with col2:
+        st.button(f"Vote for {participant2}", key="ranking_vote_second", width="stretch",
+                  on_click=cast_vote, args=(ranking_manager, participant2, participant1))
+    st.button("🤷 Can't decide - skip", key="ranking_skip", on_click=skip_pair, args=(ranking_manager,))
+
+    # Inside the fragment so the leaders follow each vote
+    with st.expander("🏅 Current Top 5"):
+        for row in ranking_manager.get_ranking(top_k=5):
+            st.markdown(f"{row['rank']}. **{row['item']}** - {row['rating']:.0f}")
+
+def display_ranking_table(ranking_manager):
+    """Display the full ranking with ratings and how sure the model is of each place"""
+    import pandas as pd
+
+    st.subheader("Rankings")
+    st.caption("Ratings are on the Elo scale. Confidence is the chance an item really beats the one ranked below it.")
+
+    table = pd.DataFrame(
+        [
+            {
+                'Rank': row['rank'],
+                'Item': row['item'],
+                'Rating': row['rating'],
+                '95% Range': f"{row['rating_low']:.0f} - {row['rating_high']:.0f}",
+                'Confidence': row['confidence'] * 100 if row['confidence'] is not None else None,
+                'Wins': row['wins'],
+                'Losses': row['losses']
+            }
+            for row in ranking_manager.get_ranking()
+        ],
+        columns=['Rank', 'Item', 'Rating', '95% Range', 'Confidence', 'Wins', 'Losses']
+    )
+    st.dataframe(
+        table,
+        hide_index=True,
+        width="stretch",
+        column_config={
+            'Rating': st.column_config.NumberColumn(format="%.0f"),
+            'Confidence': st.column_config.NumberColumn(format="%.0f%%")
+        }
+    )
+
+def read_entered_names(text):
+    """Get the pasted items, or an uploaded TXT/CSV list in their place, noting any rows skipped
+
+    Parsing is cached by content, so reruns with the same list skip it.
+    """
+    uploaded_list = st.file_uploader(
+        "Or upload a list",
+        type=["txt", "csv"],
+        help="TXT: one per line. CSV: the first column of each row."
+    )
+    if uploaded_list is None:
+        name_list = load_name_list(text)
+    else:
+        csv_format = uploaded_list.name.lower().endswith(".csv")
+        has_header = csv_format and st.checkbox("First row is a header")
+        name_list = load_name_list(uploaded_list.getvalue(), csv_format, has_header)
+    
+    if name_list['duplicate_count'] or name_list['empty_rows']:
+        st.caption(f"Skipped {name_list['duplicate_count']} duplicate and {name_list['empty_rows']} empty rows")
+    if name_list['duplicates']:
+        with st.expander("Duplicates"):
+            st.dataframe(name_list['duplicates'], hide_index=True)
+    return list(name_list['names'])
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def display_metrics_panel():
+    """Sidebar panel with this page's rerun latency, votes per second and the slowest timings"""
+    rerun = REGISTRY.histogram('nerd_fights_rerun_seconds', 'ranking')
+    p50, p99 = rerun.quantile(0.5), rerun.quantile(0.99)
+    with st.sidebar.expander("📈 Performance Metrics"):
+        st.markdown(f"**Rerun:** p50 {p50 * 1e3:.0f} ms · p99 {p99 * 1e3:.0f} ms" if p50 is not None
+                    else "**Rerun:** no full runs yet")
+        st.markdown(f"**Votes per second:** {REGISTRY.votes_per_second():.1f} (last minute, every game)")
+        st.dataframe(REGISTRY.summary(), hide_index=True)
+
+def watch_shared_ranking(ranking_id, shown_version):
+    """Rerun the page once anyone changes the shared ranking; a check that finds no change does nothing"""
+    watcher = st.session_state.get('ranking_watcher')
+    if watcher is None or watcher.game_id != ranking_id:
+        watcher = st.session_state.ranking_watcher = get_change_hub().watch(ranking_id, shown_version)
+    if watcher.version > shown_version:
+        st.rerun()
+
+# Main app starts here
+st.title("📊 Adaptive Ranking")
+st.markdown("Rank big lists from quick head-to-head votes - every vote goes where it tells us the most!")
+
+@st.cache_resource
+def get_shared_store():
+    """One store per server process so every session opening a shared link sees the same votes
+
+    Idle games, and the least recently used ones past the memory budget, are spilled to
+    their journals and reloaded on their next visit.
+    """
+    return SharedGameStore(
+        memory_budget=MEMORY_BUDGET,
+        idle_ttl=IDLE_TTL,
+        on_evict=close_journaled,
+        on_revive=reopen_journaled
+    )
+
+@st.cache_resource
+def get_change_hub():
+    """One hub per server process, so a change reaches every session watching that ranking"""
+    return ChangeHub()
+
+def publish_change(ranking_id, version):
+    """Tell the sessions watching this ranking it changed, and keep it from going idle while it's voted on"""
+    get_shared_store().touch(ranking_id)
+    get_change_hub().publish(ranking_id, version)
+
+def get_shared_ranking(ranking_id):
+    """Get a shared ranking, restoring it from its journal after a restart or eviction"""
+    def load():
+        manager = open_journaled(journal_path("rankings", ranking_id), RankingManager)
+        manager.set_change_listener(functools.partial(publish_change, ranking_id))
+        return manager
+    return get_shared_store().get_or_create(ranking_id, load)
+
+# Serves /metrics or writes the metrics file when configured (once per server process)
+start_exporters()
+
+# Initialize session state
+if 'ranking_manager' not in st.session_state:
+    st.session_state.ranking_manager = RankingManager()
+
+# A ranking id in the URL switches this session onto the shared ranking
+ranking_id = st.query_params.get("ranking")
+if ranking_id and not is_valid_game_id(ranking_id):
+    ranking_id = None
+if ranking_id:
+    ranking_manager = get_shared_ranking(ranking_id)
+else:
+    ranking_manager = st.session_state.ranking_manager
+
+# Sessions on a shared ranking follow other people's changes without clicking anything
+if ranking_id:
+    watch_shared_ranking(ranking_id, ranking_manager.version)
+
+# Sidebar for ranking setup
+with st.sidebar:
+    st.header("Ranking Setup")
+
+    ranking_name = st.text_input("Ranking Name", value=ranking_manager.ranking_name)
+    if ranking_name != ranking_manager.ranking_name:
+        ranking_manager.set_ranking_name(ranking_name)
+
+    st.subheader("Items to Rank")
+    st.markdown("Enter items to rank (one per line):")
+
+    items_text = st.text_area(
+        "Items List",
+        height=180,
+        placeholder="Enter items here...\nOne item per line\n\nExample:\nApple Pie\nPumpkin Pie\nPecan Pie\nKey Lime Pie",
+        label_visibility="collapsed"
+    )
+
+    items = read_entered_names(items_text)
+
+    st.markdown(f"**Items entered:** {len(items)}")
+
+    share_votes = st.checkbox(
+        "Share votes with everyone who opens the link",
+        value=bool(ranking_id),
+        disabled=bool(ranking_id)
+    )
+
+    if st.button("Start Ranking", type="primary"):
+        if len(set(items)) >= 2:
+            if share_votes and not ranking_id:
+                ranking_id = get_shared_store().new_game_id()
+                ranking_manager = get_shared_ranking(ranking_id)
+                ranking_manager.set_ranking_name(ranking_name)
+                st.query_params["ranking"] = ranking_id
+            ranking_manager.create_ranking(items)
+            st.session_state.ranking_pair = None
+            st.success("Ranking started!")
+            st.rerun()
+        else:
+            st.error("Please enter at least 2 different items to rank.")
+
+    if st.button("Reset Ranking"):
+        ranking_manager.reset_ranking()
+        st.session_state.ranking_pair = None
+        st.success("Ranking reset!")
+        st.rerun()
+
+    if ranking_manager.ranking_created and ranking_id:
+        st.subheader("Share Ranking")
+        st.info("Share this URL to allow others to vote!")
+        st.code(f"{st.context.url}?ranking={ranking_id}")
+
+# Main content area
+if not ranking_manager.ranking_created:
+    st.info("👆 Use the sidebar to start ranking!")
+    st.markdown("""
+    ### How to use:
+    1. Enter items to rank in the sidebar (one per line) - hundreds are fine
+    2. Click "Start Ranking"
+    3. Pick a winner in each head-to-head matchup
+    4. Watch the ranking settle - a few votes per item is all it takes
+    """)
+else:
+    if ranking_manager.ranking_name:
+        st.header(f"📊 {ranking_manager.ranking_name}")
+
+    if ranking_manager.is_ranking_complete():
+        st.success("🎉 The ranking has settled! Keep voting to sharpen it further.")
+
+    with section('ranking.voting_interface'):
+        display_ranking_voting(ranking_manager)
+    with section('ranking.results'):
+        display_ranking_table(ranking_manager)
+
+record_rerun('ranking', rerun_start)
+if METRICS_ENABLED:
+    display_metrics_panel()
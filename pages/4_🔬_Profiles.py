@@ -0,0 +1,59 @@
+import time
+import streamlit as st
+from profiling import PROFILE_DIR, PROFILING_ENABLED, allocation_report, list_captures, top_functions
+
+st.set_page_config(
+    page_title="Profiles",
+    page_icon="🔬",
+    layout="wide"
+)
+
+# Function definitions first
+def display_capture_table(captures):
+    """List every capture with its game size and timings"""
+    st.dataframe([{
+        'Captured': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(capture['started'])),
+        'Page': capture['page'],
+        'Game': capture['game_id'] or "(private)",
+        'Size': capture['game_size'],
+        'Rerun ms': round(capture['seconds'] * 1e3, 1),
+        'Peak MB': round(capture['peak_bytes'] / 1e6, 1),
+        'Interrupted': capture['interrupted']
+    } for capture in captures], hide_index=True)
+
+def display_capture(capture):
+    """Show one capture's hottest functions and allocations, with both files for download"""
+    sort = st.radio("Sort functions by", ['cumulative', 'tottime', 'ncalls'], horizontal=True)
+    st.markdown("#### Functions")
+    st.code(top_functions(capture, sort), language=None)
+    st.markdown("#### Allocations")
+    report = allocation_report(capture)
+    st.code(report, language=None)
+
+    col1, col2 = st.columns(2)
+    with col1, open(f"{PROFILE_DIR}/{capture['pstats']}", "rb") as f:
+        st.download_button("⬇️ Download pstats", data=f, file_name=capture['pstats'],
+                           mime="application/octet-stream")
+    with col2:
+        st.download_button("⬇️ Download allocations", data=report, file_name=capture['allocations'],
+                           mime="text/plain")
+
+# Main app starts here
+st.title("🔬 Profiles")
+st.markdown("cProfile and tracemalloc captures of Tournament Bracket and Smash or Pass reruns.")
+
+if not PROFILING_ENABLED:
+    st.info("Profiling is off. Start the app with `NERD_FIGHTS_PROFILING=1`, then add `?profile=N` "
+            "to a Tournament Bracket or Smash or Pass link to profile its next N reruns.")
+    st.stop()
+
+captures = list_captures()
+if not captures:
+    st.info("No captures yet. Add `?profile=N` to a Tournament Bracket or Smash or Pass link "
+            "to profile its next N reruns.")
+    st.stop()
+
+display_capture_table(captures)
+names = [capture['name'] for capture in captures]
+chosen = st.selectbox("Capture", names)
+display_capture(captures[names.index(chosen)])
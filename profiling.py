@@ -0,0 +1,216 @@
+import contextlib
+import glob
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from typing import Dict, List, Optional
+
+# Profile this many full reruns of the game pages after the server starts, whoever runs them
+PROFILE_RERUNS = int(os.environ.get("NERD_FIGHTS_PROFILE_RERUNS", "0"))
+# Allow on-demand captures (the ?profile=N query parameter) and the Profiles page
+PROFILING_ENABLED = os.environ.get("NERD_FIGHTS_PROFILING", "0") == "1" or PROFILE_RERUNS > 0
+# Where captures are written: a .pstats file, an allocations report and a .json summary each
+PROFILE_DIR = os.environ.get("NERD_FIGHTS_PROFILE_DIR", "profiles")
+# Most reruns one ?profile=N link can ask for
+MAX_PROFILED_RERUNS = 20
+# Oldest captures are deleted past this many
+MAX_CAPTURES = 200
+# Stack depth kept per allocation, and allocation sites listed in each report
+TRACE_FRAMES = 1
+ALLOCATION_LINES = 40
+
+# Session state keys
+CAPTURE_KEY = 'profile_capture'
+RERUNS_LEFT_KEY = 'profile_reruns_left'
+REQUESTED_KEY = 'profile_requested'
+
+_lock = threading.Lock()
+_active = weakref.WeakSet()  # captures running now (a closed session's capture just disappears)
+_started_tracing = False  # whether tracemalloc was started here (and so is ours to stop)
+_process_reruns_left = PROFILE_RERUNS
+
+class ProfileCapture:
+    """One rerun being profiled: a cProfile profiler plus tracemalloc snapshots around it"""
+    def __init__(self, page: str):
+        import cProfile  # only loaded once something is profiled
+
+        self.page = page
+        self.capture_id = uuid.uuid4().hex[:8]
+        self.started = time.time()
+        self.game_id = None
+        self.game_size = None
+        self._start = time.perf_counter()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._profiler = cProfile.Profile()
+
+    def tag(self, game_size: Optional[int], game_id: Optional[str] = None):
+        """Record which game (and how big) the rerun was drawing"""
+        self.game_size = game_size
+        self.game_id = game_id
+
+def begin_capture(page: str, session_state, requested: Optional[str] = None) -> Optional[ProfileCapture]:
+    """Start profiling this rerun if the session (or the server) asked for it
+
+    requested is the ?profile=N query parameter: each new value profiles the session's
+    next N full reruns. A capture the last rerun never ended (st.rerun() and st.stop()
+    skip the end of the page) is finished first. Returns None when not profiling.
+    """
+    if not PROFILING_ENABLED:
+        return None
+    dangling = session_state.get(CAPTURE_KEY)
+    if dangling is not None:
+        end_capture(dangling, session_state, interrupted=True)
+
+    if requested and session_state.get(REQUESTED_KEY) != requested:
+        session_state[REQUESTED_KEY] = requested
+        try:
+            session_state[RERUNS_LEFT_KEY] = max(0, min(int(requested), MAX_PROFILED_RERUNS))
+        except ValueError:
+            pass
+    session_reruns = session_state.get(RERUNS_LEFT_KEY, 0)
+    if not session_reruns and not _take_process_rerun():
+        return None
+
+    capture = _start(page)
+    if capture is None:
+        if not session_reruns:
+            _give_back_process_rerun()
+        return None
+    if session_reruns:
+        session_state[RERUNS_LEFT_KEY] = session_reruns - 1
+    session_state[CAPTURE_KEY] = capture
+    return capture
+
+def end_capture(capture: Optional[ProfileCapture], session_state, interrupted: bool = False) -> Optional[str]:
+    """Stop profiling and write the capture out; returns the path of its summary"""
+    if capture is None:
+        return None
+    if session_state.get(CAPTURE_KEY) is capture:
+        del session_state[CAPTURE_KEY]
+    capture._profiler.disable()
+    seconds = time.perf_counter() - capture._start
+    end_snapshot = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    _stop_tracing(capture)
+    return _write_capture(capture, seconds, peak, end_snapshot, interrupted)
+
+def list_captures() -> List[Dict]:
+    """Get the summary of every capture on disk, newest first"""
+    captures = []
+    for path in glob.glob(os.path.join(PROFILE_DIR, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                captures.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # deleted or half-written while we looked
+    return sorted(captures, key=lambda capture: capture['started'], reverse=True)
+
+def top_functions(capture: Dict, sort: str = 'cumulative', limit: int = 40) -> str:
+    """Get a capture's most expensive functions as pstats prints them"""
+    import pstats
+
+    out = io.StringIO()
+    stats = pstats.Stats(os.path.join(PROFILE_DIR, capture['pstats']), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+def allocation_report(capture: Dict) -> str:
+    """Get a capture's top-allocations report"""
+    with open(os.path.join(PROFILE_DIR, capture['allocations']), encoding="utf-8") as f:
+        return f.read()
+
+def _start(page: str) -> Optional[ProfileCapture]:
+    global _started_tracing
+    with _lock:
+        if not _active and _started_tracing:
+            tracemalloc.stop()  # left on by a capture whose session went away mid-rerun
+            _started_tracing = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            _started_tracing = True
+        tracemalloc.reset_peak()
+        capture = ProfileCapture(page)
+        _active.add(capture)
+    try:
+        capture._profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one profiler at a time; another session's capture has it
+        _stop_tracing(capture)
+        return None
+    return capture
+
+def _stop_tracing(capture: ProfileCapture):
+    global _started_tracing
+    with _lock:
+        _active.discard(capture)
+        if not _active and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+def _take_process_rerun() -> bool:
+    global _process_reruns_left
+    with _lock:
+        if _process_reruns_left <= 0:
+            return False
+        _process_reruns_left -= 1
+        return True
+
+def _give_back_process_rerun():
+    global _process_reruns_left
+    with _lock:
+        _process_reruns_left += 1
+
+def _write_capture(capture: ProfileCapture, seconds: float, peak: int, end_snapshot, interrupted: bool) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(capture.started))
+    size = capture.game_size if capture.game_size is not None else "unknown"
+    name = f"{capture.page}-{size}-{stamp}-{capture.capture_id}"
+    capture._profiler.dump_stats(os.path.join(PROFILE_DIR, name + ".pstats"))
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = end_snapshot.filter_traces(ignored).compare_to(
+        capture._start_snapshot.filter_traces(ignored), 'lineno')
+    lines = [
+        f"{capture.page} rerun, game {capture.game_id or '(this session)'}, size {size}",
+        f"{seconds * 1e3:.1f} ms, peak traced memory {peak / 1e6:.1f} MB"
+        + (", interrupted by st.rerun() or st.stop()" if interrupted else ""),
+        "Allocations made during the rerun and still held at its end, by line "
+        "(other sessions running at the same time are included):",
+        ""
+    ]
+    lines.extend(str(difference) for difference in differences[:ALLOCATION_LINES])
+    with open(os.path.join(PROFILE_DIR, name + ".txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    summary = {
+        'name': name,
+        'page': capture.page,
+        'game_id': capture.game_id,
+        'game_size': capture.game_size,
+        'started': capture.started,
+        'seconds': seconds,
+        'peak_bytes': peak,
+        'interrupted': interrupted,
+        'pstats': name + ".pstats",
+        'allocations': name + ".txt"
+    }
+    # The summary goes last, so list_captures() never sees a capture missing its files
+    summary_path = os.path.join(PROFILE_DIR, name + ".json")
+    with open(summary_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    os.replace(summary_path + ".tmp", summary_path)
+    _prune()
+    return summary_path
+
+def _prune():
+    summaries = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.json")), key=os.path.getmtime)
+    for path in summaries[:max(0, len(summaries) - MAX_CAPTURES)]:
+        base = path[:-len(".json")]
+        for extension in (".json", ".pstats", ".txt"):
+            with contextlib.suppress(OSError):
+                os.remove(base + extension)
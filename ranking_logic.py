@@ -0,0 +1,279 @@
+import math
+import random
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from change_feed import next_version
+from metrics import instrumented
+
+# Ratings are reported on the familiar Elo scale: 400 points is 10:1 odds
+ELO_SCALE = 400 / math.log(10)
+ELO_BASE = 1500
+# Gaussian prior on log-strengths, so unseen and unbeaten items still have finite ratings
+PRIOR_VARIANCE = 4.0
+# How far apart in the current order candidate pairs may be
+PAIR_WINDOW = 8
+# Rough memory per item and per recorded vote, measured with tracemalloc
+BYTES_PER_ITEM = 250
+BYTES_PER_VOTE = 48
+
+class RankingManager:
+    """Rank a pool of items from head-to-head votes with a Bradley-Terry model
+
+    Each item has a log-strength, refitted (vectorised MAP Newton steps over every
+    comparison) after each batch of votes. Pairs are picked where a vote teaches the
+    model most: close in the current order and still uncertain. Ranking n items to
+    the target precision takes on the order of n log n votes.
+    """
+    def __init__(self, batch_size: int = 16, target_precision: float = 0.5, seed: Optional[float] = None):
+        self.batch_size = batch_size
+        self.target_precision = target_precision  # standard error of a log-strength
+        self.ranking_name = ""
+        self.journal = None
+        self._on_change = None  # called with the new version after every change
+        self._lock = threading.RLock()
+        self._rng = random.Random(seed)  # pair tie-breaks and screen sides
+        self._clear_ranking_state()
+
+    def _clear_ranking_state(self):
+        """Clear the pool, votes and fitted model"""
+        self.version = next_version()  # every change takes a fresh process-wide stamp
+        self.items = []
+        self.ranking_created = False
+        self._rows = {}  # item: row
+        self._winners = []  # row of each comparison's winner
+        self._losers = []  # row of each comparison's loser
+        self._theta = np.zeros(0)
+        self._variance = np.zeros(0)
+        self._fitted_votes = 0
+        self._pair_queue = deque()
+
+    def create_ranking(self, items: List[str]):
+        """Start ranking a new pool of items"""
+        with self._lock:
+            self._clear_ranking_state()
+            self.items = list(dict.fromkeys(items))
+            self._rows = {item: row for row, item in enumerate(self.items)}
+            self._theta = np.zeros(len(self.items))
+            self._variance = np.full(len(self.items), PRIOR_VARIANCE)
+            self.ranking_created = True
+            self._journal('create_ranking', self.items)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._rows
+
+    def set_ranking_name(self, name: str):
+        """Rename the ranking"""
+        with self._lock:
+            self.ranking_name = name
+            self._journal('set_ranking_name', name)
+
+    @instrumented('ranking.vote', counts_votes='ranking')
+    def vote(self, winner: str, loser: str) -> bool:
+        """Record that winner beat loser head to head (returns whether it counted)"""
+        winner_row = self._rows.get(winner)
+        loser_row = self._rows.get(loser)
+        if winner_row is None or loser_row is None or winner_row == loser_row:
+            return False
+
+        with self._lock:
+            if self._rows.get(winner) != winner_row:
+                return False  # the pool was recreated under us
+            self._winners.append(winner_row)
+            self._losers.append(loser_row)
+            self._journal('vote', winner, loser)
+            if len(self._winners) - self._fitted_votes >= self.batch_size:
+                self._fit()
+            return True
+
+    @instrumented('ranking.next_pair')
+    def next_pair(self) -> Optional[Tuple[str, str]]:
+        """Get the next pair worth a vote, refitting first once the planned batch is used up"""
+        with self._lock:
+            if len(self.items) < 2:
+                return None
+            if not self._pair_queue:
+                self._fit()
+                self._pair_queue.extend(self._plan_pairs(self.batch_size))
+            first, second = self._pair_queue.popleft()
+            return self.items[first], self.items[second]
+
+    def _plan_pairs(self, count: int) -> List[Tuple[int, int]]:
+        """Pick up to count disjoint pairs with the most expected information
+
+        Candidates are items within PAIR_WINDOW places of each other in the current
+        order, scored by outcome uncertainty p(1-p) times their combined variance.
+        """
+        n = len(self.items)
+        order = np.argsort(-self._theta, kind='stable')
+        firsts, seconds = [], []
+        for distance in range(1, min(PAIR_WINDOW, n - 1) + 1):
+            firsts.append(order[:-distance])
+            seconds.append(order[distance:])
+        firsts = np.concatenate(firsts)
+        seconds = np.concatenate(seconds)
+
+        p = 1 / (1 + np.exp(self._theta[seconds] - self._theta[firsts]))
+        scores = p * (1 - p) * (self._variance[firsts] + self._variance[seconds])
+        # Jitter breaks ties between equally useful pairs (every pair, before the first vote)
+        scores *= 1 + 1e-6 * np.array([self._rng.random() for _ in range(len(scores))])
+
+        pairs = []
+        used = set()
+        for candidate in np.argsort(-scores, kind='stable'):
+            first, second = int(firsts[candidate]), int(seconds[candidate])
+            if first in used or second in used:
+                continue
+            used.update((first, second))
+            # Random sides, so screen position can't bias the votes
+            pairs.append((first, second) if self._rng.random() < 0.5 else (second, first))
+            if len(pairs) >= count:
+                break
+        return pairs
+
+    def _fit(self, max_iterations: int = 50, tolerance: float = 1e-4):
+        """Refit log-strengths to every vote so far, warm-started from the last fit"""
+        n = len(self.items)
+        if n == 0 or self._fitted_votes == len(self._winners):
+            return
+
+        winners = np.asarray(self._winners, dtype=np.intp)
+        losers = np.asarray(self._losers, dtype=np.intp)
+        theta = self._theta.copy()
+        for _ in range(max_iterations):
+            # Probability each recorded winner had of winning under the current fit
+            p = 1 / (1 + np.exp(theta[losers] - theta[winners]))
+            surprise = 1 - p
+            gradient = (np.bincount(winners, surprise, n) - np.bincount(losers, surprise, n)
+                        - theta / PRIOR_VARIANCE)
+            information = p * surprise
+            hessian = np.bincount(winners, information, n) + np.bincount(losers, information, n) + 1 / PRIOR_VARIANCE
+            step = np.clip(gradient / hessian, -1, 1)
+            theta += step
+            if np.abs(step).max() < tolerance:
+                break
+
+        self._theta = theta
+        self._variance = 1 / hessian
+        self._fitted_votes = len(winners)
+
+    def get_comparison_count(self) -> int:
+        """Get the number of votes cast"""
+        return len(self._winners)
+
+    def get_vote_budget(self) -> int:
+        """Get the rough number of votes a full ranking needs (n log2 n)"""
+        n = len(self.items)
+        return math.ceil(n * math.log2(n)) if n > 1 else 0
+
+    @instrumented('ranking.get_precision')
+    def get_precision(self) -> float:
+        """Get the share of items whose rating is known to the target precision, as of the last refit"""
+        variance = self._variance
+        if not len(variance):
+            return 0.0
+        return float(np.mean(np.sqrt(variance) <= self.target_precision))
+
+    def is_ranking_complete(self) -> bool:
+        """Check whether every item's rating is known to the target precision"""
+        return self.ranking_created and self.get_precision() == 1.0
+
+    @instrumented('ranking.get_ranking')
+    def get_ranking(self, top_k: Optional[int] = None) -> List[Dict]:
+        """Get items from strongest to weakest with Elo-scale ratings and 95% intervals
+
+        'confidence' is the model's probability that an item really is stronger than
+        the one ranked below it.
+        """
+        with self._lock:
+            self._fit()
+            items = self.items
+            theta = self._theta
+            standard_error = np.sqrt(self._variance)
+            wins = np.bincount(np.asarray(self._winners, dtype=np.intp), minlength=len(self.items))
+            losses = np.bincount(np.asarray(self._losers, dtype=np.intp), minlength=len(self.items))
+
+        order = np.argsort(-theta, kind='stable')
+        if top_k is not None:
+            order = order[:top_k + 1]
+        ranking = []
+        for rank, row in enumerate(order, 1):
+            rating = ELO_BASE + ELO_SCALE * theta[row]
+            margin = 1.96 * ELO_SCALE * standard_error[row]
+            confidence = None
+            if rank < len(order):
+                below = order[rank]
+                gap = (theta[row] - theta[below]) / math.sqrt(standard_error[row] ** 2 + standard_error[below] ** 2)
+                confidence = 0.5 * (1 + math.erf(gap / math.sqrt(2)))
+            ranking.append({
+                'rank': rank,
+                'item': items[row],
+                'rating': float(rating),
+                'rating_low': float(rating - margin),
+                'rating_high': float(rating + margin),
+                'confidence': confidence,
+                'wins': int(wins[row]),
+                'losses': int(losses[row])
+            })
+        return ranking if top_k is None else ranking[:top_k]
+
+    def estimated_size(self) -> int:
+        """Get a rough memory footprint in bytes (for SharedGameStore's memory budget)"""
+        return BYTES_PER_ITEM * len(self.items) + BYTES_PER_VOTE * len(self._winners)
+
+    def reset_ranking(self):
+        """Reset the entire ranking"""
+        with self._lock:
+            self.ranking_name = ""
+            self._clear_ranking_state()
+            self._journal('reset_ranking')
+
+    def attach_journal(self, journal):
+        """Record every mutation from now on in a VoteJournal"""
+        self.journal = journal
+        journal.attach(self._snapshot_for_journal)
+
+    def set_change_listener(self, listener: Optional[Callable[[int], None]]):
+        """Call listener(version) after every change (e.g. ChangeHub.publish for this ranking)"""
+        self._on_change = listener
+
+    def _journal(self, op: str, *args) -> int:
+        """Record a change: stamp a new version, append it to the journal and tell the listener"""
+        version = self.version = next_version()  # changes all hold the ranking lock
+        if self.journal is not None:
+            self.journal.append(op, args)
+        if self._on_change is not None:
+            self._on_change(version)
+        return version
+
+    def _snapshot_for_journal(self) -> Tuple[int, Dict]:
+        """Capture state and the journal position it covers, with every writer held off"""
+        with self._lock:
+            return self.journal.mark(), self.export_state()
+
+    def export_state(self) -> Dict:
+        """Get the pool and every vote as plain JSON-compatible data"""
+        return {
+            'ranking_name': self.ranking_name,
+            'items': self.items,
+            'ranking_created': self.ranking_created,
+            'votes': [[winner, loser] for winner, loser in zip(self._winners, self._losers)]
+        }
+
+    def import_state(self, state: Dict):
+        """Replace this ranking with exported state and refit the model"""
+        with self._lock:
+            self._clear_ranking_state()
+            self.ranking_name = state['ranking_name']
+            self.items = list(state['items'])
+            self.ranking_created = state['ranking_created']
+            self._rows = {item: row for row, item in enumerate(self.items)}
+            self._theta = np.zeros(len(self.items))
+            self._variance = np.full(len(self.items), PRIOR_VARIANCE)
+            for winner, loser in state['votes']:
+                self._winners.append(winner)
+                self._losers.append(loser)
+            self._fit()
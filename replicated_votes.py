@@ -0,0 +1,281 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# Seconds between background exchanges
+SYNC_INTERVAL = 0.5
+
+class PNCounterMap:
+    """Conflict-free replicated counters, one per key
+
+    Each replica only ever raises its own running increment and decrement totals, so
+    merging is an element-wise max and replicas converge whatever order, or however
+    often, they see each other's state. A key's value is every increment minus every
+    decrement.
+    """
+    def __init__(self, replica_id: str):
+        self.replica_id = replica_id
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[Hashable, List[int]]] = {replica_id: {}}  # replica: {key: [increments, decrements]}
+        self._totals: Dict[Hashable, List[int]] = {}  # key: summed [increments, decrements]
+        self._dirty: Set[Hashable] = set()  # own keys changed since the last delta
+
+    def add(self, key: Hashable, delta: int):
+        """Count a local change of delta (an increment if positive, a decrement if negative)"""
+        side = 0 if delta >= 0 else 1
+        with self._lock:
+            own = self._counts[self.replica_id].get(key)
+            if own is None:
+                own = self._counts[self.replica_id][key] = [0, 0]
+                self._totals.setdefault(key, [0, 0])
+            own[side] += abs(delta)
+            self._totals[key][side] += abs(delta)
+            self._dirty.add(key)
+
+    def value(self, key: Hashable) -> int:
+        """Get a key's merged value"""
+        totals = self._totals.get(key)
+        return totals[0] - totals[1] if totals is not None else 0
+
+    def take_delta(self) -> List[List]:
+        """Get this replica's totals for the keys it changed since the last call, as [*key, inc, dec] rows"""
+        with self._lock:
+            own = self._counts[self.replica_id]
+            rows = [[*key, *own[key]] for key in self._dirty]
+            self._dirty.clear()
+        return rows
+
+    def merge(self, replica_id: str, rows: Iterable[List]) -> List[Hashable]:
+        """Merge one replica's [*key, inc, dec] rows; returns the keys whose value changed"""
+        changed = []
+        with self._lock:
+            counts = self._counts.setdefault(replica_id, {})
+            for *key, increments, decrements in rows:
+                key = tuple(key)
+                known = counts.get(key)
+                if known is None:
+                    known = counts[key] = [0, 0]
+                    self._totals.setdefault(key, [0, 0])
+                raise_increments = increments - known[0]
+                raise_decrements = decrements - known[1]
+                if raise_increments <= 0 and raise_decrements <= 0:
+                    continue
+                totals = self._totals[key]
+                if raise_increments > 0:
+                    known[0] = increments
+                    totals[0] += raise_increments
+                if raise_decrements > 0:
+                    known[1] = decrements
+                    totals[1] += raise_decrements
+                changed.append(key)
+        return changed
+
+class LWWRegisterMap:
+    """Conflict-free replicated last-writer-wins values, one per key
+
+    A write is stamped (time, replica); merging keeps the highest stamp, so every replica
+    ends up holding the same value for each key.
+    """
+    def __init__(self, replica_id: str):
+        self.replica_id = replica_id
+        self._lock = threading.Lock()
+        self._values: Dict[Hashable, Tuple[int, str, Any]] = {}  # key: (stamp, replica, value)
+        self._dirty: Set[Hashable] = set()
+        self._last_stamp = 0
+
+    def set(self, key: Hashable, value: Any):
+        """Write a value locally; it wins over every write this replica has seen"""
+        with self._lock:
+            # Never behind anything already seen, even if another machine's clock runs ahead
+            self._last_stamp = max(time.time_ns(), self._last_stamp + 1)
+            self._values[key] = (self._last_stamp, self.replica_id, value)
+            self._dirty.add(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._values.get(key)
+        return entry[2] if entry is not None else default
+
+    def take_delta(self) -> List[List]:
+        """Get the local writes since the last call as [key, stamp, value] rows"""
+        with self._lock:
+            rows = [[key, self._values[key][0], self._values[key][2]] for key in self._dirty]
+            self._dirty.clear()
+        return rows
+
+    def merge(self, replica_id: str, rows: Iterable[List]) -> List[Hashable]:
+        """Merge one replica's [key, stamp, value] rows; returns the keys whose value changed"""
+        changed = []
+        with self._lock:
+            for key, stamp, value in rows:
+                current = self._values.get(key)
+                if current is not None and (current[0], current[1]) >= (stamp, replica_id):
+                    continue
+                self._values[key] = (stamp, replica_id, value)
+                self._last_stamp = max(self._last_stamp, stamp)
+                if current is None or current[2] != value:
+                    changed.append(key)
+        return changed
+
+class FileTransport:
+    """Exchanges deltas through a directory every replica can reach (local disk or a shared mount)
+
+    Each replica appends JSON lines to its own file and tails everyone else's, so there
+    is never more than one writer per file and nothing to lock. A replica reads its own
+    file once, on its first receive, to pick up where it left off after a restart.
+    """
+    def __init__(self, directory: str, replica_id: str, fsync: bool = False):
+        self.directory = directory
+        self.replica_id = replica_id
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._path = os.path.join(directory, f"replica-{replica_id}.jsonl")
+        self._offsets: Dict[str, int] = {}
+        self._recovered = False
+
+    def has_published(self) -> bool:
+        """Check whether this replica has sent anything, in this run or an earlier one"""
+        return os.path.exists(self._path)
+
+    def send(self, message: Dict):
+        """Publish a message to every other replica"""
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(message, separators=(",", ":")) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def receive(self) -> List[Dict]:
+        """Get every complete message published since the last call"""
+        messages = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "replica-*.jsonl"))):
+            if path == self._path and self._recovered:
+                continue
+            offset = self._offsets.get(path, 0)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # A line still being written is left for the next call
+            end = data.rfind(b"\n") + 1
+            if end:
+                self._offsets[path] = offset + end
+                messages.extend(json.loads(line) for line in data[:end].splitlines() if line)
+        self._recovered = True
+        return messages
+
+class VoteReplica:
+    """Keeps one game's votes (and bracket winners) in step with other processes
+
+    Managers call record_votes()/record_winner() for local changes; sync() publishes them
+    and merges everyone else's, handing the keys that changed back to the manager. The
+    game itself (items, seeding) must be created the same way on every replica; only
+    votes and winners travel. No replica is in charge, and there is no shared lock.
+    """
+    def __init__(self, transport_directory: str, replica_id: Optional[str] = None,
+                 interval: float = SYNC_INTERVAL, fsync: bool = False):
+        self.replica_id = replica_id or uuid.uuid4().hex[:12]
+        self.interval = interval
+        self.transport = FileTransport(transport_directory, self.replica_id, fsync)
+        self.counters = PNCounterMap(self.replica_id)
+        self.winners = LWWRegisterMap(self.replica_id)
+        self._manager = None
+        self._sync_lock = threading.Lock()
+        self._pending_votes: Set[Hashable] = set()  # keys merged but not yet taken by the game (e.g. an unseated participant)
+        self._pending_winners: Set[Hashable] = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.messages_merged = 0
+        self.rows_merged = 0
+        self.merge_seconds = 0.0
+
+    def bind(self, manager: Any, current_votes: Dict[Hashable, int],
+             current_winners: Optional[Dict[Hashable, Any]] = None):
+        """Serve a manager (see its attach_replica())
+
+        Everything already published is read first, this replica's own earlier messages
+        included, so a restarted replica carries on from its old totals. A replica that has
+        never published counts the votes (and winners) the game already holds as its own.
+        """
+        self._manager = manager
+        fresh = not self.transport.has_published()
+        with self._sync_lock:
+            # Applied to the game on the first sync; the manager holds its locks while binding
+            self._receive()
+        if fresh:
+            for key, count in current_votes.items():
+                if count:
+                    self.counters.add(key, count)
+            for key, winner in (current_winners or {}).items():
+                self.winners.set(key, winner)
+
+    def record_votes(self, key: Hashable, delta: int):
+        self.counters.add(key, delta)
+
+    def record_winner(self, key: Hashable, winner: Any):
+        self.winners.set(key, winner)
+
+    def vote_total(self, key: Hashable) -> int:
+        """Get a key's merged vote count across every replica"""
+        return self.counters.value(key)
+
+    def sync(self):
+        """Publish local changes, then merge every other replica's and apply them to the game"""
+        with self._sync_lock:
+            counter_rows = self.counters.take_delta()
+            winner_rows = self.winners.take_delta()
+            if counter_rows or winner_rows:
+                self.transport.send({'replica': self.replica_id, 'counters': counter_rows, 'winners': winner_rows})
+
+            self._merge_received()
+
+    def _receive(self):
+        """Merge every message received since the last call into the counters and winners"""
+        for message in self.transport.receive():
+            replica_id = message['replica']
+            self._pending_votes.update(self.counters.merge(replica_id, message['counters']))
+            self._pending_winners.update(self.winners.merge(replica_id, message['winners']))
+            self.messages_merged += 1
+            self.rows_merged += len(message['counters']) + len(message['winners'])
+
+    def _merge_received(self):
+        """Receive, then hand the keys that changed to the manager"""
+        start = time.perf_counter()
+        self._receive()
+        # Winners first, so votes for the matchups they open have somewhere to go
+        if self._pending_winners:
+            self._pending_winners = set(self._manager._merge_replicated_winners(self._pending_winners))
+        if self._pending_votes:
+            self._pending_votes = set(self._manager._merge_replicated_votes(self._pending_votes))
+        self.merge_seconds += time.perf_counter() - start
+
+    def start(self):
+        """Sync in a background thread every interval seconds until stop()"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sync_loop, name="vote-replica", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after a last sync"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.sync()
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def stats(self) -> Dict:
+        """Get merge counts and time, and how many changes are waiting on the game"""
+        return {
+            'replica': self.replica_id,
+            'messages_merged': self.messages_merged,
+            'rows_merged': self.rows_merged,
+            'merge_seconds': self.merge_seconds,
+            'pending': len(self._pending_votes) + len(self._pending_winners)
+        }
@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from bracket_logic import BracketManager
+
+# Rows formatted per chunk; only one chunk is ever held, so memory stays flat however long the export
+CHUNK_ROWS = 2_000
+# Export format: (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'markdown': ("Markdown", 'md', 'text/markdown'),
+    'csv': ("CSV", 'csv', 'text/csv'),
+    'jsonl': ("JSON Lines", 'jsonl', 'application/x-ndjson')
+}
+# Smash or Pass vote events in a journal: op: (choice, delta)
+SMASH_OR_PASS_VOTE_OPS = {
+    'vote_smash': ('smash', 1),
+    'vote_pass': ('pass', 1),
+    'remove_smash_vote': ('smash', -1),
+    'remove_pass_vote': ('pass', -1)
+}
+
+RANKING_COLUMNS = ['rank', 'item', 'smash_percentage', 'smash_votes', 'pass_votes', 'total_votes']
+STANDING_COLUMNS = ['rank', 'name', 'wins', 'losses', 'total_votes', 'round_eliminated', 'eliminated_by']
+ROUND_COLUMNS = ['round', 'matchup', 'participant_1', 'votes_1', 'participant_2', 'votes_2', 'winner']
+STATISTIC_COLUMNS = ['statistic', 'value']
+HISTORY_COLUMNS = ['seq', 'event', 'target', 'choice', 'delta']
+
+def smash_or_pass_rankings(manager) -> Iterator[Dict]:
+    """Yield the ranking row by row, read from the live leaderboard one chunk at a time
+
+    Votes landing mid-export can move items between chunks; export a finished game for a
+    ranking that is exact end to end.
+    """
+    offset = 0
+    while True:
+        rows = manager.page(offset, CHUNK_ROWS)
+        for rank, row in enumerate(rows, offset + 1):
+            if not row['total_votes']:
+                row['smash_percentage'] = None  # unrated, rather than 0% smash
+            yield {'rank': rank, **row}
+        if len(rows) < CHUNK_ROWS:
+            return
+        offset += CHUNK_ROWS
+
+def smash_or_pass_statistics(manager) -> Iterator[Dict]:
+    """Yield the game's summary figures"""
+    current, total = manager.get_progress()
+    top = manager.top_k(1)
+    yield {'statistic': 'Items', 'value': manager.get_item_count()}
+    yield {'statistic': 'Total votes', 'value': manager.get_total_votes()}
+    yield {'statistic': 'Progress', 'value': f"{min(current, total)} of {total}"}
+    yield {'statistic': 'Complete', 'value': manager.is_game_complete()}
+    yield {'statistic': 'Top item', 'value': top[0]['item'] if top else None}
+
+def bracket_standings(manager) -> Iterator[Dict]:
+    """Yield participant standings, ranked by wins then votes received"""
+    for rank, standing in enumerate(manager.get_standings(), 1):
+        yield {'rank': rank, **standing}
+
+def bracket_rounds(manager) -> Iterator[Dict]:
+    """Yield every matchup's result, round by round"""
+    for matchup in manager.iter_matchups():
+        first, second = matchup['seats']
+        votes = matchup['votes']
+        yield {
+            'round': matchup['round'],
+            'matchup': matchup['id'],
+            'participant_1': first,
+            'votes_1': votes.get(first) if first is not None else None,
+            'participant_2': second,
+            'votes_2': votes.get(second) if second is not None else None,
+            'winner': matchup['winner']
+        }
+
+def bracket_statistics(manager) -> Iterator[Dict]:
+    """Yield the tournament's summary figures"""
+    yield {'statistic': 'Tournament', 'value': manager.tournament_name or None}
+    yield {'statistic': 'Participants', 'value': len(manager.participants)}
+    yield {'statistic': 'Rounds', 'value': manager.get_total_rounds()}
+    yield {'statistic': 'Current round', 'value': manager.get_current_round()}
+    yield {'statistic': 'Matchups completed', 'value': f"{manager.get_completed_matchups()} of {manager.get_total_matchups()}"}
+    yield {'statistic': 'Total votes', 'value': manager.get_total_votes()}
+    yield {'statistic': 'Most voted matchup', 'value': manager.get_most_voted_matchup()}
+    yield {'statistic': 'Winner', 'value': manager.get_winner()}
+
+def vote_history(journal) -> Iterator[Dict]:
+    """Yield a shared game's recorded events from its VoteJournal, oldest first, one row per vote
+
+    Batch imports become one row per (target, choice); other changes (creating, resetting,
+    results) appear as events without a target. Only journals with keep_history hold every
+    event since the game was created; otherwise this covers the events since the last
+    snapshot (see history_is_complete()). Who voted is never exported.
+    """
+    for seq, op, args in journal.history():
+        if op in SMASH_OR_PASS_VOTE_OPS:
+            choice, delta = SMASH_OR_PASS_VOTE_OPS[op]
+            yield {'seq': seq, 'event': op, 'target': args[0], 'choice': choice, 'delta': delta}
+        elif op == 'vote':
+            yield {'seq': seq, 'event': op, 'target': args[0], 'choice': args[1], 'delta': 1}
+        elif op == 'apply_votes':
+            for target, choice, delta in args[0]:
+                yield {'seq': seq, 'event': op, 'target': target, 'choice': choice, 'delta': delta}
+        else:
+            yield {'seq': seq, 'event': op, 'target': None, 'choice': None, 'delta': None}
+
+def history_is_complete(journal) -> bool:
+    """Check whether a journal's vote history goes back to the game's creation, not just its last snapshot"""
+    return journal.keep_history
+
+# Export kind: (title, columns, rows function) for each game type
+SMASH_OR_PASS_EXPORTS: Dict[str, Tuple[str, List[str], Callable[[Any], Iterable[Dict]]]] = {
+    'rankings': ("Rankings", RANKING_COLUMNS, smash_or_pass_rankings),
+    'statistics': ("Statistics", STATISTIC_COLUMNS, smash_or_pass_statistics)
+}
+BRACKET_EXPORTS: Dict[str, Tuple[str, List[str], Callable[[Any], Iterable[Dict]]]] = {
+    'standings': ("Standings", STANDING_COLUMNS, bracket_standings),
+    'rounds': ("Results by Round", ROUND_COLUMNS, bracket_rounds),
+    'statistics': ("Statistics", STATISTIC_COLUMNS, bracket_statistics)
+}
+
+def export_game(manager, kind: str, export_format: str) -> Iterator[str]:
+    """Stream a game's export as text chunks
+
+    kind is a key of BRACKET_EXPORTS or SMASH_OR_PASS_EXPORTS, or 'history' for a shared
+    game's vote history.
+    """
+    if kind == 'history':
+        if manager.journal is None:
+            raise ValueError("only shared games keep a vote history")
+        title = "Vote History" if history_is_complete(manager.journal) else "Vote History (since the last snapshot)"
+        return stream_rows(vote_history(manager.journal), HISTORY_COLUMNS, export_format, title)
+    exports = BRACKET_EXPORTS if isinstance(manager, BracketManager) else SMASH_OR_PASS_EXPORTS
+    if kind not in exports:
+        raise ValueError(f"unknown export {kind!r}, expected one of {sorted(exports) + ['history']}")
+    title, columns, rows = exports[kind]
+    return stream_rows(rows(manager), columns, export_format, title)
+
+def stream_rows(rows: Iterable[Dict], columns: List[str], export_format: str,
+                title: Optional[str] = None) -> Iterator[str]:
+    """Format rows as Markdown, CSV or JSON Lines, yielding one chunk of CHUNK_ROWS rows at a time"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"unknown format {export_format!r}, expected one of {list(EXPORT_FORMATS)}")
+    formatter = {'markdown': _markdown_chunk, 'csv': _csv_chunk, 'jsonl': _jsonl_chunk}[export_format]
+
+    if export_format == 'markdown':
+        heading = f"## {title}\n\n" if title else ""
+        yield heading + _markdown_line(columns) + "|" + "---|" * len(columns) + "\n"
+    elif export_format == 'csv':
+        yield _csv_lines([columns])
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_ROWS:
+            yield formatter(chunk, columns)
+            chunk = []
+    if chunk:
+        yield formatter(chunk, columns)
+
+def write_export(chunks: Iterable[str], file: BinaryIO) -> int:
+    """Write streamed chunks to a binary file as UTF-8; returns the bytes written"""
+    written = 0
+    for chunk in chunks:
+        written += file.write(chunk.encode("utf-8"))
+    return written
+
+def export_to_file(manager, kind: str, export_format: str) -> str:
+    """Stream a game's export into a new temporary file and get its path (the caller removes it)"""
+    extension = EXPORT_FORMATS[export_format][1]
+    with tempfile.NamedTemporaryFile("wb", prefix=f"nerd-fights-{kind}-", suffix=f".{extension}",
+                                     delete=False) as f:
+        try:
+            write_export(export_game(manager, kind, export_format), f)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
+
+def _csv_chunk(rows: List[Dict], columns: List[str]) -> str:
+    return _csv_lines([_cell(row.get(column)) for column in columns] for row in rows)
+
+def _csv_lines(lines: Iterable[List[str]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(lines)
+    return buffer.getvalue()
+
+def _jsonl_chunk(rows: List[Dict], columns: List[str]) -> str:
+    return "".join(json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False) + "\n"
+                   for row in rows)
+
+def _markdown_chunk(rows: List[Dict], columns: List[str]) -> str:
+    return "".join(_markdown_line([_cell(row.get(column)) for column in columns]) for row in rows)
+
+def _markdown_line(cells: List[str]) -> str:
+    # Pipes would split a cell and newlines would end the table row
+    escaped = (str(cell).replace("|", "\\|").replace("\n", " ") for cell in cells)
+    return "| " + " | ".join(escaped) + " |\n"
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
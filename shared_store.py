@@ -0,0 +1,248 @@
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Defaults for the pages' stores (one per game kind): estimated bytes kept in memory, and
+# seconds a game may sit unused before it is spilled to disk
+MEMORY_BUDGET = int(float(os.environ.get("NERD_FIGHTS_MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+IDLE_TTL = float(os.environ.get("NERD_FIGHTS_IDLE_TTL", "1800"))
+
+logger = logging.getLogger(__name__)
+
+class StripedLocks:
+    """A fixed pool of locks; each key maps onto one stripe"""
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def stripe_for(self, key: Hashable) -> int:
+        """Get the stripe index guarding a key"""
+        return hash(key) % len(self._locks)
+
+    @contextmanager
+    def holding_all(self):
+        """Hold every stripe at once (always acquired in index order)"""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def __getitem__(self, stripe: int) -> threading.Lock:
+        return self._locks[stripe]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+GAME_ID_PATTERN = re.compile(r"[0-9a-f]{8}")
+
+def is_valid_game_id(game_id: str) -> bool:
+    """Check a game id has the shape new_game_id() produces (safe for URLs and file names)"""
+    return bool(GAME_ID_PATTERN.fullmatch(game_id))
+
+def estimated_size(game: Any) -> int:
+    """Get a game's rough memory footprint in bytes (0 for games that can't say)"""
+    size = getattr(game, 'estimated_size', None)
+    return size() if size is not None else 0
+
+class SharedGameStore:
+    """Process-wide registry of games, keyed by game id and shared by every session
+
+    Optionally bounded: games unused for idle_ttl seconds, and then the least recently
+    used games while the estimated total is over memory_budget bytes, are evicted
+    through on_evict (e.g. spilled to disk) and come back through the factory on their
+    next access. An evicted game that something still references is revived through
+    on_revive instead of being rebuilt, so changes made through that reference survive.
+    Games count as used when they are looked up or touch()ed (e.g. on every change), and
+    a game that fails to spill is logged and kept in memory.
+    """
+    def __init__(self, memory_budget: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[Any], None]] = None,
+                 on_revive: Optional[Callable[[Any], None]] = None,
+                 sizer: Callable[[Any], int] = estimated_size, clock: Callable[[], float] = time.monotonic):
+        self.memory_budget = memory_budget
+        self.idle_ttl = idle_ttl
+        self._on_evict = on_evict
+        self._on_revive = on_revive
+        self._sizer = sizer
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._games: Dict[str, Any] = OrderedDict()  # least recently used first
+        self._last_used: Dict[str, float] = {}
+        self._evicted = weakref.WeakValueDictionary()  # game_id: evicted game still referenced elsewhere
+        self._busy: Dict[str, threading.Event] = {}  # game_id: set once its load or spill is done
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0  # evictions for idleness (also counted in evictions)
+        self.revivals = 0
+
+    def new_game_id(self) -> str:
+        """Generate an unused game id suitable for a query parameter"""
+        while True:
+            game_id = uuid.uuid4().hex[:8]
+            if game_id not in self._games and game_id not in self._busy:
+                return game_id
+
+    def get(self, game_id: str) -> Optional[Any]:
+        """Get a game by id if it is in memory"""
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is not None:
+                self._touch(game_id)
+            return game
+
+    def get_or_create(self, game_id: str, factory: Callable[[], Any]) -> Any:
+        """Get a game by id, creating (or reloading) it with factory if it is not in memory
+
+        Loading and spilling happen outside the store lock, so other games stay available
+        meanwhile; a lookup of a game being loaded or spilled waits for that to finish, so
+        each game is only ever loaded once.
+        """
+        loading = None
+        while True:
+            with self._lock:
+                game = self._games.get(game_id)
+                if game is not None:
+                    self.hits += 1
+                    self._touch(game_id)
+                    victims = self._take_victims(keep=game_id)
+                    break
+                busy = self._busy.get(game_id)
+                if busy is None:
+                    self.misses += 1
+                    loading = self._busy[game_id] = threading.Event()
+                    game = self._evicted.pop(game_id, None)
+                    break
+            busy.wait()  # then look again
+
+        if loading is not None:
+            revived = game
+            try:
+                if revived is None:
+                    game = factory()
+                elif self._on_revive is not None:
+                    self._on_revive(revived)
+            except BaseException:
+                with self._lock:
+                    if revived is not None:
+                        self._evicted[game_id] = revived
+                    del self._busy[game_id]
+                loading.set()
+                raise
+            with self._lock:
+                if revived is not None:
+                    self.revivals += 1
+                self._games[game_id] = game
+                self._touch(game_id)
+                del self._busy[game_id]
+                victims = self._take_victims(keep=game_id)
+            loading.set()
+
+        self._spill(victims)
+        return game
+
+    def touch(self, game_id: str):
+        """Mark a game in memory as just used (call it on every change, so games voted on
+        without being looked up again don't go idle)"""
+        with self._lock:
+            if game_id in self._games:
+                self._touch(game_id)
+
+    def _touch(self, game_id: str):
+        self._games.move_to_end(game_id)
+        self._last_used[game_id] = self._clock()
+
+    def _take_victims(self, keep: Optional[str] = None) -> List[Tuple[str, Any, float, bool]]:
+        """Take out idle games, then least recently used ones until the budget is met (never keep)
+
+        Called with the store lock held. Each game taken is marked busy until _spill() has
+        passed it to on_evict. Returns (game_id, game, last used, expired) per game.
+        """
+        victims = []
+        if self.idle_ttl is not None:
+            deadline = self._clock() - self.idle_ttl
+            for game_id in list(self._games):
+                if self._last_used[game_id] > deadline:
+                    break
+                if game_id != keep:
+                    victims.append(self._take(game_id, expired=True))
+
+        if self.memory_budget is not None:
+            sizes = {game_id: self._sizer(game) for game_id, game in self._games.items()}
+            total = sum(sizes.values())
+            for game_id in list(self._games):
+                if total <= self.memory_budget:
+                    break
+                if game_id != keep:
+                    victims.append(self._take(game_id, expired=False))
+                    total -= sizes[game_id]
+        return victims
+
+    def _take(self, game_id: str, expired: bool) -> Tuple[str, Any, float, bool]:
+        self._busy[game_id] = threading.Event()
+        return game_id, self._games.pop(game_id), self._last_used.pop(game_id), expired
+
+    def _spill(self, victims: List[Tuple[str, Any, float, bool]]):
+        """Evict games taken out by _take_victims() through on_evict, without the store lock
+
+        A game that fails to spill is logged and put back, as least recently used, so the
+        lookup that triggered the spill still gets its own game.
+        """
+        for game_id, game, last_used, expired in victims:
+            try:
+                if self._on_evict is not None:
+                    self._on_evict(game)
+            except Exception:
+                logger.exception("Could not spill game %s; keeping it in memory", game_id)
+                with self._lock:
+                    self._games[game_id] = game
+                    self._games.move_to_end(game_id, last=False)
+                    self._last_used[game_id] = last_used
+                    self._busy.pop(game_id).set()
+                continue
+            with self._lock:
+                self._evicted[game_id] = game
+                self.evictions += 1
+                self.expirations += expired
+                self._busy.pop(game_id).set()
+
+    def sweep(self):
+        """Apply the idle and memory limits now, without waiting for the next lookup"""
+        with self._lock:
+            victims = self._take_victims()
+        self._spill(victims)
+
+    def remove(self, game_id: str):
+        """Forget a game"""
+        with self._lock:
+            self._games.pop(game_id, None)
+            self._last_used.pop(game_id, None)
+            self._evicted.pop(game_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get lookup and eviction counters with the games and estimated bytes in memory"""
+        with self._lock:
+            return {
+                'games': len(self._games),
+                'estimated_bytes': sum(self._sizer(game) for game in self._games.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'revivals': self.revivals
+            }
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
+
+    def __len__(self) -> int:
+        return len(self._games)
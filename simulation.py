@@ -0,0 +1,166 @@
+"""Headless simulations of full games, for benchmarks and load testing
+
+Run from the repository root, e.g.:
+    python simulation.py bracket --size 64 --voters 25 --distribution skewed
+    python simulation.py smash-or-pass --size 1000 --voters 10
+    python simulation.py ranking --size 500
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from bracket_logic import BracketManager
+from ranking_logic import RankingManager
+from smash_or_pass_logic import SmashOrPassManager
+
+DISTRIBUTIONS = ['uniform', 'skewed', 'unanimous']
+
+def participant_strengths(names: List[str], distribution: str, rng: random.Random) -> Dict[str, float]:
+    """Give every participant a hidden strength that drives how voters pick"""
+    if distribution == 'uniform':
+        return {name: 1.0 for name in names}
+    if distribution in ('skewed', 'unanimous'):
+        return {name: rng.lognormvariate(0, 1) for name in names}
+    raise ValueError(f"unknown distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+
+def make_picker(names: List[str], distribution: str, rng: random.Random) -> Callable[[str, str], str]:
+    """Get a voter's choice function for head-to-head matchups
+
+    uniform: coin flips; skewed: Bradley-Terry odds from the strengths;
+    unanimous: the stronger participant always gets the vote.
+    """
+    strengths = participant_strengths(names, distribution, rng)
+
+    def pick(first: str, second: str) -> str:
+        if distribution == 'unanimous':
+            return first if strengths[first] >= strengths[second] else second
+        odds = strengths[first] / (strengths[first] + strengths[second])
+        return first if rng.random() < odds else second
+
+    return pick
+
+def smash_probabilities(items: List[str], distribution: str, rng: random.Random) -> Dict[str, float]:
+    """Give every item a hidden chance of being smashed"""
+    if distribution == 'uniform':
+        return {item: 0.5 for item in items}
+    if distribution == 'skewed':
+        return {item: rng.betavariate(2, 5) for item in items}
+    if distribution == 'unanimous':
+        return {item: float(rng.random() < 0.3) for item in items}
+    raise ValueError(f"unknown distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+
+def simulate_tournament(size: int, voters: int, distribution: str = 'skewed', seed: Optional[int] = None,
+                        bracket_manager: Optional[BracketManager] = None) -> Dict:
+    """Play a whole tournament: every voter votes on every open matchup, then its winner is confirmed"""
+    rng = random.Random(seed)
+    names = [f"Participant {i}" for i in range(size)]
+    pick = make_picker(names, distribution, rng)
+    bracket_manager = bracket_manager or BracketManager()
+
+    start = time.perf_counter()
+    bracket_manager.create_bracket(names)
+    votes_cast = 0
+    while not bracket_manager.is_tournament_complete():
+        open_matchups = bracket_manager.get_current_matchups()
+        if not open_matchups:
+            raise RuntimeError("tournament stalled before a winner was found")
+        for matchup in open_matchups:
+            first, second = matchup['participants']
+            for _ in range(voters):
+                bracket_manager.vote(matchup['id'], pick(first, second))
+            votes_cast += voters
+
+            votes = bracket_manager.get_matchup_votes(matchup['id'])
+            if votes[first] == votes[second]:
+                winner = rng.choice([first, second])
+            else:
+                winner = first if votes[first] > votes[second] else second
+            bracket_manager.set_matchup_winner(matchup['id'], winner)
+
+    return {
+        'manager': bracket_manager,
+        'winner': bracket_manager.get_winner(),
+        'votes_cast': votes_cast,
+        'matchups': bracket_manager.get_total_matchups(),
+        'seconds': time.perf_counter() - start
+    }
+
+def simulate_smash_or_pass(size: int, voters: int, distribution: str = 'skewed', seed: Optional[int] = None,
+                           sop_manager: Optional[SmashOrPassManager] = None,
+                           columnar: Optional[bool] = None) -> Dict:
+    """Play a whole Smash or Pass game: every voter rates every item, stepping through them in order"""
+    rng = random.Random(seed)
+    items = [f"Item {i}" for i in range(size)]
+    chances = smash_probabilities(items, distribution, rng)
+    sop_manager = sop_manager or SmashOrPassManager()
+
+    start = time.perf_counter()
+    sop_manager.create_game(items, columnar=columnar)
+    votes_cast = 0
+    while True:
+        item = sop_manager.get_current_item()
+        for _ in range(voters):
+            if rng.random() < chances[item]:
+                sop_manager.vote_smash(item)
+            else:
+                sop_manager.vote_pass(item)
+        votes_cast += voters
+        if not sop_manager.next_item():
+            break
+
+    return {
+        'manager': sop_manager,
+        'top_item': sop_manager.get_results(limit=1)[0]['item'],
+        'votes_cast': votes_cast,
+        'seconds': time.perf_counter() - start
+    }
+
+def simulate_ranking(size: int, votes: Optional[int] = None, distribution: str = 'skewed',
+                     seed: Optional[int] = None, ranking_manager: Optional[RankingManager] = None) -> Dict:
+    """Rank a pool with adaptive pairs: vote until the target precision (or a fixed number of votes)"""
+    rng = random.Random(seed)
+    names = [f"Item {i}" for i in range(size)]
+    pick = make_picker(names, distribution, rng)
+    ranking_manager = ranking_manager or RankingManager(seed=rng.random())
+
+    start = time.perf_counter()
+    ranking_manager.create_ranking(names)
+    votes_cast = 0
+    while (votes_cast < votes) if votes is not None else not ranking_manager.is_ranking_complete():
+        first, second = ranking_manager.next_pair()
+        winner = pick(first, second)
+        ranking_manager.vote(winner, second if winner == first else first)
+        votes_cast += 1
+
+    return {
+        'manager': ranking_manager,
+        'top_item': ranking_manager.get_ranking(top_k=1)[0]['item'],
+        'votes_cast': votes_cast,
+        'seconds': time.perf_counter() - start
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Play simulated games headlessly")
+    parser.add_argument('game', choices=['bracket', 'smash-or-pass', 'ranking'])
+    parser.add_argument('--size', type=int, default=64, help="participants or items")
+    parser.add_argument('--voters', type=int, default=25)
+    parser.add_argument('--votes', type=int, help="ranking only: stop after this many votes, not at the target precision")
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='skewed')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.game == 'bracket':
+        result = simulate_tournament(args.size, args.voters, args.distribution, args.seed)
+        print(f"Winner: {result['winner']} after {result['matchups']} matchups")
+    elif args.game == 'smash-or-pass':
+        result = simulate_smash_or_pass(args.size, args.voters, args.distribution, args.seed)
+        print(f"Top item: {result['top_item']}")
+    else:
+        result = simulate_ranking(args.size, args.votes, args.distribution, args.seed)
+        print(f"Top item: {result['top_item']} ({result['manager'].get_vote_budget():,} votes expected)")
+    print(f"{result['votes_cast']:,} votes in {result['seconds']:.2f}s "
+          f"({result['votes_cast'] / result['seconds']:,.0f} votes/s)")
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,77 @@
-from typing import List, Dict, Optional
+import threading
+from typing import Callable, List, Dict, Optional, Tuple
+from shared_store import StripedLocks
+from vote_batches import tally_vote_batch
+from state_codec import MAX_DECODED_SIZE, SnapshotError, decode_snapshot, encode_snapshot
+from vote_tables import CHOICES, DictVoteTable
+from leaderboard import Leaderboard
+from vote_guard import DEFAULT_CAPACITY, VoteGuard
+from change_feed import next_version
+from metrics import instrumented
+
+# Rough memory per item (name, counts, leaderboard entry), measured with tracemalloc
+BYTES_PER_ITEM = 300
+# Games at least this big keep their counts in NumPy arrays unless told otherwise
+COLUMNAR_THRESHOLD = 10_000
 
 class SmashOrPassManager:
     def __init__(self):
         self.items = []
         self.current_index = 0
-        self.votes = {}  # item_name: {'smash': count, 'pass': count}
+        self._table = DictVoteTable([])
+        self._leaderboard = None  # built on first read, then kept in order on every vote
+        self._last_search = (None, None, [])  # (items list, query, matches) of the latest find_items()
         # Removed image functionality as requested
         self.game_created = False
         self.game_complete = False
+        # Votes lock their item's stripe; navigation takes the game lock, and create,
+        # reset and import (which replace the vote table) also hold every stripe
+        self._vote_locks = StripedLocks()
+        self._lock = threading.RLock()
+        self._voter_guard = None  # set by limit_votes_per_voter()
+        # Every change takes a fresh process-wide stamp, kept in the changing vote's stripe slot
+        # or, for changes holding the game lock, in _structure_version; then goes to the listener
+        self._structure_version = next_version()
+        self._stripe_versions = [0] * len(self._vote_locks)
+        self._on_change = None
+        self.journal = None
+        self.replica = None  # set by attach_replica()
     
-    def create_game(self, items: List[str], subject_topic: Optional[str] = None):
-        """Create a new Smash or Pass game"""
-        self.items = items.copy()
-        self.current_index = 0
-        self.votes = {}
-        # Removed image functionality
-        self.game_created = True
-        self.game_complete = False
-        
-        # Initialize votes for all items
-        for item in self.items:
-            self.votes[item] = {'smash': 0, 'pass': 0}
+    def create_game(self, items: List[str], subject_topic: Optional[str] = None,
+                    columnar: Optional[bool] = None):
+        """Create a new Smash or Pass game (columnar picks the array-backed vote table)"""
+        with self._lock, self._vote_locks.holding_all():
+            self.items = items.copy()
+            self.current_index = 0
+            # Removed image functionality
+            self.game_created = True
+            self.game_complete = False
+            
+            # Initialize votes for all items
+            if columnar is None:
+                columnar = len(self.items) >= COLUMNAR_THRESHOLD
+            self._table = self._new_table(self.items, columnar)
+            self._leaderboard = None
+            if self._voter_guard is not None:
+                self._voter_guard.clear()
+            self.replica = None  # a new game starts unreplicated
+            self._journal('create_game', self.items, None, columnar)
+    
+    @staticmethod
+    def _new_table(items: List[str], columnar: bool, counts: Optional[List[List[int]]] = None):
+        if columnar:
+            from columnar_votes import ArrayVoteTable
+            return ArrayVoteTable(items, counts)
+        return DictVoteTable(items, counts)
+    
+    @property
+    def votes(self) -> Dict[str, Dict[str, int]]:
+        """All counts as {item: {'smash': n, 'pass': n}} (built on demand for array-backed games)"""
+        return self._table.as_dict()
+    
+    def is_columnar(self) -> bool:
+        """Check whether this game keeps its counts in NumPy arrays"""
+        return not isinstance(self._table, DictVoteTable)
     
     def get_current_item(self) -> Optional[str]:
         """Get the current item being voted on"""
@@ -28,45 +79,204 @@ class SmashOrPassManager:
             return None
         return self.items[self.current_index]
     
-    def vote_smash(self, item: str):
-        """Add a smash vote for the current item"""
-        if item in self.votes:
-            self.votes[item]['smash'] += 1
+    @instrumented('smash_or_pass.vote_smash', counts_votes='smash_or_pass')
+    def vote_smash(self, item: str, voter: Optional[str] = None) -> bool:
+        """Add a smash vote for the current item (returns whether it counted)"""
+        return self._change_vote(item, 'smash', 1, 'vote_smash', voter)
     
-    def vote_pass(self, item: str):
-        """Add a pass vote for the current item"""
-        if item in self.votes:
-            self.votes[item]['pass'] += 1
+    @instrumented('smash_or_pass.vote_pass', counts_votes='smash_or_pass')
+    def vote_pass(self, item: str, voter: Optional[str] = None) -> bool:
+        """Add a pass vote for the current item (returns whether it counted)"""
+        return self._change_vote(item, 'pass', 1, 'vote_pass', voter)
     
-    def remove_smash_vote(self, item: str):
+    @instrumented('smash_or_pass.remove_smash_vote')
+    def remove_smash_vote(self, item: str, voter: Optional[str] = None) -> bool:
         """Remove a smash vote for the current item"""
-        if item in self.votes and self.votes[item]['smash'] > 0:
-            self.votes[item]['smash'] -= 1
+        return self._change_vote(item, 'smash', -1, 'remove_smash_vote', voter)
     
-    def remove_pass_vote(self, item: str):
+    @instrumented('smash_or_pass.remove_pass_vote')
+    def remove_pass_vote(self, item: str, voter: Optional[str] = None) -> bool:
         """Remove a pass vote for the current item"""
-        if item in self.votes and self.votes[item]['pass'] > 0:
-            self.votes[item]['pass'] -= 1
+        return self._change_vote(item, 'pass', -1, 'remove_pass_vote', voter)
+    
+    def _change_vote(self, item: str, choice: str, delta: int, op: str, voter: Optional[str]) -> bool:
+        """Apply a +1/-1 vote change, never letting a count drop below zero
+
+        In a game limited to one vote per voter, a voter's vote is final: a second vote on
+        the same item and any removal by a voter are refused. Calls without a voter (the host)
+        are never limited.
+        """
+        table = self._table
+        if item not in table:
+            return False
+        
+        stripe = self._vote_locks.stripe_for(item)
+        with self._vote_locks[stripe]:
+            if self._table is not table:
+                return False
+            guard = self._voter_guard
+            if guard is not None and voter is not None:
+                if delta < 0 or not guard.claim(voter, item):
+                    return False
+            if not table.change(item, choice, delta):
+                return False
+            self._update_leaderboard(item)
+            if self.replica is not None:
+                self.replica.record_votes((item, choice), delta)
+            # Journaled inside the stripe so a snapshot holding every stripe sees vote and event together
+            if guard is None or voter is None:
+                self._journal(op, item, stripe=stripe)
+            else:
+                self._journal(op, item, voter, stripe=stripe)
+        return True
+    
+    def limit_votes_per_voter(self, capacity: int = DEFAULT_CAPACITY, false_positive_rate: Optional[float] = None,
+                              salt: Optional[str] = None):
+        """Allow each voter one vote per item from now on (see VoteGuard for the two modes)
+
+        capacity is the number of (voter, item) votes a probabilistic guard is sized for.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            self._voter_guard = VoteGuard(capacity, false_positive_rate, salt)
+            self._journal('limit_votes_per_voter', capacity, false_positive_rate, self._voter_guard.salt)
+    
+    def get_voter_guard(self) -> Optional[VoteGuard]:
+        """Get the one-vote-per-voter guard, if this game has one"""
+        return self._voter_guard
+    
+    @instrumented('smash_or_pass.apply_votes')
+    def apply_votes(self, batch) -> Dict:
+        """Apply many (item, 'smash' or 'pass', delta) records at once
+
+        The whole batch is validated first, then each item's net change is applied in a
+        single pass (counts never drop below zero), all under the game lock and every
+        stripe so the items can't change in between. Accepts any iterable of 3-tuples or a
+        pandas DataFrame. Returns {'applied': accepted row count, 'rejected': [...]}.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            net, rejected, accepted = tally_vote_batch(batch, self._check_vote_target)
+            if net:
+                replica = self.replica
+                for (item, choice), delta in net.items():
+                    before = self._table.get(item)[choice]
+                    self._table.apply_net(item, choice, delta)
+                    self._update_leaderboard(item)
+                    if replica is not None:
+                        # Only what actually changed, since counts stop at zero
+                        replica.record_votes((item, choice), self._table.get(item)[choice] - before)
+                self._journal('apply_votes', [[item, choice, delta] for (item, choice), delta in net.items()])
+        return {'applied': accepted, 'rejected': rejected}
+    
+    def _check_vote_target(self, item, choice) -> Optional[str]:
+        """Get why a vote on item would be rejected, or None"""
+        if item not in self._table:
+            return "unknown item"
+        if choice not in CHOICES:
+            return "choice must be 'smash' or 'pass'"
+        return None
+    
+    def _update_leaderboard(self, item: str):
+        leaderboard = self._leaderboard
+        if leaderboard is not None:
+            item_votes = self._table.get(item)
+            leaderboard.update(item, item_votes['smash'], item_votes['pass'])
+    
+    def _get_leaderboard(self) -> Leaderboard:
+        """Get the live leaderboard, building it from the current counts on first use"""
+        if self._leaderboard is None:
+            with self._lock, self._vote_locks.holding_all():
+                if self._leaderboard is None:
+                    self._leaderboard = Leaderboard(list(dict.fromkeys(self.items)), self._table.export())
+        return self._leaderboard
+    
+    def get_item_results(self, items: List[str]) -> List[Dict]:
+        """Get get_results()-style rows for the given items, in the order given"""
+        rows = []
+        for item in items:
+            votes = self.get_item_votes(item)
+            total_votes = votes['smash'] + votes['pass']
+            rows.append({
+                'item': item,
+                'smash_votes': votes['smash'],
+                'pass_votes': votes['pass'],
+                'total_votes': total_votes,
+                'smash_percentage': (votes['smash'] / total_votes * 100) if total_votes > 0 else 0
+            })
+        return rows
+    
+    @instrumented('smash_or_pass.top_k')
+    def top_k(self, k: int) -> List[Dict]:
+        """Get the k best items so far, in get_results() order, without re-sorting"""
+        return self.get_item_results(self._get_leaderboard().top_k(k))
+    
+    @instrumented('smash_or_pass.page')
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """Get one page of the live ranking (0-based offset)"""
+        return self.get_item_results(self._get_leaderboard().page(offset, limit))
+    
+    def rank_of(self, item: str) -> Optional[int]:
+        """Get an item's current 1-based rank"""
+        return self._get_leaderboard().rank_of(item)
+    
+    def find_items(self, query: str) -> List[str]:
+        """Get the items whose names contain query (ignoring case), in game order
+
+        The latest search is kept until the items change, so redrawing or paging through
+        it doesn't scan the items again.
+        """
+        query = query.lower()
+        items, last_query, matches = self._last_search
+        if items is self.items and last_query == query:
+            return matches
+        items = self.items
+        matches = list(dict.fromkeys(item for item in items if query in item.lower()))
+        self._last_search = (items, query, matches)
+        return matches
+    
+    @instrumented('smash_or_pass.rank_items')
+    def rank_items(self, items: List[str], offset: int, limit: int) -> List[Tuple[int, Dict]]:
+        """Get one page (0-based offset) of the given items in ranking order, as (rank, result row) pairs"""
+        leaderboard = self._get_leaderboard()
+        page = leaderboard.in_rank_order(items)[offset:offset + limit]
+        return [(leaderboard.rank_of(row['item']), row) for row in self.get_item_results(page)]
     
     def get_item_votes(self, item: str) -> Dict[str, int]:
         """Get vote counts for a specific item"""
-        return self.votes.get(item, {'smash': 0, 'pass': 0})
+        item_votes = self._table.get(item)
+        if item_votes is None:
+            return {'smash': 0, 'pass': 0}
+        return item_votes
     
     def next_item(self) -> bool:
         """Move to the next item"""
-        if self.current_index < len(self.items) - 1:
-            self.current_index += 1
-            return True
-        else:
-            self.game_complete = True
-            return False
+        with self._lock:
+            if self.current_index < len(self.items) - 1:
+                self.current_index += 1
+                self._journal('next_item')
+                return True
+            else:
+                self.finish_game()
+                return False
     
     def previous_item(self) -> bool:
         """Move to the previous item"""
-        if self.current_index > 0:
-            self.current_index -= 1
-            return True
-        return False
+        with self._lock:
+            if self.current_index > 0:
+                self.current_index -= 1
+                self._journal('previous_item')
+                return True
+            return False
+    
+    def finish_game(self):
+        """End the game and move on to results"""
+        with self._lock:
+            if not self.game_complete:
+                self.game_complete = True
+                self._journal('finish_game')
+    
+    def get_item_count(self) -> int:
+        """Get the number of distinct items being rated"""
+        return len(self._table)
     
     def get_progress(self) -> tuple:
         """Get current progress (current_index + 1, total_items)"""
@@ -76,41 +286,153 @@ class SmashOrPassManager:
         """Check if the game is complete"""
         return self.game_complete
     
-    def get_results(self) -> List[Dict]:
-        """Get final results sorted by smash percentage"""
-        results = []
-        for item, votes in self.votes.items():
-            total_votes = votes['smash'] + votes['pass']
-            smash_percentage = (votes['smash'] / total_votes * 100) if total_votes > 0 else 0
-            
-            results.append({
-                'item': item,
-                'smash_votes': votes['smash'],
-                'pass_votes': votes['pass'],
-                'total_votes': total_votes,
-                'smash_percentage': smash_percentage
-            })
-        
-        # Sort by smash percentage (highest first)
-        results.sort(key=lambda x: x['smash_percentage'], reverse=True)
-        return results
+    @instrumented('smash_or_pass.get_results')
+    def get_results(self, limit: Optional[int] = None) -> List[Dict]:
+        """Get final results sorted by smash percentage (optionally only the first few)"""
+        return self._table.results(limit)
     
+    @instrumented('smash_or_pass.get_total_votes')
     def get_total_votes(self) -> int:
         """Get total number of votes cast"""
-        total = 0
-        for votes in self.votes.values():
-            total += votes['smash'] + votes['pass']
-        return total
+        return self._table.total_votes()
+    
+    def estimated_size(self) -> int:
+        """Get a rough memory footprint in bytes (for SharedGameStore's memory budget)"""
+        guard_size = self._voter_guard.estimated_size() if self._voter_guard is not None else 0
+        return BYTES_PER_ITEM * len(self.items) + guard_size
     
     def reset_game(self):
         """Reset the entire game"""
-        self.items = []
-        self.current_index = 0
-        self.votes = {}
-        # Images removed
-        self.game_created = False
-        self.game_complete = False
+        with self._lock, self._vote_locks.holding_all():
+            self.items = []
+            self.current_index = 0
+            self._table = DictVoteTable([])
+            self._leaderboard = None
+            if self._voter_guard is not None:
+                self._voter_guard.clear()
+            self.replica = None
+            # Images removed
+            self.game_created = False
+            self.game_complete = False
+            self._journal('reset_game')
     
     def get_item_image(self, item: str) -> Optional[str]:
         """Images removed - always returns None"""
-        return None
\ No newline at end of file
+        return None
+    
+    def attach_journal(self, journal):
+        """Record every mutation from now on in a VoteJournal"""
+        self.journal = journal
+        journal.attach(self._snapshot_for_journal)
+    
+    def set_change_listener(self, listener: Optional[Callable[[int], None]]):
+        """Call listener(version) after every change (e.g. ChangeHub.publish for this game)"""
+        self._on_change = listener
+    
+    @property
+    def version(self) -> int:
+        """Get the version of the last change to this game (only ever grows)"""
+        return max(self._structure_version, max(self._stripe_versions))
+    
+    def attach_replica(self, replica):
+        """Keep this game's votes in step with other processes through a VoteReplica
+
+        Every replica must create the game with the same items; only votes are exchanged.
+        Merged votes are not journaled (the other replicas' files already hold them), and a
+        new game, reset or import detaches the replica.
+        """
+        with self._lock, self._vote_locks.holding_all():
+            self.replica = replica
+            current = {}
+            for item, (smash, pass_) in zip(dict.fromkeys(self.items), self._table.export()):
+                current[(item, 'smash')] = smash
+                current[(item, 'pass')] = pass_
+            replica.bind(self, current)
+    
+    def _merge_replicated_votes(self, keys) -> List:
+        """Bring each (item, choice) count to its merged total across replicas; returns the keys left pending"""
+        with self._lock, self._vote_locks.holding_all():
+            replica = self.replica
+            if replica is None:
+                return []
+            for item, choice in keys:
+                if item not in self._table or choice not in CHOICES:
+                    continue
+                current = self._table.get(item)[choice]
+                # Removals made on two replicas at once can briefly take the sum below zero
+                target = max(0, replica.vote_total((item, choice)))
+                if target != current:
+                    self._table.apply_net(item, choice, target - current)
+                    self._update_leaderboard(item)
+            self._changed()
+        return []
+    
+    def _journal(self, op: str, *args, stripe: Optional[int] = None) -> int:
+        """Record a change: append it to the journal, then stamp a version (see _changed())"""
+        if self.journal is not None:
+            self.journal.append(op, args)
+        return self._changed(stripe)
+    
+    def _changed(self, stripe: Optional[int] = None) -> int:
+        """Stamp a new version for a change and tell the listener
+
+        Votes pass the stripe they hold; every other change holds the game lock.
+        """
+        version = next_version()
+        if stripe is None:
+            self._structure_version = version
+        else:
+            self._stripe_versions[stripe] = version
+        if self._on_change is not None:
+            self._on_change(version)
+        return version
+    
+    def _snapshot_for_journal(self) -> Tuple[int, Dict]:
+        """Capture state and the journal position it covers, with every writer held off"""
+        with self._lock, self._vote_locks.holding_all():
+            state = self.export_state()
+            # Only journal snapshots carry who has voted; save files and links keep just the votes
+            state['voter_guard'] = self._voter_guard.export() if self._voter_guard is not None else None
+            return self.journal.mark(), state
+    
+    def export_state(self) -> Dict:
+        """Get the game state as plain JSON-compatible data"""
+        return {
+            'items': self.items,
+            'current_index': self.current_index,
+            'game_created': self.game_created,
+            'game_complete': self.game_complete,
+            'columnar': self.is_columnar(),
+            'votes': self._table.export()
+        }
+    
+    def export_snapshot(self) -> bytes:
+        """Get the whole game as a compact binary snapshot (see state_codec)"""
+        with self._lock, self._vote_locks.holding_all():
+            return encode_snapshot('smash_or_pass', self.export_state())
+    
+    def import_snapshot(self, data: bytes, max_size: int = MAX_DECODED_SIZE):
+        """Replace this game with one saved by export_snapshot() (refused if it inflates past max_size bytes)"""
+        kind, state = decode_snapshot(data, max_size)
+        if kind != 'smash_or_pass':
+            raise SnapshotError(f"expected a smash_or_pass snapshot, got {kind}")
+        with self._lock:
+            self.import_state(state)
+            self._journal('import_state', state)
+    
+    def import_state(self, state: Dict):
+        """Replace this game with exported state"""
+        with self._lock, self._vote_locks.holding_all():
+            self.items = list(state['items'])
+            self.current_index = state['current_index']
+            self.game_created = state['game_created']
+            self.game_complete = state['game_complete']
+            self._table = self._new_table(self.items, state.get('columnar', False), state['votes'])
+            self._leaderboard = None
+            self._structure_version = next_version()
+            self.replica = None
+            if 'voter_guard' in state:
+                guard = state['voter_guard']
+                self._voter_guard = VoteGuard.from_export(guard) if guard else None
+            elif self._voter_guard is not None:
+                self._voter_guard.clear()  # a save file keeps this game's limit, not its voters
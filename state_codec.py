@@ -0,0 +1,289 @@
+import base64
+import binascii
+import itertools
+import zlib
+from typing import Dict, Iterator, List, Tuple
+
+# Snapshot layout: one version byte, one kind byte, then a zlib-compressed body of unsigned
+# LEB128 varints followed by every distinct string once, which the numbers refer to by index
+FORMAT_VERSION = 1
+KINDS = {'bracket': 1, 'smash_or_pass': 2}
+# Longest token worth offering as a link (browsers and proxies commonly cap URLs near 8 KB)
+MAX_LINK_LENGTH = 6000
+# Refuse to inflate an uploaded save file past this many bytes
+MAX_DECODED_SIZE = 64 * 1024 * 1024
+# Link tokens are at most MAX_LINK_LENGTH characters, so a real one never inflates past this
+MAX_LINK_DECODED_SIZE = 1024 * 1024
+
+class SnapshotError(ValueError):
+    """A snapshot that is corrupt, truncated, or from an unknown format version"""
+
+def encode_snapshot(kind: str, state: Dict) -> bytes:
+    """Pack a manager's export_state() into a compact, versioned snapshot"""
+    writer = _Writer()
+    if kind == 'bracket':
+        _write_bracket(writer, state)
+    elif kind == 'smash_or_pass':
+        _write_smash_or_pass(writer, state)
+    else:
+        raise ValueError(f"unknown snapshot kind {kind!r}")
+    return bytes((FORMAT_VERSION, KINDS[kind])) + zlib.compress(writer.getvalue())
+
+def decode_snapshot(data: bytes, max_size: int = MAX_DECODED_SIZE) -> Tuple[str, Dict]:
+    """Unpack a snapshot into (kind, state) ready for the matching manager's import_state()
+
+    A snapshot that would inflate past max_size bytes is refused before it is read.
+    """
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        raise SnapshotError("not a snapshot, or from an unsupported format version")
+    kind = next((name for name, code in KINDS.items() if code == data[1]), None)
+    if kind is None:
+        raise SnapshotError(f"unknown snapshot kind {data[1]}")
+
+    inflater = zlib.decompressobj()
+    try:
+        payload = inflater.decompress(data[2:], max_size)
+    except zlib.error as error:
+        raise SnapshotError(f"corrupt snapshot: {error}") from None
+    if inflater.unconsumed_tail:
+        raise SnapshotError("snapshot is too large")
+
+    if not inflater.eof:
+        raise SnapshotError("snapshot is truncated")
+
+    try:
+        reader = _Reader(payload)
+        state = _read_bracket(reader) if kind == 'bracket' else _read_smash_or_pass(reader)
+        reader.check_done()
+    except (IndexError, StopIteration, UnicodeDecodeError) as error:
+        raise SnapshotError(f"corrupt snapshot: {error or 'truncated'}") from None
+    if reader.position != len(payload):
+        raise SnapshotError("corrupt snapshot: trailing data")
+    return kind, state
+
+def snapshot_to_token(data: bytes) -> str:
+    """Get URL-safe text for a snapshot (base64url without padding)"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def token_to_snapshot(token: str) -> bytes:
+    """Get the snapshot back from snapshot_to_token() text (decode it with max_size=MAX_LINK_DECODED_SIZE)"""
+    if len(token) > MAX_LINK_LENGTH:
+        raise SnapshotError("snapshot link is too long")
+    try:
+        return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        raise SnapshotError("not a snapshot link") from None
+
+def _write_bracket(writer: '_Writer', state: Dict):
+    writer.string(state['tournament_name'])
+    writer.string_list(state['participants'])
+    writer.uint(int(bool(state['bracket_created'])))
+    writer.string_list([participant for matchup in (state['rounds'] or [[]])[0] for participant in matchup['participants']])
+
+    # Every later seat follows from the seeding and the results, so a matchup with both
+    # sides filled is just (0 or winning side + 1, votes per side); byes and empty slots are implied
+    for round_matchups in state['rounds']:
+        for matchup in round_matchups:
+            participants = matchup['participants']
+            if len(participants) < 2:
+                continue
+            writer.uint(participants.index(matchup['winner']) + 1 if matchup['completed'] else 0)
+            for participant in participants:
+                writer.uint(matchup['votes'].get(participant, 0))
+
+def _read_bracket(reader: '_Reader') -> Dict:
+    tournament_name = reader.string()
+    participants = reader.string_list()
+    bracket_created = bool(reader.uint())
+    seeding = reader.string_list()
+    state = {
+        'tournament_name': tournament_name,
+        'participants': participants,
+        'bracket_created': bracket_created,
+        'current_round': 1,
+        'total_rounds': 0,
+        'rounds': []
+    }
+    if not seeding:
+        return state
+
+    # The same layout as BracketManager: node 1 is the final, node i is fed by nodes
+    # 2i and 2i+1, and the first seeds take the byes
+    total_rounds = max(1, (len(seeding) - 1).bit_length())
+    size = 1 << total_rounds
+    seats = [[] for _ in range(size)]
+    byes = size - len(seeding)
+    entrants = iter(seeding)
+    for position, node in enumerate(range(size // 2, size)):
+        seats[node].append(next(entrants))
+        if position >= byes:
+            seats[node].append(next(entrants))
+
+    uint = reader.uint
+    current_round = None
+    for round_num in range(1, total_rounds + 1):
+        first = size >> round_num
+        round_matchups = []
+        for position in range(first):
+            node = first + position
+            seated = seats[node]
+            winner = None
+            votes = {}
+            if len(seated) == 2:
+                winner_side = uint()
+                votes = {seated[0]: uint(), seated[1]: uint()}
+                if winner_side:
+                    winner = seated[winner_side - 1]
+            elif seated and round_num == 1:
+                winner = seated[0]  # a bye
+            
+            if winner is None:
+                current_round = current_round or round_num
+            elif node > 1:
+                parent_seats = seats[node // 2]
+                parent_seats.insert(len(parent_seats) if node & 1 else 0, winner)
+            round_matchups.append({'id': f"r{round_num}_m{position}", 'participants': seated,
+                                   'winner': winner, 'completed': winner is not None, 'votes': votes})
+        state['rounds'].append(round_matchups)
+
+    state['current_round'] = current_round or total_rounds
+    state['total_rounds'] = total_rounds
+    return state
+
+def _write_smash_or_pass(writer: '_Writer', state: Dict):
+    distinct = list(dict.fromkeys(state['items']))
+    # Item order only needs spelling out when the list repeats an item
+    repeats = len(distinct) != len(state['items'])
+    # The distinct items are the first strings in the table, so they need no references
+    writer.uint(len(distinct))
+    for item in distinct:
+        writer.intern(item)
+    writer.uint(int(repeats))
+    if repeats:
+        writer.uint(len(state['items']))
+        for item in state['items']:
+            writer.string(item)
+    writer.uint(state['current_index'])
+    writer.uint(int(state['game_created']) | int(state['game_complete']) << 1 | int(state['columnar']) << 2)
+    for smash, pass_ in state['votes']:
+        writer.uint(smash)
+        writer.uint(pass_)
+
+def _read_smash_or_pass(reader: '_Reader') -> Dict:
+    distinct = reader.strings[:reader.uint()]
+    items = [reader.string() for _ in range(reader.uint())] if reader.uint() else distinct
+    current_index = reader.uint()
+    flags = reader.uint()
+    return {
+        'items': items,
+        'current_index': current_index,
+        'game_created': bool(flags & 1),
+        'game_complete': bool(flags & 2),
+        'columnar': bool(flags & 4),
+        'votes': [[reader.uint(), reader.uint()] for _ in distinct]
+    }
+
+class _Writer:
+    """Collects varints and interns strings; the string table is written ahead of the numbers"""
+    def __init__(self):
+        self.values = []
+        self.strings = {}  # text: number, in first-use order
+        self.uint = self.values.append  # checked for negatives in getvalue()
+
+    def string(self, value: str):
+        self.values.append(self.intern(value))
+
+    def string_list(self, values: List[str]):
+        """Write a count, then a reference to each string"""
+        self.values.append(len(values))
+        self.values.extend(map(self.intern, values))
+
+    def intern(self, value: str) -> int:
+        """Number a string without writing a reference to it"""
+        number = self.strings.get(value)
+        if number is None:
+            number = self.strings[value] = len(self.strings)
+        return number
+
+    def getvalue(self) -> bytes:
+        # [varint section length][string count, string byte lengths, values][UTF-8 string bytes]
+        if self.values and min(self.values) < 0:
+            raise ValueError("snapshot counts must be non-negative")
+        encoded = [value.encode("utf-8") for value in self.strings]
+        numbers = _encode_varints([len(encoded), *map(len, encoded), *self.values])
+        return _encode_varints([len(numbers)]) + numbers + b"".join(encoded)
+
+class _Reader:
+    def __init__(self, data: bytes):
+        section_length, start = _read_varint(data, 0)
+        end = start + section_length
+        if end > len(data):
+            raise IndexError("snapshot is truncated")
+        self._values = _iter_varints(data[start:end])
+        self.uint = self._values.__next__
+        self.strings = []
+        for _ in range(self.uint()):
+            length = self.uint()
+            self.strings.append(data[end:end + length].decode("utf-8"))
+            end += length
+        self.position = end if end <= len(data) else -1
+
+    def string(self) -> str:
+        number = self.uint()
+        if number >= len(self.strings):
+            raise IndexError("string number out of range")
+        return self.strings[number]
+
+    def string_list(self) -> List[str]:
+        """Read a count, then that many string references"""
+        count = self.uint()
+        numbers = list(itertools.islice(self._values, count))
+        if len(numbers) != count:
+            raise IndexError("snapshot is truncated")
+        if numbers and max(numbers) >= len(self.strings):
+            raise IndexError("string number out of range")
+        return [self.strings[number] for number in numbers]
+
+    def check_done(self):
+        if next(self._values, None) is not None:
+            raise IndexError("unread numbers at the end")
+
+def _encode_varints(values) -> bytes:
+    """Unsigned LEB128, with a fast path for the common case of every value below 128"""
+    if not values or max(values) < 0x80:
+        return bytes(values)
+    out = bytearray()
+    for value in map(int, values):
+        while value > 0x7F:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+def _iter_varints(data: bytes) -> Iterator[int]:
+    """Decode numbers as they are read, so a corrupt snapshot fails before it is all unpacked"""
+    if not data or max(data) < 0x80:
+        return iter(data)
+    return _iter_long_varints(data)
+
+def _iter_long_varints(data: bytes) -> Iterator[int]:
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            yield value
+            value = shift = 0
+        else:
+            shift += 7
+    if shift:
+        raise IndexError("snapshot ends inside a number")
+
+def _read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
@@ -0,0 +1,112 @@
+"""BracketManager's running statistics and standings against a rescan of the whole bracket, live and restored"""
+import random
+
+import pytest
+
+from bracket_logic import BracketManager
+
+SEEDS = range(40)
+STEPS = 300
+
+def rescan_stats(manager: BracketManager) -> dict:
+    """Recompute every statistic from iter_matchups(), the way the stats panels used to"""
+    matchups = list(manager.iter_matchups())
+    most_voted, most_voted_total = None, 0
+    for matchup in matchups:  # round by round, then by position: the earliest wins ties
+        total = sum(matchup['votes'].values())
+        if total > most_voted_total:
+            most_voted, most_voted_total = matchup, total
+    current_round = manager.get_current_round()
+    return {
+        'total_votes': sum(sum(matchup['votes'].values()) for matchup in matchups),
+        'total_matchups': len(matchups),
+        'completed_matchups': sum(matchup['completed'] for matchup in matchups),
+        'most_voted': (f"{' vs '.join(most_voted['participants'])} ({most_voted_total} votes)"
+                       if most_voted is not None else None),
+        'current_round_complete': all(matchup['completed'] for matchup in matchups
+                                      if matchup['round'] == current_round)
+    }
+
+def running_stats(manager: BracketManager) -> dict:
+    return {
+        'total_votes': manager.get_total_votes(),
+        'total_matchups': manager.get_total_matchups(),
+        'completed_matchups': manager.get_completed_matchups(),
+        'most_voted': manager.get_most_voted_matchup(),
+        'current_round_complete': manager.all_current_matchups_complete()
+    }
+
+def rescan_standings(manager: BracketManager) -> dict:
+    """Recompute every participant's record from iter_matchups()"""
+    standings = {name: {'name': name, 'wins': 0, 'losses': 0, 'total_votes': 0,
+                        'round_eliminated': None, 'eliminated_by': None}
+                 for name in manager.participants}
+    for matchup in manager.iter_matchups():
+        for name, votes in matchup['votes'].items():
+            standings[name]['total_votes'] += votes
+        if not matchup['completed']:
+            continue
+        for name in matchup['participants']:
+            if name == matchup['winner']:
+                standings[name]['wins'] += 1
+            else:
+                standings[name]['losses'] += 1
+                standings[name]['round_eliminated'] = matchup['round']
+                standings[name]['eliminated_by'] = matchup['winner']
+    return standings
+
+def check(manager: BracketManager, rng: random.Random):
+    assert running_stats(manager) == rescan_stats(manager)
+
+    expected = rescan_standings(manager)
+    ranking = manager.get_standings()
+    assert {standing['name']: standing for standing in ranking} == expected
+    keys = [(standing['wins'], standing['total_votes']) for standing in ranking]
+    assert keys == sorted(keys, reverse=True)
+    top_k = rng.randint(1, len(ranking))
+    assert manager.get_standings(top_k=top_k) == ranking[:top_k]
+    for name in rng.sample(list(expected), min(3, len(expected))):
+        assert manager.get_participant_standing(name) == expected[name]
+
+def check_restored(manager: BracketManager, rng: random.Random):
+    """A bracket rebuilt from a snapshot has the same matchups, statistics and standings"""
+    restored = BracketManager()
+    restored.import_snapshot(manager.export_snapshot())
+    assert restored.export_state() == manager.export_state()
+    check(restored, rng)
+    assert running_stats(restored) == running_stats(manager)
+    assert restored.get_standings() == manager.get_standings()
+
+def new_bracket(manager: BracketManager, rng: random.Random):
+    names = [f"Participant {i}" for i in range(rng.randint(2, 40))]
+    seeding = names.copy()
+    rng.shuffle(seeding)
+    manager.create_bracket(names, seeding)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_running_stats_match_rescan(seed):
+    rng = random.Random(seed)
+    manager = BracketManager()
+    new_bracket(manager, rng)
+    check(manager, rng)
+
+    for _ in range(STEPS):
+        matchups = [matchup for matchup in manager.iter_matchups() if None not in matchup['seats']]
+        action = rng.random()
+        if action < 0.6 and matchups:
+            matchup = rng.choice(matchups)
+            assert manager.vote(matchup['id'], rng.choice(matchup['participants']))
+        elif action < 0.65:
+            # Unknown matchups and participants never count
+            assert not manager.vote(f"r{rng.randint(1, 9)}_m{rng.randint(0, 300)}", "Nobody")
+        elif action < 0.9 and matchups:
+            # Sets winners and, on decided matchups, changes them where the next matchup allows it
+            matchup = rng.choice(matchups)
+            manager.set_matchup_winner(matchup['id'], rng.choice(matchup['participants']))
+        elif action < 0.95:
+            manager.reset_bracket()
+            assert running_stats(manager) == rescan_stats(manager)
+            new_bracket(manager, rng)
+        check(manager, rng)
+        if rng.random() < 0.1:
+            check_restored(manager, rng)
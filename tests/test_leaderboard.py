@@ -0,0 +1,67 @@
+"""The live leaderboard against a fresh get_results() sort on randomised games"""
+import random
+
+import pytest
+
+from leaderboard import Leaderboard
+from smash_or_pass_logic import SmashOrPassManager
+
+SEEDS = range(30)
+STEPS = 400
+
+@pytest.fixture(autouse=True)
+def tiny_buckets(monkeypatch):
+    """Buckets of a few keys, so small games still split and empty them"""
+    monkeypatch.setattr(Leaderboard, 'LOAD', 2)
+
+def assert_matches_results(manager: SmashOrPassManager, rng: random.Random):
+    results = manager.get_results()
+    assert manager.top_k(len(results) + 1) == results
+    k = rng.randint(0, len(results) + 1)
+    assert manager.top_k(k) == results[:k]
+    offset, limit = rng.randint(-1, len(results) + 1), rng.randint(0, 10)
+    assert manager.page(offset, limit) == (results[offset:offset + limit] if offset >= 0 else [])
+    for rank, row in enumerate(results, 1):
+        assert manager.rank_of(row['item']) == rank
+    assert manager.rank_of("Not an item") is None
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("columnar", [False, True])
+def test_leaderboard_matches_results(seed, columnar):
+    rng = random.Random(seed)
+    manager = SmashOrPassManager()
+    items = [f"Item {i}" for i in range(rng.randint(1, 60))]
+    manager.create_game(items, columnar=columnar)
+    for step in range(STEPS):
+        action = rng.random()
+        item = rng.choice(items)
+        if action < 0.75:
+            getattr(manager, rng.choice(['vote_smash', 'vote_pass', 'remove_smash_vote', 'remove_pass_vote']))(item)
+        elif action < 0.95:
+            manager.apply_votes([(rng.choice(items), rng.choice(['smash', 'pass']), rng.randint(-3, 5))
+                                 for _ in range(rng.randint(1, 10))])
+        else:
+            # A new game drops the leaderboard; the next read rebuilds it from the new counts
+            items = [f"Item {i}" for i in range(rng.randint(1, 60))]
+            manager.create_game(items, columnar=columnar)
+        if step % 3 == 0:  # let several changes pile up between some reads
+            assert_matches_results(manager, rng)
+    assert_matches_results(manager, rng)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_search_pages_match_filtered_results(seed):
+    rng = random.Random(seed)
+    manager = SmashOrPassManager()
+    items = [f"Item {rng.choice('AaBb')}{i}" for i in range(rng.randint(1, 80))]
+    manager.create_game(items + items[:5])  # repeated names are one item
+    for _ in range(300):
+        getattr(manager, rng.choice(['vote_smash', 'vote_pass']))(rng.choice(items))
+
+    query = rng.choice(['a', 'B', 'item', '1', 'zzz'])
+    expected = [(rank, row) for rank, row in enumerate(manager.get_results(), 1) if query.lower() in row['item'].lower()]
+    matches = manager.find_items(query)
+    assert sorted(matches) == sorted(row['item'] for _, row in expected)
+    assert manager.find_items(query) is matches
+    page_size = rng.randint(1, 10)
+    for offset in range(0, len(matches) + page_size, page_size):
+        assert manager.rank_items(matches, offset, page_size) == expected[offset:offset + page_size]
@@ -0,0 +1,221 @@
+"""Replicas converge whatever order their deltas arrive in, however often they are repeated"""
+import json
+import multiprocessing
+import random
+
+import pytest
+
+from bracket_logic import BracketManager
+from replicated_votes import FileTransport, LWWRegisterMap, PNCounterMap, VoteReplica
+from smash_or_pass_logic import SmashOrPassManager
+
+SEEDS = range(20)
+REPLICAS = 4
+
+class ShuffledNetwork:
+    """Every message sent, delivered to each replica late, out of order and more than once"""
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.messages = []  # (sender, JSON line), as FileTransport would write them
+        self.deliver_everything = False
+
+class ShuffledTransport:
+    """A FileTransport stand-in that hands receive() a random, reordered, repeating slice of the traffic"""
+    def __init__(self, network: ShuffledNetwork, replica_id: str):
+        self.network = network
+        self.replica_id = replica_id
+        self._delivered = set()
+
+    def has_published(self) -> bool:
+        return any(sender == self.replica_id for sender, _ in self.network.messages)
+
+    def send(self, message: dict):
+        self.network.messages.append((self.replica_id, json.dumps(message)))
+
+    def receive(self) -> list:
+        rng = self.network.rng
+        others = [index for index, (sender, _) in enumerate(self.network.messages) if sender != self.replica_id]
+        waiting = [index for index in others if index not in self._delivered]
+        if not self.network.deliver_everything:
+            waiting = rng.sample(waiting, rng.randint(0, len(waiting)))
+        repeats = rng.sample(sorted(self._delivered), min(len(self._delivered), rng.randint(0, 3)))
+        self._delivered.update(waiting)
+        batch = waiting + repeats
+        rng.shuffle(batch)
+        return [json.loads(self.network.messages[index][1]) for index in batch]
+
+def replicate(managers, network: ShuffledNetwork, tmp_path):
+    replicas = []
+    for index, manager in enumerate(managers):
+        replica = VoteReplica(str(tmp_path), f"replica{index}")
+        replica.transport = ShuffledTransport(network, replica.replica_id)
+        manager.attach_replica(replica)
+        replicas.append(replica)
+    return replicas
+
+def settle(replicas, network: ShuffledNetwork):
+    """Deliver everything left; twice over, so results merged last can seat votes merged first"""
+    network.deliver_everything = True
+    for _ in range(2):
+        for replica in replicas:
+            replica.sync()
+    assert all(replica.stats()['pending'] == 0 for replica in replicas)
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_counters_and_registers_merge_in_any_order(seed):
+    rng = random.Random(seed)
+    counters = [PNCounterMap(f"r{index}") for index in range(REPLICAS)]
+    registers = [LWWRegisterMap(f"r{index}") for index in range(REPLICAS)]
+    deltas = []  # (replica, counter rows, register rows) in the order they were taken
+    expected = {}
+    for _ in range(300):
+        index = rng.randrange(REPLICAS)
+        key = (f"item{rng.randint(0, 9)}", rng.choice(['smash', 'pass']))
+        delta = rng.randint(-2, 3)
+        counters[index].add(key, delta)
+        expected[key] = expected.get(key, 0) + delta
+        registers[index].set(f"r1_m{rng.randint(0, 3)}", f"Player {rng.randint(0, 7)}")
+        if rng.random() < 0.3:
+            deltas.append((index, counters[index].take_delta(), registers[index].take_delta()))
+    for index in range(REPLICAS):
+        deltas.append((index, counters[index].take_delta(), registers[index].take_delta()))
+
+    for index in range(REPLICAS):
+        deliveries = [delta for delta in deltas if delta[0] != index]
+        deliveries += rng.choices(deliveries, k=len(deliveries) // 2)
+        rng.shuffle(deliveries)
+        for sender, counter_rows, register_rows in deliveries:
+            counters[index].merge(f"r{sender}", counter_rows)
+            registers[index].merge(f"r{sender}", register_rows)
+
+    for key, total in expected.items():
+        assert [counter.value(key) for counter in counters] == [total] * REPLICAS
+    for matchup in range(4):
+        assert len({register.get(f"r1_m{matchup}") for register in registers}) == 1
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_smash_or_pass_replicas_converge(seed, tmp_path):
+    rng = random.Random(seed)
+    network = ShuffledNetwork(rng)
+    items = [f"Item {i}" for i in range(rng.randint(1, 20))]
+    managers = [SmashOrPassManager() for _ in range(REPLICAS)]
+    for manager in managers:
+        manager.create_game(items, columnar=rng.random() < 0.5)
+    replicas = replicate(managers, network, tmp_path)
+
+    changes = {}  # (item, choice): net change counted somewhere
+    for _ in range(400):
+        index = rng.randrange(REPLICAS)
+        item, choice = rng.choice(items), rng.choice(['smash', 'pass'])
+        removal = rng.random() < 0.2
+        change = {('smash', False): 'vote_smash', ('pass', False): 'vote_pass',
+                  ('smash', True): 'remove_smash_vote', ('pass', True): 'remove_pass_vote'}[choice, removal]
+        if getattr(managers[index], change)(item):
+            changes[(item, choice)] = changes.get((item, choice), 0) + (-1 if removal else 1)
+        if rng.random() < 0.2:
+            replicas[index].sync()
+    settle(replicas, network)
+
+    states = [manager.export_state()['votes'] for manager in managers]
+    assert all(state == states[0] for state in states)
+    for item in items:
+        for choice in ('smash', 'pass'):
+            expected = max(0, changes.get((item, choice), 0))
+            assert [manager.get_item_votes(item)[choice] for manager in managers] == [expected] * REPLICAS
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_bracket_replicas_converge(seed, tmp_path):
+    rng = random.Random(seed)
+    network = ShuffledNetwork(rng)
+    participants = [f"Player {i}" for i in range(rng.randint(2, 16))]
+    managers = [BracketManager() for _ in range(REPLICAS)]
+    for manager in managers:
+        manager.create_bracket(participants, participants)
+    replicas = replicate(managers, network, tmp_path)
+
+    # Everyone votes on what they can see; replica 0 decides results as it goes
+    for _ in range(400):
+        index = rng.randrange(REPLICAS)
+        manager = managers[index]
+        matchups = manager.get_current_matchups()
+        if matchups:
+            matchup = rng.choice(matchups)
+            if index == 0 and rng.random() < 0.15:
+                votes = manager.get_matchup_votes(matchup['id'])
+                manager.set_matchup_winner(matchup['id'], max(votes, key=votes.get))
+            else:
+                manager.vote(matchup['id'], rng.choice(matchup['participants']))
+        if rng.random() < 0.2:
+            replicas[index].sync()
+    settle(replicas, network)
+
+    states = [manager.export_state() for manager in managers]
+    assert all(state == states[0] for state in states)
+    assert len({manager.get_winner() for manager in managers}) == 1
+
+def test_smash_or_pass_replica_starts_from_existing_votes_with_repeated_items(tmp_path):
+    manager = SmashOrPassManager()
+    manager.create_game(["Apple", "Pear", "Apple", "Plum"])
+    manager.vote_pass("Pear")
+    for _ in range(3):
+        manager.vote_smash("Plum")
+    replica = VoteReplica(str(tmp_path), "replica0")
+    manager.attach_replica(replica)
+    assert replica.vote_total(("Pear", 'pass')) == 1
+    assert replica.vote_total(("Plum", 'smash')) == 3
+    assert replica.vote_total(("Apple", 'smash')) == 0
+
+def conflicting_bracket_worker(seed: int, index: int, directory: str, participants, barrier, results):
+    """One process's replica: votes and decides (or changes) results at random, as every replica does"""
+    rng = random.Random(seed * REPLICAS + index)
+    manager = BracketManager()
+    manager.create_bracket(participants, participants)
+    replica = VoteReplica(directory, f"replica{index}")
+    assert isinstance(replica.transport, FileTransport)
+    manager.attach_replica(replica)
+    barrier.wait()
+
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.1:
+            decided = [matchup for matchup in manager.iter_matchups()
+                       if matchup['completed'] and None not in matchup['seats']]
+            if decided:
+                matchup = rng.choice(decided)
+                manager.set_matchup_winner(matchup['id'], rng.choice(matchup['participants']))
+        else:
+            matchups = manager.get_current_matchups()
+            if matchups:
+                matchup = rng.choice(matchups)
+                if action < 0.3:
+                    manager.set_matchup_winner(matchup['id'], rng.choice(matchup['participants']))
+                else:
+                    manager.vote(matchup['id'], rng.choice(matchup['participants']))
+        if rng.random() < 0.2:
+            replica.sync()
+
+    # Once everyone has published everything, one sync takes it all in; the second checks it holds
+    for _ in range(2):
+        barrier.wait()
+        replica.sync()
+    results.put((index, manager.export_state(), manager.get_standings(), manager.get_total_votes()))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_conflicting_winners_converge_across_processes(seed, tmp_path):
+    participants = [f"Player {i}" for i in range(random.Random(seed).randint(4, 16))]
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(REPLICAS)
+    results = context.Queue()
+    workers = [context.Process(target=conflicting_bracket_worker,
+                               args=(seed, index, str(tmp_path), participants, barrier, results))
+               for index in range(REPLICAS)]
+    for worker in workers:
+        worker.start()
+    finished = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+
+    states = {index: (state, standings, total_votes) for index, state, standings, total_votes in finished}
+    assert len(states) == REPLICAS
+    assert all(result == states[0] for result in states.values())
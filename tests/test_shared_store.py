@@ -0,0 +1,101 @@
+"""SharedGameStore loads and spills games outside its lock, and never loads a game twice"""
+import threading
+
+import pytest
+
+from shared_store import SharedGameStore
+
+class Game:
+    def estimated_size(self) -> int:
+        return 1
+
+def test_concurrent_lookups_load_a_game_once():
+    store = SharedGameStore()
+    release = threading.Event()
+    loads = []
+
+    def slow_load():
+        loads.append(threading.current_thread().name)
+        release.wait()
+        return Game()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_or_create("abc", slow_load)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # While one lookup is still loading, every other game stays available
+    assert store.get_or_create("other", Game) is store.get("other")
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert len(results) == 8 and all(game is results[0] for game in results)
+
+def test_spilling_does_not_hold_the_store_lock():
+    spilling = threading.Event()
+    release = threading.Event()
+    spilled = []
+    first = Game()
+
+    def slow_evict(game):
+        if game is first:
+            spilling.set()
+            release.wait()
+        spilled.append(game)
+
+    store = SharedGameStore(memory_budget=1, on_evict=slow_evict)
+    store.get_or_create("first", lambda: first)
+    thread = threading.Thread(target=store.get_or_create, args=("second", Game))
+    thread.start()
+    assert spilling.wait(5)
+    # "first" is mid-spill: other games can be looked up, a lookup of it waits for the spill
+    assert store.get_or_create("third", Game) is store.get("third")
+    revived = []
+    waiting = threading.Thread(target=lambda: revived.append(store.get_or_create("first", Game)))
+    waiting.start()
+    waiting.join(0.1)
+    assert waiting.is_alive()
+    release.set()
+    thread.join()
+    waiting.join()
+    # Still referenced here, so it comes back as the same object once spilled
+    assert first in spilled
+    assert revived == [first]
+    assert store.stats()['revivals'] == 1
+
+def test_a_game_that_fails_to_spill_stays_in_memory():
+    def failing_evict(game):
+        raise OSError("disk full")
+
+    store = SharedGameStore(memory_budget=1, on_evict=failing_evict)
+    first = store.get_or_create("first", Game)
+    # The lookup that triggered the spill still gets its game
+    second = store.get_or_create("second", Game)
+    assert store.get("second") is second
+    assert store.get("first") is first
+    assert store.stats()['evictions'] == 0
+
+def test_touched_games_do_not_go_idle():
+    now = [0.0]
+    store = SharedGameStore(idle_ttl=10, clock=lambda: now[0])
+    voted_on = store.get_or_create("voted_on", Game)
+    store.get_or_create("idle", Game)
+    for _ in range(3):
+        now[0] += 6
+        store.touch("voted_on")  # as every change to it does
+    store.sweep()
+    assert store.get("voted_on") is voted_on
+    assert "idle" not in store
+    assert store.stats()['expirations'] == 1
+
+def test_a_failed_load_can_be_retried():
+    store = SharedGameStore()
+
+    def broken():
+        raise ValueError("corrupt journal")
+
+    with pytest.raises(ValueError):
+        store.get_or_create("abc", broken)
+    game = store.get_or_create("abc", Game)
+    assert store.get("abc") is game
@@ -0,0 +1,31 @@
+"""Batched votes are validated and applied as one step, so every row reported applied is counted"""
+import threading
+
+from bracket_logic import BracketManager
+
+def test_a_result_changed_during_a_batch_waits_for_it():
+    manager = BracketManager()
+    manager.create_bracket(["Ann", "Bob", "Cat", "Dan"], ["Ann", "Bob", "Cat", "Dan"])
+    manager.set_matchup_winner("r1_m0", "Ann")
+    manager.set_matchup_winner("r1_m1", "Dan")
+    check = manager._check_vote_target
+    changes = []
+
+    def check_then_change_result(matchup_id, participant):
+        # Another session swaps Ann out of the final right after her row passes validation
+        reason = check(matchup_id, participant)
+        change = threading.Thread(target=manager.set_matchup_winner, args=("r1_m0", "Bob"))
+        change.start()
+        change.join(0.2)
+        changes.append(change)
+        return reason
+
+    manager._check_vote_target = check_then_change_result
+    report = manager.apply_votes([("r2_m0", "Ann", 3)])
+    changes[0].join()
+
+    assert report == {'applied': 1, 'rejected': []}
+    assert manager.get_total_votes() == 3
+    # The final has votes by the time the change runs, so Ann's result stands
+    assert manager.get_matchup("r1_m0")['winner'] == "Ann"
+    assert manager.get_matchup_votes("r2_m0") == {"Ann": 3, "Dan": 0}
@@ -0,0 +1,76 @@
+"""What a VoteJournal keeps on disk after snapshots, with and without keep_history, and how it replays"""
+import os
+import threading
+
+import pytest
+
+from bracket_logic import BracketManager
+from results_export import export_game
+from smash_or_pass_logic import SmashOrPassManager
+from vote_journal import KEEP_HISTORY, close_journaled, open_journaled
+
+def journaled_game(directory: str, **journal_options) -> SmashOrPassManager:
+    manager = open_journaled(directory, SmashOrPassManager, fsync=False, **journal_options)
+    manager.create_game(["Apple", "Pear"])
+    return manager
+
+def test_history_is_opt_in():
+    if os.environ.get("NERD_FIGHTS_KEEP_HISTORY") is None:
+        assert KEEP_HISTORY is False
+
+@pytest.mark.parametrize("keep_history", [False, True])
+def test_snapshots_drop_or_archive_superseded_segments(tmp_path, keep_history):
+    manager = journaled_game(str(tmp_path), keep_history=keep_history)
+    for _ in range(3):
+        for _ in range(5):
+            manager.vote_smash("Apple")
+        manager.journal.snapshot()
+    manager.vote_pass("Pear")
+
+    segments = [name for name in os.listdir(tmp_path) if name.startswith("segment-")]
+    assert len(segments) == 1
+    assert os.path.isdir(tmp_path / "history") == keep_history
+    ops = [op for _, op, _ in manager.journal.history()]
+    if keep_history:
+        assert ops == ["create_game"] + ["vote_smash"] * 15 + ["vote_pass"]
+    else:
+        assert ops == ["vote_pass"]
+    close_journaled(manager)
+
+    reloaded = open_journaled(str(tmp_path), SmashOrPassManager, fsync=False, keep_history=keep_history)
+    assert reloaded.votes == {"Apple": {"smash": 15, "pass": 0}, "Pear": {"smash": 0, "pass": 1}}
+    close_journaled(reloaded)
+
+@pytest.mark.parametrize("keep_history", [False, True])
+def test_history_export_says_how_far_back_it_goes(tmp_path, keep_history):
+    manager = journaled_game(str(tmp_path), keep_history=keep_history)
+    manager.vote_smash("Apple")
+    heading = next(export_game(manager, 'history', 'markdown')).splitlines()[0]
+    assert heading == ("## Vote History" if keep_history else "## Vote History (since the last snapshot)")
+    close_journaled(manager)
+
+def test_a_vote_racing_the_result_that_opened_its_matchup_replays(tmp_path):
+    manager = open_journaled(str(tmp_path), BracketManager, fsync=False)
+    manager.create_bracket(["Ann", "Bob", "Cat", "Dan"], ["Ann", "Bob", "Cat", "Dan"])
+    manager.set_matchup_winner("r1_m1", "Dan")
+    append = manager.journal.append
+
+    def append_after_a_racing_vote(op, args):
+        # Another session votes on the final just as Bob's result opens it, before the result is journaled
+        if op == 'set_matchup_winner':
+            voter = threading.Thread(target=manager.vote, args=("r2_m0", "Bob"))
+            voter.start()
+            voter.join(0.2)
+            racing.append(voter)
+        append(op, args)
+
+    racing = []
+    manager.journal.append = append_after_a_racing_vote
+    manager.set_matchup_winner("r1_m0", "Bob")
+    racing[0].join()
+    assert manager.get_matchup_votes("r2_m0") == {"Bob": 1, "Dan": 0}
+    manager.journal.close()
+
+    replayed = open_journaled(str(tmp_path), BracketManager, fsync=False)
+    assert replayed.export_state() == manager.export_state()
+    replayed.journal.close()
@@ -0,0 +1,50 @@
+"""The array-backed vote table against the dict one on the same randomised games"""
+import random
+
+import pytest
+
+from smash_or_pass_logic import SmashOrPassManager
+
+SEEDS = range(30)
+STEPS = 400
+
+def random_game(rng: random.Random):
+    """Create the same game twice, once per vote table; names repeat to cover duplicate items"""
+    items = [f"Item {rng.randint(0, 60)}" for _ in range(rng.randint(1, 80))]
+    managers = []
+    for columnar in (False, True):
+        manager = SmashOrPassManager()
+        manager.create_game(items, columnar=columnar)
+        managers.append(manager)
+    return items, managers
+
+def assert_same(dict_manager: SmashOrPassManager, array_manager: SmashOrPassManager, rng: random.Random):
+    assert not dict_manager.is_columnar() and array_manager.is_columnar()
+    assert array_manager.get_results() == dict_manager.get_results()
+    limit = rng.randint(0, 20)
+    assert array_manager.get_results(limit) == dict_manager.get_results(limit)
+    assert array_manager.get_total_votes() == dict_manager.get_total_votes()
+    assert array_manager.votes == dict_manager.votes
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_array_table_matches_dict_table(seed):
+    rng = random.Random(seed)
+    items, managers = random_game(rng)
+    for _ in range(STEPS):
+        action = rng.random()
+        item = rng.choice(items + ["Not an item"])
+        if action < 0.7:
+            op = rng.choice(['vote_smash', 'vote_pass', 'remove_smash_vote', 'remove_pass_vote'])
+            outcomes = {getattr(manager, op)(item) for manager in managers}
+            assert len(outcomes) == 1
+        elif action < 0.9:
+            batch = [(rng.choice(items), rng.choice(['smash', 'pass', 'maybe']), rng.randint(-3, 5))
+                     for _ in range(rng.randint(1, 10))]
+            outcomes = [manager.apply_votes(batch) for manager in managers]
+            assert outcomes[0] == outcomes[1]
+        else:
+            for manager in managers:
+                manager.reset_game()
+                assert manager.get_results() == [] and manager.get_total_votes() == 0
+            items, managers = random_game(rng)
+        assert_same(*managers, rng)
@@ -0,0 +1,102 @@
+import numbers
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+VOTE_BATCH_COLUMNS = ['target', 'choice', 'delta']
+
+def tally_vote_batch(batch: Any, check_pair: Callable[[Any, Any], Optional[str]],
+                     allow_removals: bool = True) -> Tuple[Dict[Tuple[Any, Any], int], List[Dict], int]:
+    """Validate (target, choice, delta) records and sum the deltas per (target, choice)
+
+    `batch` is an iterable of 3-tuples or a pandas DataFrame (columns named
+    target/choice/delta, or the first three columns). `check_pair` returns a
+    rejection reason for an unknown target or choice, or None. Returns the net
+    deltas, the rejected rows and the number of accepted rows.
+    """
+    if hasattr(batch, 'itertuples'):
+        return _tally_frame(batch, check_pair, allow_removals)
+
+    net = Counter()
+    rejected = []
+    accepted = 0
+    pair_reasons = {}
+    for row, record in enumerate(batch):
+        try:
+            target, choice, delta = record
+        except (TypeError, ValueError):
+            rejected.append({'row': row, 'record': record, 'reason': "expected (target, choice, delta)"})
+            continue
+
+        reason = _delta_reason(delta, allow_removals)
+        if reason is None:
+            try:
+                reason = pair_reasons[target, choice]
+            except KeyError:
+                reason = pair_reasons[target, choice] = check_pair(target, choice)
+            except TypeError:
+                reason = "target and choice must be hashable"
+        if reason is not None:
+            rejected.append({'row': row, 'record': record, 'reason': reason})
+            continue
+
+        net[target, choice] += int(delta)
+        accepted += 1
+
+    return {pair: delta for pair, delta in net.items() if delta}, rejected, accepted
+
+def _tally_frame(frame: Any, check_pair: Callable[[Any, Any], Optional[str]],
+                 allow_removals: bool) -> Tuple[Dict[Tuple[Any, Any], int], List[Dict], int]:
+    """DataFrame version of tally_vote_batch: checks each distinct pair once and sums with groupby"""
+    import pandas as pd
+
+    if set(VOTE_BATCH_COLUMNS).issubset(frame.columns):
+        frame = frame[VOTE_BATCH_COLUMNS]
+    elif len(frame.columns) < 3:
+        rejected = [
+            {'row': row, 'record': record, 'reason': "expected (target, choice, delta)"}
+            for row, record in enumerate(frame.itertuples(index=False, name=None))
+        ]
+        return {}, rejected, 0
+    else:
+        frame = frame.iloc[:, :3].set_axis(VOTE_BATCH_COLUMNS, axis=1)
+    frame = frame.reset_index(drop=True)
+
+    deltas = pd.to_numeric(frame['delta'], errors='coerce')
+    reasons = pd.Series(None, index=frame.index, dtype=object)
+    bad_delta = deltas.isna() | (deltas.abs() == float('inf')) | (deltas != deltas.round()) | (deltas == 0)
+    reasons[bad_delta] = "delta must be a non-zero integer"
+    if not allow_removals:
+        reasons[~bad_delta & (deltas < 0)] = "vote removals are not supported"
+
+    pairs = frame[['target', 'choice']].drop_duplicates()
+    pair_reasons = {
+        (target, choice): reason
+        for target, choice in pairs.itertuples(index=False, name=None)
+        if (reason := check_pair(target, choice)) is not None
+    }
+    if pair_reasons:
+        keys = pd.MultiIndex.from_frame(frame[['target', 'choice']])
+        row_reasons = pd.Series(keys.map(lambda pair: pair_reasons.get(pair)), index=frame.index)
+        reasons = reasons.fillna(row_reasons)
+
+    bad = reasons.notna()
+    rejected = [
+        {'row': row, 'record': record, 'reason': reason}
+        for row, record, reason in zip(frame.index[bad], frame[bad].itertuples(index=False, name=None), reasons[bad])
+    ]
+
+    good = frame[~bad].assign(delta=deltas[~bad].astype('int64'))
+    sums = good.groupby(['target', 'choice'], sort=False)['delta'].sum()
+    net = {pair: int(delta) for pair, delta in sums.items() if delta}
+    return net, rejected, int((~bad).sum())
+
+def _delta_reason(delta: Any, allow_removals: bool) -> Optional[str]:
+    if isinstance(delta, bool) or not isinstance(delta, numbers.Real):
+        return "delta must be a non-zero integer"
+    if not isinstance(delta, numbers.Integral) and not float(delta).is_integer():
+        return "delta must be a non-zero integer"
+    if delta == 0:
+        return "delta must be a non-zero integer"
+    if delta < 0 and not allow_removals:
+        return "vote removals are not supported"
+    return None
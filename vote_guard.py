@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import math
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+# (voter, target) pairs a probabilistic guard is sized for; past this its false-positive rate
+# climbs gradually, but its memory never grows
+DEFAULT_CAPACITY = 1_000_000
+# False-positive rate of the pages' one-vote-per-person polls (about 1.8 MB per game at 0.1%)
+VOTE_LIMIT_FALSE_POSITIVE_RATE = float(os.environ.get("NERD_FIGHTS_VOTE_LIMIT_FP_RATE", "0.001"))
+
+class VoteGuard:
+    """Remembers which voters have voted on which targets, so each may vote once per target
+
+    Exact mode keeps a set of 64-bit fingerprints (collisions are vanishingly rare). With a
+    false_positive_rate it is a Bloom filter of fixed size instead: about 1.2 bytes per pair
+    at 1%, where a voter who hasn't voted yet is wrongly turned away at roughly that rate.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, false_positive_rate: Optional[float] = None,
+                 salt: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if false_positive_rate is not None and not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        # Keyed hashing, so nobody can pick voter tokens that collide with someone else's
+        self.salt = salt or os.urandom(16).hex()
+        self._key = bytes.fromhex(self.salt)
+        self._lock = threading.Lock()
+        self.claims = 0
+        self.rejections = 0
+        if false_positive_rate is None:
+            self._fingerprints = set()
+            self._bits = None
+            digest_size = 8
+        else:
+            # The standard Bloom filter sizing: m = -n ln p / (ln 2)^2 bits and k = m/n ln 2 hashes
+            bit_count = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+            self._bit_count = max(8, bit_count + -bit_count % 8)
+            if self._bit_count > 1 << 32:
+                raise ValueError("capacity is too large for a 512 MB filter at this false-positive rate")
+            # Each hash is 4 bytes of one digest, and a digest is at most 64 bytes
+            self._hash_count = min(16, max(1, round(self._bit_count / capacity * math.log(2))))
+            self._unpack_hashes = struct.Struct(f"<{self._hash_count}I").unpack
+            self._fingerprints = None
+            self._bits = bytearray(self._bit_count // 8)
+            digest_size = 4 * self._hash_count
+        # Copying a keyed hasher is much cheaper than setting up a new one per vote
+        self._hasher = hashlib.blake2b(digest_size=digest_size, key=self._key)
+
+    def is_exact(self) -> bool:
+        """Check whether this guard never turns away a first vote"""
+        return self._bits is None
+
+    def _digest(self, voter: str, target: str) -> bytes:
+        hasher = self._hasher.copy()
+        hasher.update(f"{voter}\x00{target}".encode("utf-8"))
+        return hasher.digest()
+
+    def _positions(self, digest: bytes) -> List[int]:
+        bit_count = self._bit_count
+        return [value % bit_count for value in self._unpack_hashes(digest)]
+
+    def has_claimed(self, voter: str, target: str) -> bool:
+        """Check whether voter has (probably) voted on target, without recording anything"""
+        digest = self._digest(voter, target)
+        if self._bits is None:
+            return int.from_bytes(digest, "little") in self._fingerprints
+        bits = self._bits
+        return all(bits[position >> 3] >> (position & 7) & 1 for position in self._positions(digest))
+
+    def claim(self, voter: str, target: str) -> bool:
+        """Record voter's vote on target; returns False if they (probably) voted on it already"""
+        digest = self._digest(voter, target)
+        with self._lock:
+            if self._bits is None:
+                fingerprint = int.from_bytes(digest, "little")
+                seen = fingerprint in self._fingerprints
+                if not seen:
+                    self._fingerprints.add(fingerprint)
+            else:
+                bits = self._bits
+                unset = [position for position in self._positions(digest) if not bits[position >> 3] >> (position & 7) & 1]
+                for position in unset:
+                    bits[position >> 3] |= 1 << (position & 7)
+                seen = not unset
+            if seen:
+                self.rejections += 1
+            else:
+                self.claims += 1
+            return not seen
+
+    def clear(self):
+        """Forget every vote, keeping the size and salt"""
+        with self._lock:
+            if self._bits is None:
+                self._fingerprints = set()
+            else:
+                self._bits = bytearray(len(self._bits))
+            self.claims = 0
+            self.rejections = 0
+
+    def estimated_size(self) -> int:
+        """Get a rough memory footprint in bytes"""
+        if self._bits is None:
+            # A set slot plus an int object per fingerprint
+            return 90 * len(self._fingerprints)
+        return len(self._bits)
+
+    def stats(self) -> Dict:
+        """Get claim and rejection counts, plus the current false-positive rate estimate"""
+        if self._bits is None:
+            false_positive_rate = 0.0
+        else:
+            fill = 1 - math.exp(-self._hash_count * self.claims / self._bit_count)
+            false_positive_rate = fill ** self._hash_count
+        return {
+            'claims': self.claims,
+            'rejections': self.rejections,
+            'bytes': self.estimated_size(),
+            'false_positive_rate': false_positive_rate
+        }
+
+    def export(self) -> Dict:
+        """Get the guard as JSON-compatible data (for journal snapshots)"""
+        with self._lock:
+            if self._bits is None:
+                packed = array('Q', sorted(self._fingerprints))
+                if sys.byteorder == 'big':
+                    packed.byteswap()  # stored little-endian
+                data = packed.tobytes()
+            else:
+                data = bytes(self._bits)
+            return {
+                'capacity': self.capacity,
+                'false_positive_rate': self.false_positive_rate,
+                'salt': self.salt,
+                'claims': self.claims,
+                'data': base64.b64encode(data).decode("ascii")
+            }
+
+    @classmethod
+    def from_export(cls, exported: Dict) -> 'VoteGuard':
+        """Rebuild a guard from export() data"""
+        guard = cls(exported['capacity'], exported['false_positive_rate'], exported['salt'])
+        data = base64.b64decode(exported['data'])
+        if guard._bits is None:
+            packed = array('Q')
+            packed.frombytes(data)
+            if sys.byteorder == 'big':
+                packed.byteswap()
+            guard._fingerprints = set(packed)
+        elif len(data) == len(guard._bits):
+            guard._bits = bytearray(data)
+        else:
+            raise ValueError("vote guard data doesn't match its size")
+        guard.claims = exported['claims']
+        return guard
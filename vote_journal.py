@@ -0,0 +1,227 @@
+import glob
+import inspect
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+JOURNAL_DIR = os.environ.get("NERD_FIGHTS_JOURNAL_DIR", "journal")
+# Keep segments a snapshot supersedes in a history/ folder (for full vote history exports) instead of
+# deleting them; off by default, since the folder then grows with every vote ever cast
+KEEP_HISTORY = os.environ.get("NERD_FIGHTS_KEEP_HISTORY", "0") == "1"
+
+class VoteJournal:
+    """Append-only log of game mutations, group-committed by a background flusher
+
+    Every `snapshot_every` events the game is snapshotted and older segments are
+    dropped (or, with keep_history, moved aside), so recovery replays at most one
+    snapshot interval of events.
+    """
+    def __init__(self, directory: str, batch_size: int = 512, flush_interval: float = 0.05,
+                 snapshot_every: int = 100_000, fsync: bool = True, keep_history: bool = KEEP_HISTORY):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.keep_history = keep_history
+        self.history_directory = os.path.join(directory, "history")
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending = deque()  # (seq, op, args) waiting for the flusher
+        self._seqs = itertools.count(1)
+        self._segment = None
+        self._segment_number = 0
+        self._events_since_snapshot = 0
+        self._snapshot_source: Optional[Callable[[], Tuple[int, Dict]]] = None
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._flusher = None
+
+    def recover(self) -> Tuple[Optional[Dict], List[Tuple[str, List]]]:
+        """Get the latest snapshot state (or None) and the events recorded after it"""
+        watermark, state = 0, None
+        snapshots = self._files("snapshot")
+        if snapshots:
+            with open(snapshots[-1], encoding="utf-8") as f:
+                snapshot = json.load(f)
+            watermark, state = snapshot["seq"], snapshot["state"]
+
+        segments = self._files("segment")
+        if segments:
+            self._segment_number = self._file_number(segments[-1])
+
+        events = []
+        last_seq = watermark
+        for seq, op, args in self._read_segments(segments):
+            if seq > watermark:
+                events.append((op, args))
+            last_seq = max(last_seq, seq)
+
+        # Carry on numbering after everything already on disk
+        self._seqs = itertools.count(last_seq + 1)
+        return state, events
+
+    def attach(self, snapshot_source: Callable[[], Tuple[int, Dict]]):
+        """Start journaling; snapshot_source returns (mark(), state) taken atomically"""
+        self._snapshot_source = snapshot_source
+        self._closed.clear()  # a journal closed by close_journaled() can be attached again
+        self._roll_segment()
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="vote-journal", daemon=True)
+            self._flusher.start()
+
+    def append(self, op: str, args: Tuple):
+        """Queue an event; it reaches disk with the next group commit"""
+        self._pending.append((next(self._seqs), op, args))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def mark(self) -> int:
+        """Claim a sequence number that sorts after every event appended so far"""
+        return next(self._seqs)
+
+    def flush(self):
+        """Write every queued event and make it durable"""
+        with self._write_lock:
+            self._write_pending()
+
+    def snapshot(self):
+        """Roll to a fresh segment, snapshot the game and drop what the snapshot supersedes"""
+        if self._snapshot_source is None:
+            return
+
+        with self._write_lock:
+            self._write_pending()
+            self._roll_segment()
+            watermark, state = self._snapshot_source()
+            path = os.path.join(self.directory, f"snapshot-{watermark:012d}.json")
+            self._write_atomically(path, json.dumps({"seq": watermark, "state": state}, separators=(",", ":")))
+            self._events_since_snapshot = 0
+
+            # Older segments only hold events numbered below the watermark
+            if self.keep_history:
+                os.makedirs(self.history_directory, exist_ok=True)
+                for old in self._files("segment")[:-1]:
+                    os.replace(old, os.path.join(self.history_directory, os.path.basename(old)))
+            for old in self._files("segment")[:-1] + self._files("snapshot")[:-1]:
+                os.remove(old)
+
+    def history(self) -> Iterator[Tuple[int, str, List]]:
+        """Yield every (seq, op, args) event still on disk, oldest first, reading one segment at a time
+
+        With keep_history that is everything since the journal was created; otherwise
+        only the events since the last snapshot.
+        """
+        self.flush()
+        archived = sorted(glob.glob(os.path.join(self.history_directory, "segment-*.log")))
+        for path in sorted(archived + self._files("segment"), key=self._file_number):
+            if not os.path.exists(path):
+                # Moved into history/ by a snapshot since we listed it
+                path = os.path.join(self.history_directory, os.path.basename(path))
+            yield from self._read_segments([path])
+
+    def close(self):
+        """Flush outstanding events and stop the background flusher"""
+        self._closed.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _flush_loop(self):
+        while not self._closed.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if self._events_since_snapshot >= self.snapshot_every:
+                self.snapshot()
+
+    def _write_pending(self):
+        if not self._pending or self._segment is None:
+            return
+
+        lines = []
+        while self._pending:
+            seq, op, args = self._pending.popleft()
+            lines.append(json.dumps([seq, op, *args], separators=(",", ":")))
+        lines.append("")
+        self._segment.write("\n".join(lines))
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._events_since_snapshot += len(lines) - 1
+
+    def _roll_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_number += 1
+        path = os.path.join(self.directory, f"segment-{self._segment_number:012d}.log")
+        self._segment = open(path, "a", encoding="utf-8")
+
+    def _read_segments(self, segments: List[str]) -> Iterator[Tuple[int, str, List]]:
+        for path in segments:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seq, op, *args = json.loads(line)
+                    except ValueError:
+                        # A torn final write from a crash; everything before it is intact
+                        break
+                    yield seq, op, args
+
+    def _write_atomically(self, path: str, text: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _files(self, kind: str) -> List[str]:
+        extension = "json" if kind == "snapshot" else "log"
+        return sorted(glob.glob(os.path.join(self.directory, f"{kind}-*.{extension}")))
+
+    @staticmethod
+    def _file_number(path: str) -> int:
+        return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+def open_journaled(directory: str, factory: Callable[[], Any], **journal_options) -> Any:
+    """Rebuild a game from its journal directory and keep journaling every change to it"""
+    journal = VoteJournal(directory, **journal_options)
+    manager = factory()
+    state, events = journal.recover()
+    if state is not None:
+        manager.import_state(state)
+    for op, args in events:
+        # Replayed changes aren't new traffic, so they go around the metrics hooks
+        inspect.unwrap(getattr(type(manager), op))(manager, *args)
+    manager.attach_journal(journal)
+    return manager
+
+def close_journaled(manager: Any):
+    """Snapshot a journaled game and stop journaling it, so it can be dropped from memory
+
+    open_journaled() rebuilds it from disk; reopen_journaled() resumes the same object,
+    writing out anything recorded through it in the meantime.
+    """
+    if manager.journal is not None:
+        manager.journal.snapshot()
+        manager.journal.close()
+
+def reopen_journaled(manager: Any):
+    """Resume journaling a game that close_journaled() stopped"""
+    if manager.journal is not None:
+        manager.attach_journal(manager.journal)
+
+def journal_path(kind: str, game_id: str) -> str:
+    """Get the journal directory for a game"""
+    return os.path.join(JOURNAL_DIR, kind, game_id)
@@ -0,0 +1,69 @@
+from typing import Dict, Iterable, List, Optional
+
+CHOICES = ('smash', 'pass')
+
+class DictVoteTable:
+    """Smash/pass counts kept as one small dict per item"""
+    def __init__(self, items: Iterable[str], counts: Optional[List[List[int]]] = None):
+        self.counts = {item: {'smash': 0, 'pass': 0} for item in items}  # item_name: {'smash': count, 'pass': count}
+        if counts is not None:
+            for item_votes, (smash, pass_) in zip(self.counts.values(), counts):
+                item_votes['smash'] = smash
+                item_votes['pass'] = pass_
+    
+    def __contains__(self, item: str) -> bool:
+        return item in self.counts
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+    
+    def get(self, item: str) -> Optional[Dict[str, int]]:
+        """Get an item's counts"""
+        return self.counts.get(item)
+    
+    def change(self, item: str, choice: str, delta: int) -> bool:
+        """Adjust one count unless that would take it below zero"""
+        item_votes = self.counts[item]
+        if item_votes[choice] + delta < 0:
+            return False
+        item_votes[choice] += delta
+        return True
+    
+    def apply_net(self, item: str, choice: str, delta: int):
+        """Adjust one count by a net amount, stopping at zero"""
+        item_votes = self.counts[item]
+        item_votes[choice] = max(0, item_votes[choice] + delta)
+    
+    def results(self, limit: Optional[int] = None) -> List[Dict]:
+        """Get item results sorted by smash percentage (optionally only the first few)"""
+        results = []
+        for item, votes in self.counts.items():
+            total_votes = votes['smash'] + votes['pass']
+            smash_percentage = (votes['smash'] / total_votes * 100) if total_votes > 0 else 0
+            
+            results.append({
+                'item': item,
+                'smash_votes': votes['smash'],
+                'pass_votes': votes['pass'],
+                'total_votes': total_votes,
+                'smash_percentage': smash_percentage
+            })
+        
+        # Sort by smash percentage (highest first)
+        results.sort(key=lambda x: x['smash_percentage'], reverse=True)
+        return results if limit is None else results[:limit]
+    
+    def total_votes(self) -> int:
+        """Get total number of votes cast"""
+        total = 0
+        for votes in self.counts.values():
+            total += votes['smash'] + votes['pass']
+        return total
+    
+    def export(self) -> List[List[int]]:
+        """Get [smash, pass] pairs in item order"""
+        return [[votes['smash'], votes['pass']] for votes in self.counts.values()]
+    
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        """Get counts as {item: {'smash': n, 'pass': n}}"""
+        return self.counts